@@ -1,6 +1,9 @@
 from server import create_app
 
-app = create_app()
+# Shard workers started with spawn (Windows, macOS) import this module as
+# __mp_main__; they need the package, not a second app.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 
 if __name__ == '__main__':
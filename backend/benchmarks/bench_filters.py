@@ -0,0 +1,126 @@
+"""Benchmark GET /rankings latency against filter selectivity.
+
+Builds a synthetic candidate pool in a throwaway SQLite file and times
+``fetch_rankings`` with progressively narrower pushdown filters. Latency should
+track the size of the matching subset rather than the pool.
+
+    python benchmarks/bench_filters.py --candidates 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+_WORKDIR = pathlib.Path(tempfile.mkdtemp(prefix='bench-filters-'))
+os.environ.setdefault('RESUME_SELECTOR_DB_PATH', str(_WORKDIR / 'bench.sqlite3'))
+os.environ.setdefault('RESUME_SELECTOR_UPLOAD_DIR', str(_WORKDIR / 'uploads'))
+os.environ.setdefault('RESUME_SELECTOR_EMBEDDER', 'stub')
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from server.database import db_connection, init_db  # noqa: E402
+from server.embeddings import embedding_model_name  # noqa: E402
+from server.services.candidate_filter import CandidateFilter  # noqa: E402
+from server.services.job_service import create_job  # noqa: E402
+from server.services.ranking_service import fetch_rankings  # noqa: E402
+from server.utils.extraction import EXTRACTOR_VERSION, SKILL_TERMS  # noqa: E402
+
+SCENARIOS = [
+    ('no filter', CandidateFilter()),
+    ('min_years>=5', CandidateFilter(min_years=5)),
+    ('python', CandidateFilter(required_skills=['python'])),
+    ('python+kubernetes', CandidateFilter(required_skills=['python', 'kubernetes'])),
+    ('python+kubernetes, 5y, edu>=3', CandidateFilter(required_skills=['python', 'kubernetes'], min_years=5, min_edu=3)),
+]
+
+
+def populate(count: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    vocabulary = sorted(SKILL_TERMS)
+    weights = np.linspace(2.0, 0.2, len(vocabulary))
+    weights /= weights.sum()
+    model = embedding_model_name()
+    with db_connection() as conn:
+        for start in range(0, count, 5000):
+            size = min(5000, count - start)
+            embeddings = rng.standard_normal((size, 384)).astype(np.float32)
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+            rows = []
+            skill_lists = []
+            for i in range(size):
+                skills = sorted(set(rng.choice(vocabulary, size=int(rng.integers(3, 12)), p=weights).tolist()))
+                skill_lists.append(skills)
+                rows.append(
+                    (
+                        f'Candidate {start + i}',
+                        '',
+                        '',
+                        '',
+                        ' '.join(skills),
+                        embeddings[i].tobytes(),
+                        float(rng.integers(0, 21)),
+                        int(rng.integers(0, 5)),
+                        json.dumps(skills),
+                        '2024-01-01T00:00:00Z',
+                        model,
+                        EXTRACTOR_VERSION,
+                    )
+                )
+            first_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 AS next FROM candidates').fetchone()['next']
+            conn.executemany(
+                '''
+                INSERT INTO candidates (
+                    full_name, email, phone, pdf_path, text, embedding, years_exp, edu_level, skills, created_at,
+                    embedding_model, extractor_version
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                rows,
+            )
+            conn.executemany(
+                'INSERT INTO candidate_skills (skill, candidate_id) VALUES (?, ?)',
+                [(skill, first_id + i) for i, skills in enumerate(skill_lists) for skill in skills],
+            )
+            conn.commit()
+
+
+def matching(candidate_filter: CandidateFilter) -> int:
+    where, params = candidate_filter.where_clause('c')
+    with db_connection() as conn:
+        return conn.execute(f'SELECT COUNT(*) AS n FROM candidates c WHERE {where}', params).fetchone()['n']
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    init_db()
+    populate(args.candidates)
+    job_id = create_job('Platform ML Engineer', 'Python, Kubernetes, Docker and AWS; 5+ years; MSc preferred')
+
+    print(f'pool={args.candidates} k={args.k} repeats={args.repeats}')
+    print(f'{"scenario":<32}{"matched":>10}{"median ms":>12}{"us/match":>12}')
+    for name, candidate_filter in SCENARIOS:
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            fetch_rankings(job_id, args.k, 0.0, strategy='greedy', candidate_filter=candidate_filter)
+            timings.append((time.perf_counter() - started) * 1000.0)
+        matched = matching(candidate_filter)
+        median = float(np.median(timings))
+        per_match = median * 1000.0 / matched if matched else 0.0
+        print(f'{name:<32}{matched:>10}{median:>12.1f}{per_match:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark GET /rankings response encoding: layout, JSON encoder and compression.
+
+Synthesises ranking payloads of k candidates shaped exactly like
+``fetch_rankings`` output and reports encode time and bytes on the wire for
+row vs columnar layouts, the ``jsonify`` baseline vs ``utils.responses.dumps``,
+and identity/gzip/br content codings.
+
+    python benchmarks/bench_payload.py --k 1000 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+_WORKDIR = pathlib.Path(tempfile.mkdtemp(prefix='bench-payload-'))
+os.environ.setdefault('RESUME_SELECTOR_DB_PATH', str(_WORKDIR / 'bench.sqlite3'))
+os.environ.setdefault('RESUME_SELECTOR_UPLOAD_DIR', str(_WORKDIR / 'uploads'))
+os.environ.setdefault('RESUME_SELECTOR_EMBEDDER', 'stub')
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from server.services.ranking_service import FEATURE_COLUMNS, rows_from_columns  # noqa: E402
+from server.utils.extraction import SKILL_TERMS  # noqa: E402
+from server.utils.responses import compress, dumps, orjson, supported_encodings  # noqa: E402
+
+
+def synthetic_columns(k: int, seed: int = 0) -> Dict[str, List]:
+    rng = np.random.default_rng(seed)
+    vocabulary = sorted(SKILL_TERMS)
+    features = rng.random((k, len(FEATURE_COLUMNS)))
+    weights = rng.random(len(FEATURE_COLUMNS)).astype(np.float32)
+    return {
+        'candidate_id': list(range(1, k + 1)),
+        'full_name': [f'Candidate {i}' for i in range(k)],
+        'email': [f'candidate{i}@example.com' for i in range(k)],
+        'phone': [f'+1 555 {i % 10000:04d}' for i in range(k)],
+        'skills': [sorted(set(rng.choice(vocabulary, size=int(rng.integers(3, 12))).tolist())) for _ in range(k)],
+        'years_exp': rng.integers(0, 21, k).astype(float).tolist(),
+        'edu_level_raw': rng.integers(0, 5, k).tolist(),
+        **{col: features[:, j].tolist() for j, col in enumerate(FEATURE_COLUMNS)},
+        'score': (features.astype(np.float32) @ weights).tolist(),
+        'explore': (rng.random(k) < 0.05).tolist(),
+    }
+
+
+def jsonify_dumps(payload) -> bytes:
+    # What Flask's default provider does outside debug mode.
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def timed(fn: Callable[[], bytes], repeats: int):
+    timings = []
+    result = b''
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return result, float(np.median(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--k', type=int, nargs='+', default=[1000, 50000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    encoders = [('jsonify', jsonify_dumps), ('orjson' if orjson is not None else 'stdlib', dumps)]
+    print(f'{"k":>7} {"layout":<9}{"encoder":<9}{"encode ms":>10}{"identity":>11}{"coding":>8}{"bytes":>11}{"ms":>9}')
+    for k in args.k:
+        columns = synthetic_columns(k)
+        meta = {'job_id': 1, 'weights': [0.5] * len(FEATURE_COLUMNS), 'strategy': 'greedy', 'seed': 7, 'slate_id': 'x' * 16}
+        payloads = {
+            'rows': {**meta, 'candidates': rows_from_columns(columns)},
+            'columnar': {**meta, 'format': 'columnar', 'count': k, 'columns': columns},
+        }
+        for layout, payload in payloads.items():
+            for encoder_name, encoder in encoders:
+                body, encode_ms = timed(lambda: encoder(payload), args.repeats)
+                for coding in supported_encodings():
+                    compressed, compress_ms = timed(lambda: compress(body, coding), args.repeats)
+                    print(
+                        f'{k:>7} {layout:<9}{encoder_name:<9}{encode_ms:>10.1f}{len(body):>11}'
+                        f'{coding:>8}{len(compressed):>11}{compress_ms:>9.1f}'
+                    )
+
+
+if __name__ == '__main__':
+    main()
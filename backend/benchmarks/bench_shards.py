@@ -0,0 +1,67 @@
+"""Benchmark scatter-gather ranking latency against the number of shards.
+
+Reuses the synthetic pool from ``bench_filters`` and times ``fetch_rankings``
+with the pool split into each requested number of id-range shards, one worker
+process per shard. On an N-core host latency should approach 1/N of the
+single-shard figure once the pool is large enough to amortise the gather.
+
+    python benchmarks/bench_shards.py --candidates 200000 --shards 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from bench_filters import populate  # sets up the throwaway database first
+
+import server.services.ranking_service as ranking_service  # noqa: E402
+import server.services.shard_service as shard_service  # noqa: E402
+from server.database import init_db  # noqa: E402
+from server.services.job_service import create_job  # noqa: E402
+
+
+def use_shards(count: int) -> None:
+    if shard_service._EXECUTOR is not None:
+        shard_service._EXECUTOR.shutdown()
+        shard_service._EXECUTOR = None
+    ranking_service.RANKING_SHARDS = count
+    shard_service.RANKING_SHARDS = count
+    shard_service.RANKING_SHARD_WORKERS = count
+    shard_service.start_shard_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('-k', type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    populate(args.candidates)
+    job_id = create_job('Platform ML Engineer', 'Python, Kubernetes, Docker and AWS; 5+ years; MSc preferred')
+
+    print(f'pool={args.candidates} k={args.k} repeats={args.repeats}')
+    print(f'{"shards":>8}{"median ms":>12}{"speedup":>10}')
+    baseline = None
+    for count in args.shards:
+        use_shards(count)
+        fetch_rankings = ranking_service.fetch_rankings
+        fetch_rankings(job_id, args.k, 0.0, strategy='greedy')  # warm caches
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            fetch_rankings(job_id, args.k, 0.0, strategy='greedy')
+            timings.append((time.perf_counter() - started) * 1000.0)
+        median = float(np.median(timings))
+        baseline = baseline or median
+        print(f'{count:>8}{median:>12.1f}{baseline / median:>10.2f}')
+    use_shards(1)  # stops the last pool
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Benchmark snapshot export and import throughput.
+
+Reuses the synthetic pool from ``bench_filters``, exports it, then restores
+the snapshot into a second throwaway database and reports rows/s for both.
+
+    python benchmarks/bench_snapshot.py --candidates 200000 --jobs 2
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from bench_filters import _WORKDIR, populate  # sets up the throwaway database first
+
+import server.database as database  # noqa: E402
+from server.services.job_service import create_job  # noqa: E402
+from server.services.snapshot_service import export_snapshot, import_snapshot  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--compress', action='store_true')
+    args = parser.parse_args()
+
+    database.init_db()
+    populate(args.candidates)
+    for index in range(args.jobs):
+        create_job(f'Platform Engineer {index}', 'Python, Kubernetes, Docker and AWS; 5+ years; MSc preferred')
+
+    exported = export_snapshot(_WORKDIR / 'snapshot', compress=args.compress)
+    print(
+        f'export: {exported.rows} rows, {exported.bytes / 1e6:.1f} MB in {exported.elapsed_s:.2f}s '
+        f'({exported.rows / exported.elapsed_s:.0f} rows/s)'
+    )
+    database.DB_PATH = _WORKDIR / 'restored.sqlite3'
+    database.init_db()
+    imported = import_snapshot(_WORKDIR / 'snapshot')
+    print(f'import: {imported.rows} rows in {imported.elapsed_s:.2f}s ({imported.rows / imported.elapsed_s:.0f} rows/s)')
+    for table, rows in imported.tables.items():
+        print(f'  {table:>18} {rows:>10}')
+
+
+if __name__ == '__main__':
+    main()
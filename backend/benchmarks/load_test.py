@@ -0,0 +1,346 @@
+"""Concurrent HTTP load test for uploads, rankings and feedback.
+
+Boots the app in a subprocess (stub embedder, throwaway SQLite file and upload
+directory) unless ``--url`` points at a running server. It then drives a
+weighted mix of POST /resumes, GET /rankings and POST /feedback from many
+client threads. It reports throughput, latency percentiles and error rates per
+operation, and exits non-zero when a threshold is exceeded.
+
+    python benchmarks/load_test.py --clients 16 --duration 30 --mix upload=1,rank=6,feedback=3
+    python benchmarks/load_test.py --max-p95-ms rank=250,feedback=150 --max-error-rate 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from seed_samples import JOB_DESCRIPTION, RESUMES, generate_samples, render_pdf  # noqa: E402
+
+OPERATIONS = ('upload', 'rank', 'feedback')
+LOCKED_MARKER = 'database is locked'
+SERVER_SCRIPT = (
+    'import sys\n'
+    'from werkzeug.serving import run_simple\n'
+    'from app import app\n'
+    "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)\n"
+)
+FIRST_NAMES = ('Ana', 'Bilal', 'Chen', 'Dara', 'Emeka', 'Freya', 'Goran', 'Hana', 'Ivo', 'Jun', 'Kaia', 'Luis')
+LAST_NAMES = ('Okafor', 'Lindqvist', 'Haddad', 'Nakamura', 'Petrov', 'Silva', 'Quinn', 'Mbeki', 'Novak', 'Rossi')
+SKILLS = sorted({skill for spec in RESUMES for skill in spec.skills})
+EXPERIENCE = [line for spec in RESUMES for line in spec.experience]
+
+
+@dataclass
+class Sample:
+    op: str
+    latency_ms: float
+    status: int
+    error: Optional[str] = None
+
+
+@dataclass
+class Recorder:
+    samples: List[Sample] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, sample: Sample) -> None:
+        with self.lock:
+            self.samples.append(sample)
+
+
+def parse_mapping(raw: str, cast=float) -> Dict[str, float]:
+    mapping: Dict[str, float] = {}
+    for part in filter(None, (item.strip() for item in raw.split(','))):
+        key, _, value = part.partition('=')
+        if key not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'unknown operation {key!r}; expected one of {", ".join(OPERATIONS)}')
+        mapping[key] = cast(value)
+    return mapping
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def boot_server(workdir: pathlib.Path) -> Tuple[subprocess.Popen, str, pathlib.Path]:
+    port = free_port()
+    log_path = workdir / 'server.log'
+    env = dict(
+        os.environ,
+        RESUME_SELECTOR_EMBEDDER='stub',
+        RESUME_SELECTOR_DB_PATH=str(workdir / 'load.sqlite3'),
+        RESUME_SELECTOR_UPLOAD_DIR=str(workdir / 'uploads'),
+    )
+    with open(log_path, 'wb') as log:
+        proc = subprocess.Popen(
+            [sys.executable, '-c', SERVER_SCRIPT, str(port)], cwd=BACKEND_DIR, env=env, stdout=log, stderr=log
+        )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited during startup; see {log_path}')
+        try:
+            if requests.get(f'{url}/health', timeout=1).ok:
+                return proc, url, log_path
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f'server did not become healthy; see {log_path}')
+
+
+def unique_pdf(rng: random.Random, nonce: str) -> bytes:
+    # New text, not just new bytes: a resume that only differs in its hash is linked as a near-duplicate.
+    name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+    skills = rng.sample(SKILLS, 6)
+    lines = [
+        name,
+        f'{nonce}@load-test.example.com',
+        f'(555) {rng.randrange(1000):03d}-{rng.randrange(10000):04d}',
+        '',
+        'Summary:',
+        f'{rng.randint(1, 15)} years building products with {skills[0]} and {skills[1]}.',
+        '',
+        'Skills: ' + ', '.join(skills),
+        '',
+        'Experience:',
+        *rng.sample(EXPERIENCE, 3),
+        '',
+        f'Reference: load test {nonce}',
+    ]
+    return render_pdf(name, lines)
+
+
+class Client(threading.Thread):
+    def __init__(
+        self,
+        index: int,
+        url: str,
+        job_ids: List[int],
+        pdfs: List[bytes],
+        mix: Dict[str, float],
+        k: int,
+        duplicate_ratio: float,
+        deadline: float,
+        recorder: Recorder,
+        seed: int,
+    ) -> None:
+        super().__init__(name=f'load-client-{index}', daemon=True)
+        self.index = index
+        self.url = url
+        self.job_ids = job_ids
+        self.pdfs = pdfs
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.k = k
+        self.duplicate_ratio = duplicate_ratio
+        self.deadline = deadline
+        self.recorder = recorder
+        self.rng = random.Random(seed + index)
+        self.session = requests.Session()
+        self.last_slate: Dict[int, Dict] = {}
+        self.sent = 0
+
+    def run(self) -> None:
+        while time.monotonic() < self.deadline:
+            op = self.rng.choices(self.ops, self.weights)[0]
+            getattr(self, f'_{op}')()
+
+    def _timed(self, op: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        try:
+            resp = self.session.request(method, f'{self.url}{path}', timeout=60, **kwargs)
+        except requests.RequestException as exc:
+            self.recorder.add(Sample(op, (time.perf_counter() - started) * 1000.0, 0, type(exc).__name__))
+            return None
+        latency = (time.perf_counter() - started) * 1000.0
+        error = None
+        if resp.status_code >= 400:
+            error = LOCKED_MARKER if LOCKED_MARKER in resp.text else f'http {resp.status_code}'
+        self.recorder.add(Sample(op, latency, resp.status_code, error))
+        return resp
+
+    def _upload(self) -> None:
+        template = self.rng.choice(self.pdfs)
+        self.sent += 1
+        duplicate = self.rng.random() < self.duplicate_ratio
+        data = template if duplicate else unique_pdf(self.rng, f'{self.index}-{self.sent}-{time.time_ns()}')
+        self._timed('upload', 'POST', '/resumes', files={'file': ('cv.pdf', data, 'application/pdf')})
+
+    def _rank(self) -> None:
+        job_id = self.rng.choice(self.job_ids)
+        resp = self._timed('rank', 'GET', '/rankings', params={'job_id': job_id, 'k': self.k, 'epsilon': 0.1})
+        if resp is not None and resp.ok:
+            self.last_slate[job_id] = resp.json()
+
+    def _feedback(self) -> None:
+        if not self.last_slate:
+            self._rank()
+            return
+        job_id = self.rng.choice(list(self.last_slate))
+        slate = self.last_slate[job_id]
+        shown = [item['candidate_id'] for item in slate['candidates']]
+        if len(shown) < 2:
+            self._rank()
+            return
+        payload = {
+            'job_id': job_id,
+            'shown_candidate_ids': shown,
+            'chosen_candidate_id': self.rng.choice(shown),
+            'slate_id': slate.get('slate_id'),
+        }
+        self._timed('feedback', 'POST', '/feedback', json=payload)
+
+
+def prepare(url: str, pdfs: List[bytes], jobs: int, seed_uploads: int, seed: int) -> List[int]:
+    session = requests.Session()
+    rng = random.Random(seed)
+    job_ids = []
+    for i in range(jobs):
+        resp = session.post(
+            f'{url}/jobs', json={'title': f'{JOB_DESCRIPTION["title"]} {i}', 'description': JOB_DESCRIPTION['description']}
+        )
+        resp.raise_for_status()
+        job_ids.append(resp.json()['job_id'])
+    for i in range(seed_uploads):
+        data = pdfs[i] if i < len(pdfs) else unique_pdf(rng, f'seed-{i}-{time.time_ns()}')
+        session.post(f'{url}/resumes', files={'file': ('cv.pdf', data, 'application/pdf')}).raise_for_status()
+    return job_ids
+
+
+def summarize(samples: List[Sample], elapsed_s: float) -> Dict[str, Dict]:
+    by_op: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_op[sample.op].append(sample)
+    report: Dict[str, Dict] = {}
+    for op in [*OPERATIONS, 'total']:
+        group = samples if op == 'total' else by_op.get(op, [])
+        if not group:
+            continue
+        latencies = np.array([s.latency_ms for s in group])
+        errors = Counter(s.error for s in group if s.error)
+        report[op] = {
+            'requests': len(group),
+            'throughput_rps': len(group) / elapsed_s if elapsed_s else 0.0,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'max_ms': float(latencies.max()),
+            'error_rate': sum(errors.values()) / len(group),
+            'errors': dict(errors),
+        }
+    return report
+
+
+def check_thresholds(report: Dict[str, Dict], args: argparse.Namespace) -> List[str]:
+    failures = []
+    for op, limit in args.max_p95_ms.items():
+        if op in report and report[op]['p95_ms'] > limit:
+            failures.append(f'{op} p95 {report[op]["p95_ms"]:.1f} ms > {limit:.1f} ms')
+    total = report.get('total')
+    if total is None:
+        return ['no requests completed']
+    if total['error_rate'] > args.max_error_rate:
+        failures.append(f'error rate {total["error_rate"]:.2%} > {args.max_error_rate:.2%}')
+    if args.min_rps and total['throughput_rps'] < args.min_rps:
+        failures.append(f'throughput {total["throughput_rps"]:.1f} rps < {args.min_rps:.1f} rps')
+    locked = sum(report[op]['errors'].get(LOCKED_MARKER, 0) for op in OPERATIONS if op in report)
+    locked += report.get('server', {}).get('locked_in_log', 0)
+    if locked > args.max_locked:
+        failures.append(f'{locked} "database is locked" errors > {args.max_locked}')
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='target a running server instead of booting one')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of load after setup')
+    parser.add_argument('--mix', type=parse_mapping, default=parse_mapping('upload=1,rank=6,feedback=3'))
+    parser.add_argument('--jobs', type=int, default=4)
+    parser.add_argument('--seed-uploads', type=int, default=30, help='resumes uploaded before load starts')
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1, help='share of uploads that resend known bytes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-p95-ms', type=parse_mapping, default={}, help='e.g. rank=250,upload=1500')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--max-locked', type=int, default=0, help='tolerated "database is locked" failures')
+    parser.add_argument('--min-rps', type=float, default=0.0)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    workdir = pathlib.Path(tempfile.mkdtemp(prefix='load-test-'))
+    pdfs = [path.read_bytes() for path in generate_samples(workdir / 'samples') if path.name.startswith('cv_')]
+    proc, log_path = None, None
+    url = args.url
+    if url is None:
+        proc, url, log_path = boot_server(workdir)
+    try:
+        job_ids = prepare(url, pdfs, args.jobs, args.seed_uploads, args.seed)
+        recorder = Recorder()
+        deadline = time.monotonic() + args.duration
+        clients = [
+            Client(i, url, job_ids, pdfs, args.mix, args.k, args.duplicate_ratio, deadline, recorder, args.seed)
+            for i in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = summarize(recorder.samples, elapsed)
+    if log_path is not None:
+        # Unhandled SQLite errors surface as bare 500s; the server log names the cause.
+        report['server'] = {'locked_in_log': log_path.read_text(errors='replace').count(LOCKED_MARKER), 'log': str(log_path)}
+    failures = check_thresholds(report, args)
+
+    if args.json:
+        print(json.dumps({'clients': args.clients, 'duration_s': elapsed, 'report': report, 'failures': failures}, indent=2))
+    else:
+        print(f'clients={args.clients} duration={elapsed:.1f}s mix={args.mix} url={url}')
+        print(f'{"op":<10}{"requests":>9}{"rps":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}{"errors":>8}')
+        for op in [*OPERATIONS, 'total']:
+            if op in report:
+                r = report[op]
+                print(
+                    f'{op:<10}{r["requests"]:>9}{r["throughput_rps"]:>9.1f}{r["p50_ms"]:>9.1f}{r["p95_ms"]:>9.1f}'
+                    f'{r["p99_ms"]:>9.1f}{r["max_ms"]:>9.1f}{r["error_rate"]:>8.2%}'
+                )
+                if r['errors']:
+                    print(f'{"":<10}errors: {r["errors"]}')
+        if 'server' in report:
+            print(f'"database is locked" in server log: {report["server"]["locked_in_log"]} ({report["server"]["log"]})')
+        for failure in failures:
+            print(f'FAIL {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
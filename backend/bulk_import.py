@@ -0,0 +1,50 @@
+"""Bulk-import a directory or zip archive of PDF resumes.
+
+Parses PDFs in a process pool, embeds them in large batches and writes each
+batch in one transaction. Progress is checkpointed per file in the
+``import_checkpoints`` table, so re-running the same command after an
+interruption resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+
+from server.database import init_db
+from server.services.bulk_import_service import ImportSummary, run_bulk_import
+
+
+def print_progress(summary: ImportSummary) -> None:
+    done = summary.skipped + summary.processed
+    print(
+        f"[{done}/{summary.total}] imported={summary.imported} duplicates={summary.duplicates} "
+        f"failed={summary.failed} {summary.files_per_s:.1f} files/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import PDF resumes from a directory or zip archive")
+    parser.add_argument("source", type=pathlib.Path, help="Directory (searched recursively) or .zip archive")
+    parser.add_argument("--workers", type=int, default=None, help="PDF parsing processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Files per embedding batch and transaction")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that previously failed to parse")
+    args = parser.parse_args()
+
+    init_db()
+    summary = run_bulk_import(
+        args.source,
+        workers=args.workers,
+        batch_size=max(1, args.batch_size),
+        retry_failed=args.retry_failed,
+        progress=print_progress,
+    )
+    print(
+        f"Done: {summary.total} files, {summary.skipped} already checkpointed, {summary.imported} imported, "
+        f"{summary.duplicates} duplicates, {summary.failed} failed in {summary.elapsed_s:.1f}s "
+        f"({summary.files_per_s:.1f} files/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
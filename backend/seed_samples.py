@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import os
 import pathlib
@@ -113,7 +114,12 @@ DEFAULT_BACKEND = "http://localhost:8000"
 
 def write_pdf(path: pathlib.Path, header: str, lines: List[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    c = canvas.Canvas(str(path), pagesize=LETTER)
+    path.write_bytes(render_pdf(header, lines))
+
+
+def render_pdf(header: str, lines: List[str]) -> bytes:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=LETTER)
     width, height = LETTER
     y = height - 72
     c.setFont("Helvetica-Bold", 16)
@@ -131,6 +137,7 @@ def write_pdf(path: pathlib.Path, header: str, lines: List[str]) -> None:
             y = height - 72
             c.setFont("Helvetica", 11)
     c.save()
+    return buffer.getvalue()
 
 
 def generate_samples(output_dir: pathlib.Path) -> List[pathlib.Path]:
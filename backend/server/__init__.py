@@ -2,20 +2,41 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from pydantic import ValidationError
 
-from .config import ALLOWED_ORIGINS
+from .admission import Overloaded
+from .config import ALLOWED_ORIGINS, MAX_FILE_SIZE_BYTES
 from .database import init_db
+from .embeddings import embedding_model_name, get_embedder
+from .profiling import init_profiling
+from .routes.duplicates import duplicates_bp
+from .routes.events import events_bp
 from .routes.feedback import feedback_bp
 from .routes.health import health_bp
 from .routes.jobs import jobs_bp
+from .routes.metrics import metrics_bp
 from .routes.models import models_bp
+from .routes.profiles import profiles_bp
 from .routes.rankings import rankings_bp
+from .routes.reprocess import reprocess_bp
 from .routes.resumes import resumes_bp
+from .routes.search import search_bp
 from .routes.uploads import uploads_bp
+from .services.feature_service import start_feature_backfill
+from .services.near_dup_service import start_signature_backfill
+from .services.reprocess_service import stamp_unversioned_rows
+from .services.shard_service import start_shard_pool
 
 
 def create_app() -> Flask:
+    # Fork ranking shard workers before any background thread exists.
+    start_shard_pool()
     init_db()
+    get_embedder()
+    stamp_unversioned_rows(embedding_model_name())
+    start_signature_backfill()
+    start_feature_backfill()
     app = Flask(__name__)
+    # Reject oversized bodies while streaming; slack covers multipart framing.
+    app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE_BYTES + 64 * 1024
     CORS(app, origins=ALLOWED_ORIGINS, supports_credentials=False)
 
     app.register_blueprint(health_bp)
@@ -25,11 +46,24 @@ def create_app() -> Flask:
     app.register_blueprint(feedback_bp)
     app.register_blueprint(models_bp)
     app.register_blueprint(uploads_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(reprocess_bp)
+    app.register_blueprint(profiles_bp)
+    app.register_blueprint(duplicates_bp)
+    app.register_blueprint(events_bp)
+    init_profiling(app)
 
     @app.errorhandler(ValidationError)
     def handle_validation_error(err: ValidationError):  # pragma: no cover - simple glue
         return jsonify({'error': err.errors()}), 400
 
+    @app.errorhandler(Overloaded)
+    def handle_overloaded(err: Overloaded):
+        response = jsonify({'error': str(err), 'stage': err.stage, 'retry_after': err.retry_after})
+        response.headers['Retry-After'] = str(err.retry_after)
+        return response, err.status
+
     @app.errorhandler(ValueError)
     def handle_value_error(err: ValueError):  # pragma: no cover - simple glue
         return jsonify({'error': str(err)}), 400
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+from .config import (
+    ADMISSION_TIMEOUT_S,
+    EMBED_CONCURRENCY,
+    EMBED_QUEUE_SIZE,
+    INGEST_CONCURRENCY,
+    INGEST_QUEUE_SIZE,
+)
+
+STATUS_QUEUE_FULL = 429
+STATUS_QUEUE_TIMEOUT = 503
+
+
+class Overloaded(Exception):
+    """An expensive stage is saturated; the caller should retry after ``retry_after`` seconds."""
+
+    def __init__(self, stage: str, status: int, retry_after: int) -> None:
+        reason = 'queue is full' if status == STATUS_QUEUE_FULL else 'timed out waiting for capacity'
+        super().__init__(f'{stage} is overloaded: {reason}')
+        self.stage = stage
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """At most ``limit`` callers run a stage at once; up to ``queue_size`` more wait in FIFO order.
+
+    A caller that finds the wait queue full is rejected immediately (429). One
+    that waits longer than ``timeout_s`` gives up (503). A ``limit`` of 0
+    disables the gate.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout_s: float) -> None:
+        self.name = name
+        self.limit = max(0, limit)
+        self.queue_size = max(0, queue_size)
+        self.timeout_s = max(0.0, timeout_s)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned: Set[int] = set()
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._service_ema_s = 0.0
+        self._wait_total = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return self._next_ticket - self._serving - len(self._abandoned)
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        if self.limit == 0:
+            yield
+            return
+        self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _acquire(self) -> None:
+        enqueued = time.monotonic()
+        with self._cond:
+            if self.waiting == 0 and self._active < self.limit:
+                self._active += 1
+                self._admitted += 1
+                return
+            if self.waiting >= self.queue_size:
+                self._rejected += 1
+                raise Overloaded(self.name, STATUS_QUEUE_FULL, self._retry_after())
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            deadline = enqueued + self.timeout_s
+            while not (ticket == self._serving and self._active < self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._abandon(ticket)
+                    self._timed_out += 1
+                    raise Overloaded(self.name, STATUS_QUEUE_TIMEOUT, self._retry_after())
+                self._cond.wait(remaining)
+            self._serving += 1
+            self._skip_abandoned()
+            self._active += 1
+            self._admitted += 1
+            self._wait_total += time.monotonic() - enqueued
+            self._cond.notify_all()
+
+    def _abandon(self, ticket: int) -> None:
+        # A timed-out ticket stays in line until it reaches the head, where it
+        # is skipped, so the tickets behind it keep their order.
+        self._abandoned.add(ticket)
+        self._skip_abandoned()
+        self._cond.notify_all()
+
+    def _skip_abandoned(self) -> None:
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+
+    def _release(self, elapsed_s: float) -> None:
+        with self._cond:
+            self._active -= 1
+            self._service_ema_s = elapsed_s if self._service_ema_s == 0.0 else 0.8 * self._service_ema_s + 0.2 * elapsed_s
+            self._cond.notify_all()
+
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1."""
+        rounds = (self.waiting + self._active) / max(1, self.limit)
+        return max(1, math.ceil(rounds * self._service_ema_s))
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                'enabled': self.limit > 0,
+                'limit': self.limit,
+                'queue_size': self.queue_size,
+                'timeout_s': self.timeout_s,
+                'active': self._active,
+                'queue_depth': self.waiting,
+                'admitted': self._admitted,
+                'rejected_queue_full': self._rejected,
+                'rejected_timeout': self._timed_out,
+                'service_ms_ema': self._service_ema_s * 1000.0,
+                'queue_wait_ms_mean': self._wait_total / self._admitted * 1000.0 if self._admitted else 0.0,
+            }
+
+
+GATES: Dict[str, AdmissionGate] = {
+    'ingest': AdmissionGate('ingest', INGEST_CONCURRENCY, INGEST_QUEUE_SIZE, ADMISSION_TIMEOUT_S),
+    'embed': AdmissionGate('embed', EMBED_CONCURRENCY, EMBED_QUEUE_SIZE, ADMISSION_TIMEOUT_S),
+}
+
+
+@contextmanager
+def admit(stage: str) -> Iterator[None]:
+    """Run the body under the named stage's admission gate; raises :class:`Overloaded`."""
+    with GATES[stage].admit():
+        yield
+
+
+def admission_stats() -> Dict:
+    return {name: gate.stats() for name, gate in GATES.items()}
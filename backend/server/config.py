@@ -2,11 +2,42 @@ import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-UPLOAD_DIR = BASE_DIR / 'uploads'
+UPLOAD_DIR = Path(os.environ.get('RESUME_SELECTOR_UPLOAD_DIR', BASE_DIR / 'uploads'))
 DB_PATH = Path(os.environ.get('RESUME_SELECTOR_DB_PATH', BASE_DIR / 'db.sqlite3'))
 EMBEDDER_MODE = os.environ.get('RESUME_SELECTOR_EMBEDDER', 'transformer')
 ALLOWED_ORIGINS = ['http://localhost:5173']
 MAX_FILE_SIZE_BYTES = 10 * 1024 * 1024
+EMBED_SOCKET_PATH = Path(os.environ.get('RESUME_SELECTOR_EMBED_SOCKET', BASE_DIR / 'embedder.sock'))
+EMBED_FALLBACK_MODE = os.environ.get('RESUME_SELECTOR_EMBED_FALLBACK', 'transformer')
+EMBED_BATCH_WINDOW_MS = float(os.environ.get('RESUME_SELECTOR_EMBED_BATCH_WINDOW_MS', '5'))
+EMBED_MAX_BATCH_SIZE = int(os.environ.get('RESUME_SELECTOR_EMBED_MAX_BATCH_SIZE', '32'))
+JOB_PROFILE_CACHE_SIZE = int(os.environ.get('RESUME_SELECTOR_JOB_PROFILE_CACHE_SIZE', '256'))
+BM25_FEATURE_ENABLED = os.environ.get('RESUME_SELECTOR_BM25_FEATURE', '1').lower() not in ('0', 'false', 'no')
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get('RESUME_SELECTOR_COMPRESS_MIN_BYTES', '1024'))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('RESUME_SELECTOR_SQLITE_BUSY_TIMEOUT_MS', '5000'))
+WRITE_QUEUE_ENABLED = os.environ.get('RESUME_SELECTOR_WRITE_QUEUE', '1').lower() not in ('0', 'false', 'no')
+WRITE_BATCH_WINDOW_MS = float(os.environ.get('RESUME_SELECTOR_WRITE_BATCH_WINDOW_MS', '2'))
+WRITE_MAX_BATCH_SIZE = int(os.environ.get('RESUME_SELECTOR_WRITE_MAX_BATCH_SIZE', '64'))
+WRITE_TIMEOUT_S = float(os.environ.get('RESUME_SELECTOR_WRITE_TIMEOUT_S', '30'))
+PROFILING_ENABLED = os.environ.get('RESUME_SELECTOR_PROFILING', '0').lower() in ('1', 'true', 'yes')
+PROFILE_SAMPLE_RATE = float(os.environ.get('RESUME_SELECTOR_PROFILE_SAMPLE_RATE', '0'))
+PROFILE_HEADER = 'X-Profile'
+PROFILE_DIR = Path(os.environ.get('RESUME_SELECTOR_PROFILE_DIR', BASE_DIR / 'profiles'))
+PROFILE_KEEP = int(os.environ.get('RESUME_SELECTOR_PROFILE_KEEP', '200'))
+NEAR_DUP_POLICY = os.environ.get('RESUME_SELECTOR_NEAR_DUP_POLICY', 'link').lower()
+NEAR_DUP_THRESHOLD = float(os.environ.get('RESUME_SELECTOR_NEAR_DUP_THRESHOLD', '0.8'))
+RANKING_SHARDS = max(1, int(os.environ.get('RESUME_SELECTOR_RANKING_SHARDS', '1')))
+RANKING_SHARD_WORKERS = int(os.environ.get('RESUME_SELECTOR_RANKING_SHARD_WORKERS', str(RANKING_SHARDS)))
+INGEST_CONCURRENCY = int(os.environ.get('RESUME_SELECTOR_INGEST_CONCURRENCY', str(os.cpu_count() or 4)))
+INGEST_QUEUE_SIZE = int(os.environ.get('RESUME_SELECTOR_INGEST_QUEUE_SIZE', '32'))
+EMBED_CONCURRENCY = int(os.environ.get('RESUME_SELECTOR_EMBED_CONCURRENCY', str(2 * EMBED_MAX_BATCH_SIZE)))
+EMBED_QUEUE_SIZE = int(os.environ.get('RESUME_SELECTOR_EMBED_QUEUE_SIZE', '128'))
+ADMISSION_TIMEOUT_S = float(os.environ.get('RESUME_SELECTOR_ADMISSION_TIMEOUT_S', '10'))
+WHATIF_MAX_SCENARIOS = int(os.environ.get('RESUME_SELECTOR_WHATIF_MAX_SCENARIOS', '16'))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('RESUME_SELECTOR_EVENTS_MAX_SUBSCRIBERS', '64'))
+EVENTS_QUEUE_SIZE = int(os.environ.get('RESUME_SELECTOR_EVENTS_QUEUE_SIZE', '256'))
+EVENTS_HISTORY = int(os.environ.get('RESUME_SELECTOR_EVENTS_HISTORY', '1024'))
+EVENTS_HEARTBEAT_S = float(os.environ.get('RESUME_SELECTOR_EVENTS_HEARTBEAT_S', '15'))
 
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import sqlite3
 from contextlib import contextmanager
-from typing import Iterator
+from pathlib import Path
+from typing import Dict, Iterator
 
-from .config import DB_PATH
+import numpy as np
+
+from .config import DB_PATH, SQLITE_BUSY_TIMEOUT_MS
+from .utils.storage import file_sha256
+from .utils.vectors import pack_rows
 
 
 def _now_iso() -> str:
@@ -19,7 +24,16 @@ CREATE TABLE IF NOT EXISTS jobs (
     title TEXT NOT NULL,
     description TEXT NOT NULL,
     embedding BLOB NOT NULL,
-    created_at TEXT NOT NULL
+    created_at TEXT NOT NULL,
+    skills TEXT,
+    min_years REAL,
+    min_edu INTEGER,
+    fts_query TEXT,
+    embedding_model TEXT,
+    extractor_version INTEGER,
+    profile_version INTEGER NOT NULL DEFAULT 0,
+    features_version INTEGER NOT NULL DEFAULT 0,
+    features_scored_up_to INTEGER NOT NULL DEFAULT 0
 );
 CREATE TABLE IF NOT EXISTS candidates (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,25 +46,81 @@ CREATE TABLE IF NOT EXISTS candidates (
     years_exp REAL NOT NULL,
     edu_level INTEGER NOT NULL,
     skills TEXT NOT NULL,
-    created_at TEXT NOT NULL
-);
-CREATE TABLE IF NOT EXISTS features (
-    job_id INTEGER NOT NULL,
-    candidate_id INTEGER NOT NULL,
-    sem_sim REAL NOT NULL,
-    skill_overlap REAL NOT NULL,
-    jaccard REAL NOT NULL,
-    years REAL NOT NULL,
-    edu REAL NOT NULL,
-    PRIMARY KEY(job_id, candidate_id)
+    created_at TEXT NOT NULL,
+    content_hash TEXT,
+    embedding_model TEXT,
+    extractor_version INTEGER,
+    duplicate_of INTEGER,
+    duplicate_similarity REAL
 );
 CREATE TABLE IF NOT EXISTS pairwise_prefs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     job_id INTEGER NOT NULL,
     winner_candidate_id INTEGER NOT NULL,
     loser_candidate_id INTEGER NOT NULL,
-    created_at TEXT NOT NULL
+    created_at TEXT NOT NULL,
+    slate_id TEXT
+);
+CREATE TABLE IF NOT EXISTS candidate_skills (
+    skill TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    PRIMARY KEY(skill, candidate_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS candidate_minhash (
+    candidate_id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    PRIMARY KEY(band, bucket, candidate_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source TEXT NOT NULL,
+    item TEXT NOT NULL,
+    status TEXT NOT NULL,
+    candidate_id INTEGER,
+    content_hash TEXT,
+    error TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY(source, item)
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_years_edu ON candidates(years_exp, edu_level);
+CREATE TABLE IF NOT EXISTS reprocess_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    embedding_model TEXT NOT NULL,
+    extractor_version INTEGER NOT NULL,
+    force INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
 );
+CREATE TABLE IF NOT EXISTS candidate_reprocess (
+    run_id INTEGER NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    full_name TEXT,
+    email TEXT,
+    phone TEXT,
+    embedding BLOB,
+    years_exp REAL NOT NULL,
+    edu_level INTEGER NOT NULL,
+    skills TEXT NOT NULL,
+    PRIMARY KEY(run_id, candidate_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS job_reprocess (
+    run_id INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    embedding BLOB,
+    skills TEXT NOT NULL,
+    min_years REAL NOT NULL,
+    min_edu INTEGER NOT NULL,
+    fts_query TEXT NOT NULL,
+    PRIMARY KEY(run_id, job_id)
+) WITHOUT ROWID;
 CREATE TABLE IF NOT EXISTS model_weights (
     id INTEGER PRIMARY KEY CHECK(id=1),
     w_sem REAL NOT NULL,
@@ -58,31 +128,180 @@ CREATE TABLE IF NOT EXISTS model_weights (
     w_jaccard REAL NOT NULL,
     w_years REAL NOT NULL,
     w_edu REAL NOT NULL,
+    w_bm25 REAL NOT NULL DEFAULT 0,
     lr REAL NOT NULL,
     l2 REAL NOT NULL,
-    updated_at TEXT NOT NULL
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
 );
 """
 
+# Job-dependent features only, as packed little-endian float32 vectors in
+# feature_service.JOB_FEATURE_COLUMNS order; candidate-only features are read
+# from candidates.
+FEATURES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS features (
+    job_id INTEGER NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    packed BLOB NOT NULL,
+    PRIMARY KEY(job_id, candidate_id)
+) WITHOUT ROWID
+"""
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+# Columns added after the initial schema; applied to existing databases by init_db.
+COLUMN_MIGRATIONS: Dict[str, Dict[str, str]] = {
+    'jobs': {
+        'skills': 'TEXT',
+        'min_years': 'REAL',
+        'min_edu': 'INTEGER',
+        'fts_query': 'TEXT',
+        'embedding_model': 'TEXT',
+        'extractor_version': 'INTEGER',
+        'profile_version': 'INTEGER NOT NULL DEFAULT 0',
+        # Stored-feature coverage (feature_service.FEATURE_VERSION); 0 means recompute on startup.
+        'features_version': 'INTEGER NOT NULL DEFAULT 0',
+        'features_scored_up_to': 'INTEGER NOT NULL DEFAULT 0',
+    },
+    'candidates': {
+        'content_hash': 'TEXT',
+        'embedding_model': 'TEXT',
+        'extractor_version': 'INTEGER',
+        'duplicate_of': 'INTEGER',
+        'duplicate_similarity': 'REAL',
+    },
+    'pairwise_prefs': {
+        'slate_id': 'TEXT',
+    },
+    'model_weights': {
+        'w_bm25': 'REAL NOT NULL DEFAULT 0',
+        'version': 'INTEGER NOT NULL DEFAULT 0',
+    },
+}
+
+# Full-text index over resume text, kept in sync with candidates by triggers.
+FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+    text, content='candidates', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS candidates_fts_ai AFTER INSERT ON candidates BEGIN
+    INSERT INTO candidates_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_fts_ad AFTER DELETE ON candidates BEGIN
+    INSERT INTO candidates_fts(candidates_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_fts_au AFTER UPDATE OF text ON candidates BEGIN
+    INSERT INTO candidates_fts(candidates_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO candidates_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# Indexes over migrated columns; created once the columns are guaranteed to exist.
+INDEX_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidates_content_hash ON candidates(content_hash);
+CREATE INDEX IF NOT EXISTS idx_candidates_versions ON candidates(embedding_model, extractor_version);
+CREATE INDEX IF NOT EXISTS idx_candidates_duplicate_of ON candidates(duplicate_of) WHERE duplicate_of IS NOT NULL;
+"""
+
+
+def get_connection(readonly: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000.0)
     conn.row_factory = sqlite3.Row
+    if readonly:
+        # Any write fails; under WAL the reader never waits for or blocks the writer.
+        conn.execute('PRAGMA query_only = ON')
     return conn
 
 
 @contextmanager
-def db_connection() -> Iterator[sqlite3.Connection]:
-    conn = get_connection()
+def db_connection(readonly: bool = False) -> Iterator[sqlite3.Connection]:
+    conn = get_connection(readonly)
     try:
         yield conn
     finally:
         conn.close()
 
 
+def _apply_column_migrations(conn: sqlite3.Connection) -> None:
+    for table, columns in COLUMN_MIGRATIONS.items():
+        existing = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+        for name, decl in columns.items():
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+
+
+def _migrate_feature_layout(conn: sqlite3.Connection) -> None:
+    """Rewrite the per-column ``features`` table from before packed job-side vectors.
+
+    ``years`` and ``edu`` are dropped because they are now read from the candidate.
+    The copied rows keep their old values, so every job is marked for recomputation.
+    """
+    columns = {row['name'] for row in conn.execute('PRAGMA table_info(features)')}
+    if not columns or 'packed' in columns:
+        conn.execute(FEATURES_TABLE_SQL)
+        return
+    bm25 = 'bm25' if 'bm25' in columns else '0'
+    conn.execute('BEGIN')
+    conn.execute('ALTER TABLE features RENAME TO features_legacy')
+    conn.execute(FEATURES_TABLE_SQL)
+    cursor = conn.execute(
+        f'SELECT job_id, candidate_id, sem_sim, skill_overlap, jaccard, {bm25} FROM features_legacy ORDER BY job_id, candidate_id'
+    )
+    while True:
+        rows = cursor.fetchmany(50000)
+        if not rows:
+            break
+        packed = pack_rows(np.array([tuple(row)[2:] for row in rows], dtype=np.float32))
+        conn.executemany(
+            'INSERT INTO features (job_id, candidate_id, packed) VALUES (?, ?, ?)',
+            [(row[0], row[1], blob) for row, blob in zip(rows, packed)],
+        )
+    conn.execute('DROP TABLE features_legacy')
+    conn.execute('UPDATE jobs SET features_version = 0, features_scored_up_to = 0')
+    conn.commit()
+
+
+def _backfill_candidate_skills(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        '''
+        INSERT OR IGNORE INTO candidate_skills (skill, candidate_id)
+        SELECT j.value, c.id FROM candidates c, json_each(c.skills) j
+        WHERE NOT EXISTS (SELECT 1 FROM candidate_skills s WHERE s.candidate_id = c.id)
+        '''
+    )
+
+
+def _backfill_content_hashes(conn: sqlite3.Connection) -> None:
+    """Hash the stored file of candidates uploaded before content hashing.
+
+    Without it, re-uploading such a resume is not recognised as a duplicate
+    (the unique index admits any number of NULLs). Candidates whose file is
+    gone keep NULL; of several with identical bytes only the oldest is hashed.
+    """
+    rows = conn.execute('SELECT id, pdf_path FROM candidates WHERE content_hash IS NULL ORDER BY id').fetchall()
+    for row in rows:
+        try:
+            digest = file_sha256(Path(row['pdf_path']))
+        except OSError:
+            continue
+        conn.execute('UPDATE OR IGNORE candidates SET content_hash=? WHERE id=?', (digest, row['id']))
+
+
+def _ensure_fts(conn: sqlite3.Connection) -> None:
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name='candidates_fts'").fetchone() is not None
+    conn.executescript(FTS_SQL)
+    if not existed:
+        conn.execute("INSERT INTO candidates_fts(candidates_fts) VALUES ('rebuild')")
+
+
 def init_db() -> None:
     with db_connection() as conn:
         conn.executescript(SCHEMA_SQL)
+        _apply_column_migrations(conn)
+        _migrate_feature_layout(conn)
+        conn.executescript(INDEX_SQL)
+        _backfill_candidate_skills(conn)
+        _backfill_content_hashes(conn)
+        _ensure_fts(conn)
         existing = conn.execute('SELECT COUNT(*) as c FROM model_weights').fetchone()['c']
         if existing == 0:
             conn.execute(
@@ -0,0 +1,123 @@
+"""Shared embedding process for multi-worker deployments.
+
+Loads one embedder and serves every web worker over a Unix socket, so model
+weights live in memory once. Requests from all connections are funnelled
+through a BatchCoalescer and share forward passes. Run with:
+
+    python -m server.embedding_server --socket backend/embedder.sock
+
+Web workers opt in with ``RESUME_SELECTOR_EMBEDDER=remote``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socket
+import socketserver
+import threading
+from typing import List, Set
+
+import numpy as np
+
+from .config import EMBED_BATCH_WINDOW_MS, EMBED_FALLBACK_MODE, EMBED_MAX_BATCH_SIZE, EMBED_SOCKET_PATH
+from .embeddings import BatchCoalescer, load_local_embedder
+from .utils.framing import ProtocolError, read_request, send_error, send_hello, send_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    server: 'EmbeddingServer'
+
+    def setup(self) -> None:
+        self.server.track(self.request, True)
+
+    def finish(self) -> None:
+        self.server.track(self.request, False)
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        while True:
+            try:
+                texts = read_request(sock)
+            except (ProtocolError, ConnectionError):
+                return
+            except ValueError as exc:
+                send_error(sock, f'bad request: {exc}')
+                return
+            if not texts:
+                # Clients tag stored vectors with this name, so it must come from the loaded model.
+                send_hello(sock, self.server.embedder.model_name, self.server.dim)
+                continue
+            try:
+                vectors = self.server.encode(texts)
+            except Exception as exc:  # reported to the client, connection stays usable
+                logger.exception('encode failed')
+                send_error(sock, str(exc))
+                continue
+            send_vectors(sock, vectors)
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, mode: str, window_s: float, max_batch_size: int) -> None:
+        self.embedder = load_local_embedder(mode)
+        self.coalescer = BatchCoalescer(self.embedder, window_s, max_batch_size)
+        self.dim = int(self.embedder.encode(['warm-up']).shape[1])
+        self._connections: Set[socket.socket] = set()
+        self._connections_lock = threading.Lock()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, EmbeddingRequestHandler)
+
+    def track(self, sock: socket.socket, open_: bool) -> None:
+        with self._connections_lock:
+            if open_:
+                self._connections.add(sock)
+            else:
+                self._connections.discard(sock)
+
+    def server_close(self) -> None:
+        # Drop open clients too, as exiting would; they reconnect (and re-handshake) or fall back.
+        super().server_close()
+        with self._connections_lock:
+            connections = list(self._connections)
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        futures = [self.coalescer.submit(text) for text in texts]
+        return np.stack([future.result()[0] for future in futures], axis=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve embeddings to local web workers over a Unix socket')
+    parser.add_argument('--socket', default=str(EMBED_SOCKET_PATH), help='Unix socket path to listen on')
+    parser.add_argument('--mode', default=EMBED_FALLBACK_MODE, help='embedder to load: transformer or stub')
+    parser.add_argument('--window-ms', type=float, default=EMBED_BATCH_WINDOW_MS)
+    parser.add_argument('--max-batch-size', type=int, default=EMBED_MAX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    server = EmbeddingServer(args.socket, args.mode, args.window_ms / 1000.0, args.max_batch_size)
+    logger.info('serving %s embeddings (dim=%d) on %s', server.embedder.name, server.dim, args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,59 @@
 from __future__ import annotations
 
+import logging
+import queue
 import re
-from dataclasses import dataclass
-from typing import Iterable, List
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
-from .config import EMBEDDER_MODE
+from .admission import admit
+from .config import (
+    EMBED_BATCH_WINDOW_MS,
+    EMBED_FALLBACK_MODE,
+    EMBED_MAX_BATCH_SIZE,
+    EMBED_SOCKET_PATH,
+    EMBEDDER_MODE,
+)
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class Embedder:
     name: str
 
+    @property
+    def model_name(self) -> str:
+        """Identifier of the model whose vector space ``encode`` produces."""
+        return self.name
+
     def encode(self, texts: Iterable[str]) -> np.ndarray:
         raise NotImplementedError
 
+    def encode_tagged(self, texts: Iterable[str]) -> Tuple[np.ndarray, str]:
+        """Vectors together with the name of the model that produced them."""
+        return self.encode(texts), self.model_name
+
+
+MODEL_NAMES = {
+    'stub': 'stub',
+    'transformer': 'sentence-transformers/all-MiniLM-L6-v2',
+}
+
 
 def _load_stub() -> Embedder:
     class Stub(Embedder):
         dim = 384
 
         def __init__(self) -> None:
-            super().__init__('stub')
+            super().__init__(MODEL_NAMES['stub'])
 
         def encode(self, texts: Iterable[str]) -> np.ndarray:
             vectors: List[np.ndarray] = []
@@ -47,8 +78,8 @@ def _load_transformer() -> Embedder:
 
     class Transformer(Embedder):
         def __init__(self) -> None:
-            super().__init__('sentence-transformers/all-MiniLM-L6-v2')
-            self.model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', device='cpu')
+            super().__init__(MODEL_NAMES['transformer'])
+            self.model = SentenceTransformer(MODEL_NAMES['transformer'], device='cpu')
 
         def encode(self, texts: Iterable[str]) -> np.ndarray:
             output = self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
@@ -57,18 +88,342 @@ def _load_transformer() -> Embedder:
     return Transformer()
 
 
-def load_embedder() -> Embedder:
-    mode = EMBEDDER_MODE.lower()
-    if mode == 'stub':
+class RemoteEmbedder(Embedder):
+    """Client for the shared ``server.embedding_server`` process.
+
+    Connects lazily over a Unix socket and learns the server's model name
+    and dimension in a handshake. If the server is unreachable the
+    in-process ``fallback_mode`` embedder is loaded on demand, and the
+    socket is retried every ``retry_interval_s`` seconds. Errors the server
+    reports for a request are raised to the caller rather than masked by the
+    fallback.
+    """
+
+    def __init__(self, socket_path: str, fallback_mode: str, timeout_s: float = 60.0, retry_interval_s: float = 30.0) -> None:
+        super().__init__(f'remote:{socket_path}')
+        self.socket_path = socket_path
+        self.fallback_mode = fallback_mode
+        self.timeout_s = timeout_s
+        self.retry_interval_s = retry_interval_s
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._fallback: Optional[Embedder] = None
+        self._fallback_since: Optional[float] = None
+        self._remote_model: Optional[str] = None
+        self._remote_dim = 0
+        self.remote_calls = 0
+        self.fallback_calls = 0
+
+    @property
+    def fallback_model_name(self) -> str:
+        return MODEL_NAMES.get(self.fallback_mode.lower(), MODEL_NAMES['transformer'])
+
+    @property
+    def model_name(self) -> str:
+        # Last known path, without touching the socket; stored vectors are tagged from encode_tagged().
+        if self._fallback_since is None and self._remote_model is not None:
+            return self._remote_model
+        return self.fallback_model_name
+
+    def _connect(self) -> socket.socket:
+        from .utils.framing import read_hello, send_request
+
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('unix sockets are not supported on this platform')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_s)
+        try:
+            sock.connect(self.socket_path)
+            send_request(sock, [])
+            self._remote_model, self._remote_dim = read_hello(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _mark_unavailable(self, exc: Exception) -> None:
+        self._close()
+        if self._fallback_since is None:
+            logger.warning(
+                'embedding server at %s unavailable (%s); using in-process %s embedder',
+                self.socket_path,
+                exc,
+                self.fallback_mode,
+            )
+        self._fallback_since = time.monotonic()
+
+    def _ensure_connected(self) -> bool:
+        from .utils.framing import ProtocolError
+
+        if self._sock is not None:
+            return True
+        try:
+            self._sock = self._connect()
+        except (OSError, ProtocolError) as exc:
+            self._mark_unavailable(exc)
+            return False
+        if self._fallback_since is not None:
+            logger.info('embedding server at %s reachable again', self.socket_path)
+        self._fallback_since = None
+        return True
+
+    def _remote_encode(self, texts: List[str]) -> np.ndarray:
+        from .utils.framing import read_vectors, send_request
+
+        if not texts:
+            return np.zeros((0, self._remote_dim), dtype=np.float32)
+        send_request(self._sock, texts)
+        vectors, _ = read_vectors(self._sock)
+        return vectors
+
+    def _should_try_remote(self) -> bool:
+        if self._fallback_since is None:
+            return True
+        return time.monotonic() - self._fallback_since >= self.retry_interval_s
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        return self.encode_tagged(texts)[0]
+
+    def encode_tagged(self, texts: Iterable[str]) -> Tuple[np.ndarray, str]:
+        from .utils.framing import ProtocolError
+
+        texts = list(texts)
+        with self._lock:
+            if self._should_try_remote() and self._ensure_connected():
+                try:
+                    vectors = self._remote_encode(texts)
+                except (OSError, ProtocolError) as exc:
+                    # Only a broken connection falls back; a RemoteError reply propagates as is.
+                    self._mark_unavailable(exc)
+                else:
+                    self.remote_calls += 1
+                    # Read under the lock: a reconnect may change the server's model.
+                    return vectors, self._remote_model
+            if self._fallback is None:
+                self._fallback = load_local_embedder(self.fallback_mode)
+            self.fallback_calls += 1
+            fallback = self._fallback
+        return fallback.encode_tagged(texts)
+
+    def stats(self) -> Dict:
+        return {
+            'socket': self.socket_path,
+            'connected': self._sock is not None,
+            'server_model': self._remote_model,
+            'fallback_active': self._fallback_since is not None,
+            'fallback_mode': self.fallback_mode,
+            'remote_calls': self.remote_calls,
+            'fallback_calls': self.fallback_calls,
+        }
+
+
+def load_local_embedder(mode: str) -> Embedder:
+    if mode.lower() == 'stub':
         return _load_stub()
     return _load_transformer()
 
 
-EMBEDDER = load_embedder()
+def load_embedder() -> Embedder:
+    mode = EMBEDDER_MODE.lower()
+    if mode == 'remote':
+        return RemoteEmbedder(str(EMBED_SOCKET_PATH), EMBED_FALLBACK_MODE)
+    return load_local_embedder(mode)
+
+
+_EMBEDDER: Optional[Embedder] = None
+_LOAD_LOCK = threading.Lock()
+
+
+def get_embedder() -> Embedder:
+    """Process-wide embedder, loaded on first use so importing this module stays cheap."""
+    global _EMBEDDER
+    if _EMBEDDER is None:
+        with _LOAD_LOCK:
+            if _EMBEDDER is None:
+                _EMBEDDER = load_embedder()
+    return _EMBEDDER
+
+
+@dataclass
+class _EmbedRequest:
+    text: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class BatchCoalescer:
+    """Funnels single-text embed calls through one inference thread.
+
+    Requests arriving within ``window_s`` of the first queued request (or until
+    ``max_batch_size`` is reached) share a single ``encode`` call. Futures
+    resolve to ``(vector, model_name)``.
+    """
+
+    def __init__(self, embedder: Embedder, window_s: float, max_batch_size: int, sample_size: int = 1024) -> None:
+        self.embedder = embedder
+        self.window_s = max(0.0, window_s)
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: 'queue.Queue[_EmbedRequest]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._failed_batches = 0
+        self._requests = 0
+        self._max_batch = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._encode_total = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=sample_size)
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        request = _EmbedRequest(text=text, future=Future())
+        self._queue.put(request)
+        return request.future
+
+    def _ensure_started(self) -> None:
+        # Started lazily so forking servers spawn the thread in each worker.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='embed-coalescer', daemon=True)
+                self._thread.start()
 
+    def _collect(self) -> List[_EmbedRequest]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
 
-def embed_text(text: str) -> np.ndarray:
-    vec = EMBEDDER.encode([text])
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            try:
+                vectors, model = self.embedder.encode_tagged([item.text for item in batch])
+                vectors = np.asarray(vectors, dtype=np.float32)
+                if vectors.ndim != 2 or vectors.shape[0] != len(batch):
+                    raise ValueError(f'embedder returned shape {vectors.shape} for {len(batch)} texts')
+                finished = time.monotonic()
+                for index, item in enumerate(batch):
+                    item.future.set_result((vectors[index], model))
+            except BaseException as exc:  # surfaced to every waiting caller
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(exc)
+                with self._stats_lock:
+                    self._failed_batches += 1
+                if not isinstance(exc, Exception):
+                    # The thread exits; the next submit starts a new one.
+                    raise
+                continue
+            self._record(batch, started, finished - started)
+
+    def _record(self, batch: List[_EmbedRequest], started: float, encode_s: float) -> None:
+        waits = [started - item.enqueued_at for item in batch]
+        size = len(batch)
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += size
+            self._max_batch = max(self._max_batch, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            self._encode_total += encode_s
+            self._recent_waits.extend(waits)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            recent = np.array(self._recent_waits, dtype=np.float64)
+            batches = self._batches
+            requests = self._requests
+            return {
+                'enabled': True,
+                'window_ms': self.window_s * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'queue_depth': self._queue.qsize(),
+                'batches': batches,
+                'requests': requests,
+                'failed_batches': self._failed_batches,
+                'mean_batch_size': requests / batches if batches else 0.0,
+                'max_batch_seen': self._max_batch,
+                'batch_size_histogram': {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                'queue_wait_ms': {
+                    'mean': self._wait_total / requests * 1000.0 if requests else 0.0,
+                    'max': self._wait_max * 1000.0,
+                    'p50': float(np.percentile(recent, 50)) * 1000.0 if recent.size else 0.0,
+                    'p95': float(np.percentile(recent, 95)) * 1000.0 if recent.size else 0.0,
+                },
+                'encode_ms_mean': self._encode_total / batches * 1000.0 if batches else 0.0,
+            }
+
+
+COALESCING_ENABLED = not (EMBED_BATCH_WINDOW_MS <= 0 and EMBED_MAX_BATCH_SIZE <= 1)
+_COALESCER: Optional[BatchCoalescer] = None
+
+
+def _get_coalescer() -> Optional[BatchCoalescer]:
+    global _COALESCER
+    if not COALESCING_ENABLED:
+        return None
+    if _COALESCER is None:
+        embedder = get_embedder()
+        with _LOAD_LOCK:
+            if _COALESCER is None:
+                _COALESCER = BatchCoalescer(embedder, EMBED_BATCH_WINDOW_MS / 1000.0, EMBED_MAX_BATCH_SIZE)
+    return _COALESCER
+
+
+def embed_text(text: str) -> Tuple[np.ndarray, str]:
+    """``(vector, model_name)``; store the name with the vector, it is the one that produced it."""
+    with admit('embed'):
+        coalescer = _get_coalescer()
+        if coalescer is not None:
+            return coalescer.submit(text).result()
+        vec, model = get_embedder().encode_tagged([text])
     if vec.ndim == 1:
-        return vec.astype(np.float32)
-    return vec[0].astype(np.float32)
+        return vec.astype(np.float32), model
+    return vec[0].astype(np.float32), model
+
+
+def embed_texts(texts: List[str]) -> Tuple[np.ndarray, str]:
+    """Encode an already-batched list directly, bypassing the coalescer."""
+    embedder = get_embedder()
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32), embedder.model_name
+    vectors, model = embedder.encode_tagged(texts)
+    return vectors.astype(np.float32), model
+
+
+def embedding_model_name() -> str:
+    """The model new vectors are expected to come from; never use it to tag a stored vector."""
+    return get_embedder().model_name
+
+
+def embedding_stats() -> Dict:
+    coalescer = _get_coalescer()
+    stats = coalescer.stats() if coalescer is not None else {'enabled': False}
+    embedder = get_embedder()
+    stats['embedder'] = embedder.name
+    stats['model'] = embedder.model_name
+    if isinstance(embedder, RemoteEmbedder):
+        stats['remote'] = embedder.stats()
+    return stats
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from .config import EVENTS_HEARTBEAT_S, EVENTS_HISTORY, EVENTS_MAX_SUBSCRIBERS, EVENTS_QUEUE_SIZE
+from .utils.responses import dumps
+
+RESYNC = 'resync'
+
+
+@dataclass
+class Event:
+    id: int
+    kind: str
+    data: Dict[str, Any]
+    epoch: str = ''
+
+    def job_ids(self) -> Optional[List[int]]:
+        """Jobs a ``rankings`` event concerns; ``None`` means every job."""
+        return self.data.get('job_ids')
+
+    @property
+    def event_id(self) -> str:
+        return f'{self.epoch}-{self.id}'
+
+    def encode(self) -> bytes:
+        return b'id: %s\nevent: %s\ndata: %s\n\n' % (self.event_id.encode(), self.kind.encode(), dumps(self.data))
+
+
+def parse_event_id(raw: str) -> Optional[Tuple[str, int]]:
+    """``(epoch, sequence)`` of an id from :attr:`Event.event_id`; ``None`` if it is not one."""
+    epoch, _, sequence = raw.strip().rpartition('-')
+    if not epoch or not sequence.isdigit():
+        return None
+    return epoch, int(sequence)
+
+
+@dataclass
+class Subscription:
+    """One client's bounded inbox. A client that falls behind is told to resync instead of stalling publishers."""
+
+    job_id: Optional[int]
+    inbox: 'queue.Queue[Event]'
+    overflowed: bool = False
+    kinds: Set[str] = field(default_factory=set)
+
+    def wants(self, event: Event) -> bool:
+        if self.kinds and event.kind not in self.kinds and event.kind != RESYNC:
+            return False
+        if self.job_id is None or event.kind != 'rankings':
+            return True
+        job_ids = event.job_ids()
+        return job_ids is None or self.job_id in job_ids
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class EventBus:
+    """In-process fan-out of change notifications to server-sent-event streams.
+
+    Recent events are kept so a reconnecting client can resume from its
+    ``Last-Event-ID``. Ids are ``<epoch>-<sequence>`` with an epoch unique to
+    this bus, so an id issued before a restart or by another worker never
+    matches. Clients that reconnect too late, present an id from another
+    epoch, or whose inbox fills up, receive a single ``resync`` event and
+    should refetch everything.
+    """
+
+    def __init__(self, history: int, queue_size: int, max_subscribers: int, epoch: Optional[str] = None) -> None:
+        self.epoch = epoch or uuid.uuid4().hex[:12]
+        self.queue_size = max(1, queue_size)
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._history: Deque[Event] = deque(maxlen=max(0, history))
+        self._subscribers: List[Subscription] = []
+        self._next_id = 1
+        self._published = 0
+        self._overflows = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    def publish(self, kind: str, data: Dict[str, Any]) -> Event:
+        with self._lock:
+            event = Event(id=self._next_id, kind=kind, data=data, epoch=self.epoch)
+            self._next_id += 1
+            self._published += 1
+            self._history.append(event)
+            for subscription in self._subscribers:
+                if subscription.overflowed or not subscription.wants(event):
+                    continue
+                try:
+                    subscription.inbox.put_nowait(event)
+                except queue.Full:
+                    subscription.overflowed = True
+                    self._overflows += 1
+        return event
+
+    def subscribe(
+        self, last_event_id: Optional[str] = None, job_id: Optional[int] = None, kinds: Optional[Set[str]] = None
+    ) -> Subscription:
+        with self._lock:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers(f'at most {self.max_subscribers} event streams may be open')
+            subscription = Subscription(job_id=job_id, inbox=queue.Queue(self.queue_size), kinds=set(kinds or ()))
+            seen = parse_event_id(last_event_id) if last_event_id else None
+            if last_event_id and (seen is None or seen[0] != self.epoch or seen[1] > self.last_id):
+                # Issued by a previous process or another worker: this history says nothing about what was missed.
+                subscription.overflowed = True
+            elif seen is not None and seen[1] < self.last_id:
+                oldest = self._history[0].id if self._history else self._next_id
+                missed = [event for event in self._history if event.id > seen[1] and subscription.wants(event)]
+                if seen[1] + 1 < oldest or len(missed) > self.queue_size:
+                    subscription.overflowed = True
+                else:
+                    for event in missed:
+                        subscription.inbox.put_nowait(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stream(self, subscription: Subscription, heartbeat_s: float = EVENTS_HEARTBEAT_S) -> Iterator[bytes]:
+        """SSE frames for ``subscription`` until the client goes away; always unsubscribes."""
+        try:
+            yield b'retry: 3000\n\n'
+            while True:
+                if subscription.overflowed:
+                    # Reset under the lock so nothing published after the resync point is lost.
+                    with self._lock:
+                        subscription.overflowed = False
+                        _drain(subscription.inbox)
+                        resync_id = self.last_id
+                    yield Event(id=resync_id, kind=RESYNC, data={'reason': 'missed events'}, epoch=self.epoch).encode()
+                    continue
+                try:
+                    event = subscription.inbox.get(timeout=heartbeat_s)
+                except queue.Empty:
+                    # Keeps proxies from closing an idle stream and surfaces dead clients as write errors.
+                    yield b': keepalive\n\n'
+                    continue
+                yield event.encode()
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'epoch': self.epoch,
+                'last_event_id': f'{self.epoch}-{self.last_id}',
+                'published': self._published,
+                'overflows': self._overflows,
+            }
+
+
+def _drain(inbox: 'queue.Queue[Event]') -> None:
+    while True:
+        try:
+            inbox.get_nowait()
+        except queue.Empty:
+            return
+
+
+BUS = EventBus(EVENTS_HISTORY, EVENTS_QUEUE_SIZE, EVENTS_MAX_SUBSCRIBERS)
+
+
+def publish(kind: str, **data: Any) -> Event:
+    """Notify open event streams; call only after the change is committed."""
+    return BUS.publish(kind, {**data, 'at': time.time()})
+
+
+def event_stats() -> Dict:
+    return BUS.stats()
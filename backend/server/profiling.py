@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from flask import Flask, Response, request
+
+from .config import PROFILE_DIR, PROFILE_HEADER, PROFILE_KEEP, PROFILE_SAMPLE_RATE, PROFILING_ENABLED
+from .utils.time import now_iso
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_HEADER = 'X-Profile-Id'
+TOP_FUNCTIONS = 30
+
+
+@dataclass
+class RequestProfile:
+    profile_id: str
+    profiler: cProfile.Profile
+    started: float = field(default_factory=time.perf_counter)
+    stages: List[Dict] = field(default_factory=list)
+    depth: int = 0
+
+
+_ACTIVE = threading.local()
+
+
+def _current() -> Optional[RequestProfile]:
+    return getattr(_ACTIVE, 'profile', None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a named stage of the current request; a no-op unless it is being profiled."""
+    profile = _current()
+    if profile is None:
+        yield
+        return
+    entry = {'name': name, 'depth': profile.depth, 'start_ms': (time.perf_counter() - profile.started) * 1000.0}
+    profile.stages.append(entry)
+    profile.depth += 1
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.depth -= 1
+        entry['ms'] = (time.perf_counter() - began) * 1000.0
+
+
+def active_profile() -> Optional[RequestProfile]:
+    """The profile of the request running on this thread, to hand to work done on another thread."""
+    return _current()
+
+
+@contextmanager
+def bound_profile(profile: Optional[RequestProfile]) -> Iterator[None]:
+    """Record stages on this thread into ``profile``, captured elsewhere with ``active_profile``.
+
+    Only stage timings are attributed; cProfile samples the submitting thread alone.
+    """
+    previous = _current()
+    _ACTIVE.profile = profile
+    try:
+        yield
+    finally:
+        _ACTIVE.profile = previous
+
+
+def _should_profile() -> bool:
+    if not PROFILING_ENABLED:
+        return False
+    if request.headers.get(PROFILE_HEADER, '').lower() in ('1', 'true', 'yes'):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _top_functions(profiler: cProfile.Profile) -> str:
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    return buffer.getvalue()
+
+
+def _prune(directory: Path) -> None:
+    summaries = sorted(directory.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in summaries[PROFILE_KEEP:]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def _write(profile: RequestProfile, response: Response) -> None:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile.profiler.dump_stats(str(PROFILE_DIR / f'{profile.profile_id}.prof'))
+    summary = {
+        'profile_id': profile.profile_id,
+        'created_at': now_iso(),
+        'method': request.method,
+        'path': request.path,
+        'query': request.query_string.decode('utf-8', errors='replace'),
+        'status': response.status_code,
+        'total_ms': (time.perf_counter() - profile.started) * 1000.0,
+        'stages': profile.stages,
+        'top_functions': _top_functions(profile.profiler),
+    }
+    (PROFILE_DIR / f'{profile.profile_id}.json').write_text(json.dumps(summary, indent=2))
+    _prune(PROFILE_DIR)
+
+
+def init_profiling(app: Flask) -> None:
+    """Wrap opted-in requests in cProfile and persist the profile with stage timings."""
+    if not PROFILING_ENABLED:
+        return
+
+    @app.before_request
+    def start_profile() -> None:
+        if not _should_profile():
+            return
+        profile = RequestProfile(profile_id=f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}', profiler=cProfile.Profile())
+        try:
+            profile.profiler.enable()
+        except ValueError:  # another profiler already owns this thread
+            return
+        _ACTIVE.profile = profile
+
+    @app.after_request
+    def finish_profile(response: Response) -> Response:
+        profile = _current()
+        if profile is None:
+            return response
+        profile.profiler.disable()
+        _ACTIVE.profile = None
+        try:
+            _write(profile, response)
+        except OSError:
+            logger.exception('could not write profile %s', profile.profile_id)
+            return response
+        response.headers[PROFILE_ID_HEADER] = profile.profile_id
+        return response
+
+    @app.teardown_request
+    def drop_profile(_exc: Optional[BaseException]) -> None:
+        # after_request is skipped on unhandled errors; never leak a profiler into the next request.
+        clear_active_profile()
+
+
+def clear_active_profile() -> None:
+    """Stop and forget the profile bound to this thread, if any."""
+    profile = _current()
+    if profile is not None:
+        profile.profiler.disable()
+        _ACTIVE.profile = None
+
+
+def list_profiles(limit: int = 50) -> List[Dict]:
+    if not PROFILE_DIR.exists():
+        return []
+    summaries = sorted(PROFILE_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    items = []
+    for path in summaries:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        data.pop('top_functions', None)
+        data['stages'] = [s for s in data['stages'] if s['depth'] == 0]
+        items.append(data)
+    return items
+
+
+def load_profile(profile_id: str) -> Optional[Dict]:
+    path = PROFILE_DIR / f'{profile_id}.json'
+    if '/' in profile_id or not path.exists():
+        return None
+    return json.loads(path.read_text())
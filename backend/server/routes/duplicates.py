@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify, request
+
+from ..config import NEAR_DUP_THRESHOLD
+from ..services.near_dup_service import list_clusters, near_dup_policy
+
+duplicates_bp = Blueprint('duplicates', __name__)
+
+
+@duplicates_bp.route('/duplicates', methods=['GET'])
+def list_duplicates_endpoint():
+    try:
+        limit = int(request.args.get('limit', 50))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    clusters = list_clusters(max(1, min(limit, 500)), max(0, offset))
+    return jsonify({'policy': near_dup_policy(), 'threshold': NEAR_DUP_THRESHOLD, 'clusters': clusters}), 200
@@ -0,0 +1,34 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from ..events import BUS, TooManySubscribers
+
+events_bp = Blueprint('events', __name__)
+
+EVENT_KINDS = {'model', 'candidate', 'rankings'}
+
+
+@events_bp.route('/events', methods=['GET'])
+def events_endpoint():
+    # Browsers send Last-Event-ID when they reconnect; the query form lets a new page resume too.
+    # Ids are opaque here; one the bus did not issue simply earns a resync.
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or None
+    job_raw = request.args.get('job_id')
+    try:
+        job_id = int(job_raw) if job_raw is not None else None
+    except ValueError:
+        return jsonify({'error': 'job_id must be an integer'}), 400
+    kinds = {kind.strip() for kind in request.args.get('types', '').split(',') if kind.strip()}
+    if kinds - EVENT_KINDS:
+        return jsonify({'error': f'types must be among {sorted(EVENT_KINDS)}'}), 400
+
+    try:
+        subscription = BUS.subscribe(last_event_id, job_id, kinds)
+    except TooManySubscribers as exc:
+        response = jsonify({'error': str(exc)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return Response(
+        stream_with_context(BUS.stream(subscription)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -11,7 +11,9 @@ def feedback_endpoint():
     data = request.get_json(silent=True) or {}
     payload = FeedbackPayload(**data)
     try:
-        result = apply_feedback(payload.job_id, payload.shown_candidate_ids, payload.chosen_candidate_id)
+        result = apply_feedback(
+            payload.job_id, payload.shown_candidate_ids, payload.chosen_candidate_id, payload.slate_id
+        )
     except ValueError as exc:
         return jsonify({'error': str(exc)}), 400
     return jsonify(result), 200
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
-from ..services.job_service import create_job
+from ..services.job_service import create_job, update_job
 from .schemas import JobPayload
 
 jobs_bp = Blueprint('jobs', __name__)
@@ -13,3 +13,14 @@ def create_job_endpoint():
     payload = JobPayload(**data)
     job_id = create_job(payload.title, payload.description)
     return jsonify({'job_id': job_id}), 200
+
+
+@jobs_bp.route('/jobs/<int:job_id>', methods=['PUT'])
+def update_job_endpoint(job_id: int):
+    data = request.get_json(silent=True) or {}
+    payload = JobPayload(**data)
+    try:
+        update_job(job_id, payload.title, payload.description)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 404
+    return jsonify({'job_id': job_id}), 200
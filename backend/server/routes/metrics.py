@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+
+from ..admission import admission_stats
+from ..embeddings import embedding_stats
+from ..events import event_stats
+from ..write_queue import write_stats
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return jsonify({'embeddings': embedding_stats(), 'writes': write_stats(), 'admission': admission_stats(), 'events': event_stats()}), 200
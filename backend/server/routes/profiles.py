@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, request, send_from_directory
+
+from ..config import PROFILE_DIR, PROFILING_ENABLED
+from ..profiling import list_profiles, load_profile
+
+profiles_bp = Blueprint('profiles', __name__)
+
+
+@profiles_bp.route('/profiles', methods=['GET'])
+def list_profiles_endpoint():
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify({'enabled': PROFILING_ENABLED, 'profiles': list_profiles(max(1, min(limit, 500)))}), 200
+
+
+@profiles_bp.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile_endpoint(profile_id: str):
+    profile = load_profile(profile_id)
+    if profile is None:
+        return jsonify({'error': 'profile not found'}), 404
+    return jsonify(profile), 200
+
+
+@profiles_bp.route('/profiles/<profile_id>.prof', methods=['GET'])
+def download_profile_endpoint(profile_id: str):
+    # Raw pstats dump for snakeviz / pstats.Stats.
+    return send_from_directory(PROFILE_DIR, f'{profile_id}.prof', mimetype='application/octet-stream', as_attachment=True)
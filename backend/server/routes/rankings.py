@@ -1,10 +1,22 @@
+from typing import List, Optional
+
 from flask import Blueprint, jsonify, request
 
+from ..services.candidate_filter import CandidateFilter
 from ..services.ranking_service import fetch_rankings
+from ..services.whatif_service import what_if
+from ..utils.responses import json_response
+from .schemas import WhatIfPayload
 
 rankings_bp = Blueprint('rankings', __name__)
 
 
+def _split_list(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return []
+    return [item for item in raw.split(',') if item.strip()]
+
+
 @rankings_bp.route('/rankings', methods=['GET'])
 def rankings_endpoint():
     job_id_raw = request.args.get('job_id')
@@ -22,6 +34,59 @@ def rankings_endpoint():
         epsilon = float(request.args.get('epsilon', 0.1))
     except ValueError:
         return jsonify({'error': 'epsilon must be numeric'}), 400
+    strategy = request.args.get('strategy', 'epsilon')
+    seed_raw = request.args.get('seed')
+    try:
+        seed = int(seed_raw) if seed_raw is not None else None
+    except ValueError:
+        return jsonify({'error': 'seed must be an integer'}), 400
+    try:
+        explore_slots = int(request.args.get('explore_slots', 1))
+    except ValueError:
+        return jsonify({'error': 'explore_slots must be an integer'}), 400
+    try:
+        temperature = float(request.args.get('temperature', 0.1))
+    except ValueError:
+        return jsonify({'error': 'temperature must be numeric'}), 400
 
-    data = fetch_rankings(job_id, k, epsilon)
-    return jsonify({'job_id': job_id, **data}), 200
+    try:
+        min_years = float(request.args['min_years']) if 'min_years' in request.args else None
+        min_edu = int(request.args['min_edu']) if 'min_edu' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'min_years must be numeric and min_edu an integer'}), 400
+    candidate_filter = CandidateFilter(
+        required_skills=_split_list(request.args.get('skills')),
+        any_skills=_split_list(request.args.get('any_skills')),
+        min_years=min_years,
+        min_edu=min_edu,
+    )
+
+    response_format = request.args.get('format', 'rows')
+    if response_format not in ('rows', 'columnar'):
+        return jsonify({'error': 'format must be rows or columnar'}), 400
+
+    try:
+        data = fetch_rankings(
+            job_id, k, epsilon, strategy, seed, explore_slots, temperature, candidate_filter,
+            columnar=response_format == 'columnar',
+        )
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return json_response({'job_id': job_id, **data})
+
+
+@rankings_bp.route('/rankings/whatif', methods=['POST'])
+def whatif_endpoint():
+    data = request.get_json(silent=True) or {}
+    payload = WhatIfPayload(**data)
+    candidate_filter = CandidateFilter(
+        required_skills=payload.skills,
+        any_skills=payload.any_skills,
+        min_years=payload.min_years,
+        min_edu=payload.min_edu,
+    )
+    try:
+        data = what_if(payload.job_id, payload.weights, payload.k, candidate_filter)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return json_response(data)
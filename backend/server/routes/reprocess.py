@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, request
+
+from ..services.reprocess_service import reprocess_status, start_reprocess
+
+reprocess_bp = Blueprint('reprocess', __name__)
+
+
+@reprocess_bp.route('/reprocess', methods=['POST'])
+def start_reprocess_endpoint():
+    data = request.get_json(silent=True) or {}
+    run = start_reprocess(force=bool(data.get('force', False)))
+    return jsonify(run), 202
+
+
+@reprocess_bp.route('/reprocess', methods=['GET'])
+def reprocess_status_endpoint():
+    run = reprocess_status()
+    if run is None:
+        return jsonify({'error': 'no reprocess run yet'}), 404
+    return jsonify(run), 200
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 
+from ..services.near_dup_service import NearDuplicateError
 from ..services.resume_service import ingest_resume
 
 resumes_bp = Blueprint('resumes', __name__)
@@ -12,6 +13,8 @@ def upload_resume_endpoint():
         return jsonify({'error': 'file is required'}), 400
     try:
         result = ingest_resume(storage)
+    except NearDuplicateError as exc:
+        return jsonify({'error': str(exc), 'candidate_id': exc.match.candidate_id, 'similarity': exc.match.similarity}), 409
     except ValueError as exc:
         return jsonify({'error': str(exc)}), 400
     return jsonify(result), 200
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional, Union
 
 
 class JobPayload(BaseModel):
@@ -11,3 +11,14 @@ class FeedbackPayload(BaseModel):
     job_id: int
     shown_candidate_ids: List[int]
     chosen_candidate_id: int
+    slate_id: Optional[str] = None
+
+
+class WhatIfPayload(BaseModel):
+    job_id: int
+    weights: List[Union[List[float], Dict[str, float]]]
+    k: int = 5
+    skills: List[str] = []
+    any_skills: List[str] = []
+    min_years: Optional[float] = None
+    min_edu: Optional[int] = None
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify, request
+
+from ..services.search_service import search_candidates
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('/search', methods=['GET'])
+def search_endpoint():
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    try:
+        results = search_candidates(query, max(1, min(limit, 500)))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return jsonify({'query': query, 'results': results}), 200
@@ -1,10 +1,28 @@
 from flask import Blueprint, send_from_directory
 
 from ..config import UPLOAD_DIR
+from ..utils.storage import digest_from_name
 
 uploads_bp = Blueprint('uploads', __name__)
 
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 3600
+
 
 @uploads_bp.route('/uploads/<path:filename>', methods=['GET'])
 def serve_upload(filename: str):
-    return send_from_directory(UPLOAD_DIR, filename, as_attachment=False)
+    digest = digest_from_name(filename)
+    if digest is None:
+        # Pre content-addressing uploads keep werkzeug's mtime/size based ETag.
+        return send_from_directory(UPLOAD_DIR, filename, as_attachment=False, max_age=LEGACY_MAX_AGE)
+    # Content-addressed files never change, so the digest is a strong ETag.
+    response = send_from_directory(
+        UPLOAD_DIR,
+        filename,
+        as_attachment=False,
+        mimetype='application/pdf',
+        etag=digest,
+        max_age=IMMUTABLE_MAX_AGE,
+    )
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import hashlib
+import time
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config import MAX_FILE_SIZE_BYTES
+from ..database import db_connection
+from ..embeddings import embed_texts
+from ..utils.extraction import ParsedResume, parse_resume
+from ..utils.minhash import signature
+from ..utils.storage import store_content
+from ..utils.time import now_iso
+from .feature_service import score_candidate, store_candidate_features
+from .near_dup_service import NearDuplicateError
+from .resume_service import find_by_content_hash, register_candidate, release_content
+
+STATUS_IMPORTED = 'imported'
+STATUS_DUPLICATE = 'duplicate'
+STATUS_FAILED = 'failed'
+
+
+@dataclass
+class ImportSummary:
+    source: str
+    total: int = 0
+    skipped: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.imported + self.duplicates + self.failed
+
+    @property
+    def files_per_s(self) -> float:
+        return self.processed / self.elapsed_s if self.elapsed_s else 0.0
+
+
+@dataclass
+class _Item:
+    name: str
+    data: bytes
+    sha256: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+
+
+class ImportSource:
+    """A directory tree or zip archive of PDFs, addressed by stable item names."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path).resolve()
+        if not self.path.exists():
+            raise ValueError(f'{self.path} does not exist')
+        self.is_zip = self.path.is_file() and zipfile.is_zipfile(self.path)
+        if not (self.is_zip or self.path.is_dir()):
+            raise ValueError(f'{self.path} is neither a directory nor a zip archive')
+
+    @property
+    def key(self) -> str:
+        return str(self.path)
+
+    def names(self) -> List[str]:
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as archive:
+                return sorted(
+                    info.filename
+                    for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith('.pdf')
+                )
+        return sorted(
+            p.relative_to(self.path).as_posix()
+            for p in self.path.rglob('*')
+            if p.is_file() and p.suffix.lower() == '.pdf'
+        )
+
+    def read(self, names: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """Yield (name, bytes); bytes is None for files over the upload size limit."""
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as archive:
+                for name in names:
+                    if archive.getinfo(name).file_size > MAX_FILE_SIZE_BYTES:
+                        yield name, None
+                    else:
+                        yield name, archive.read(name)
+            return
+        for name in names:
+            path = self.path / name
+            if path.stat().st_size > MAX_FILE_SIZE_BYTES:
+                yield name, None
+            else:
+                yield name, path.read_bytes()
+
+
+def _completed_items(source_key: str, retry_failed: bool) -> Set[str]:
+    statuses = (STATUS_IMPORTED, STATUS_DUPLICATE) if retry_failed else (STATUS_IMPORTED, STATUS_DUPLICATE, STATUS_FAILED)
+    placeholders = ','.join(['?'] * len(statuses))
+    with db_connection() as conn:
+        rows = conn.execute(
+            f'SELECT item FROM import_checkpoints WHERE source=? AND status IN ({placeholders})',
+            (source_key, *statuses),
+        ).fetchall()
+    return {row['item'] for row in rows}
+
+
+def _checkpoint(
+    conn,
+    source_key: str,
+    item: str,
+    status: str,
+    candidate_id: Optional[int] = None,
+    content_hash: Optional[str] = None,
+    error: Optional[str] = None,
+) -> None:
+    conn.execute(
+        '''
+        INSERT INTO import_checkpoints (source, item, status, candidate_id, content_hash, error, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(source, item) DO UPDATE SET
+            status=excluded.status,
+            candidate_id=excluded.candidate_id,
+            content_hash=excluded.content_hash,
+            error=excluded.error,
+            updated_at=excluded.updated_at
+        ''',
+        (source_key, item, status, candidate_id, content_hash, error, now_iso()),
+    )
+
+
+def _import_batch(source: ImportSource, names: List[str], executor: Executor, summary: ImportSummary) -> None:
+    items: List[_Item] = []
+    oversized: List[str] = []
+    for name, data in source.read(names):
+        if data is None:
+            oversized.append(name)
+        else:
+            items.append(_Item(name, data))
+
+    # Content already in the corpus (or repeated within this batch) skips parsing and embedding.
+    existing: Dict[str, int] = {}
+    fresh: List[_Item] = []
+    fresh_hashes: Set[str] = set()
+    with db_connection() as conn:
+        for item in items:
+            if item.sha256 in existing or item.sha256 in fresh_hashes:
+                continue
+            row = find_by_content_hash(conn, item.sha256)
+            if row is not None:
+                existing[item.sha256] = int(row['id'])
+            else:
+                fresh.append(item)
+                fresh_hashes.add(item.sha256)
+    fresh_names = {item.name for item in fresh}
+
+    parsed: List[Optional[ParsedResume]] = list(executor.map(parse_resume, [item.data for item in fresh], chunksize=4))
+    parsed_items = [(item, resume) for item, resume in zip(fresh, parsed) if resume is not None]
+    embeddings, embedding_model = embed_texts([resume.text for _, resume in parsed_items])
+    paths = {item.sha256: str(store_content(item.sha256, item.data)) for item, _ in parsed_items}
+
+    with db_connection() as conn:
+        new_ids: Dict[str, int] = {}
+        for (item, resume), embedding in zip(parsed_items, embeddings):
+            try:
+                new_ids[item.sha256], _ = register_candidate(
+                    conn, resume, embedding, embedding_model, paths[item.sha256], item.sha256, signature(resume.text)
+                )
+            except NearDuplicateError as exc:
+                # Rejected as a near-duplicate: recorded against the cluster it matched, file not kept.
+                existing[item.sha256] = exc.match.candidate_id
+                release_content(conn, item.sha256)
+        failed_hashes = {item.sha256 for item, resume in zip(fresh, parsed) if resume is None}
+        for item in items:
+            if item.sha256 in new_ids and item.name in fresh_names:
+                _checkpoint(conn, source.key, item.name, STATUS_IMPORTED, new_ids[item.sha256], item.sha256)
+                summary.imported += 1
+            elif item.sha256 in failed_hashes:
+                _checkpoint(conn, source.key, item.name, STATUS_FAILED, None, item.sha256, 'could not extract text from PDF')
+                summary.failed += 1
+            else:
+                candidate_id = existing.get(item.sha256, new_ids.get(item.sha256))
+                _checkpoint(conn, source.key, item.name, STATUS_DUPLICATE, candidate_id, item.sha256)
+                summary.duplicates += 1
+        for name in oversized:
+            _checkpoint(conn, source.key, name, STATUS_FAILED, error='file too large (10MB limit)')
+            summary.failed += 1
+        conn.commit()
+
+    # Score after the batch commits so the write lock is held only for the upserts.
+    # A crash in between is repaired by the startup feature backfill.
+    if new_ids:
+        with db_connection(readonly=True) as conn:
+            scored = {candidate_id: score_candidate(conn, candidate_id) for candidate_id in new_ids.values()}
+        with db_connection() as conn:
+            for candidate_id, rows in scored.items():
+                store_candidate_features(conn, candidate_id, rows)
+            conn.commit()
+
+
+def run_bulk_import(
+    path: Path,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    retry_failed: bool = False,
+    progress: Optional[Callable[[ImportSummary], None]] = None,
+) -> ImportSummary:
+    source = ImportSource(path)
+    names = source.names()
+    done = _completed_items(source.key, retry_failed)
+    pending = [name for name in names if name not in done]
+    summary = ImportSummary(source=source.key, total=len(names), skipped=len(names) - len(pending))
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for offset in range(0, len(pending), batch_size):
+            _import_batch(source, pending[offset: offset + batch_size], executor, summary)
+            summary.elapsed_s = time.perf_counter() - started
+            if progress is not None:
+                progress(summary)
+    summary.elapsed_s = time.perf_counter() - started
+    return summary
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from ..utils.extraction import normalise_skill
+
+
+def _canonical(skills: Iterable[str]) -> List[str]:
+    result = []
+    for raw in skills:
+        cleaned = raw.strip().lower()
+        if cleaned:
+            result.append(normalise_skill(cleaned) or cleaned)
+    return sorted(set(result))
+
+
+@dataclass
+class CandidateFilter:
+    """Candidate predicates evaluated in SQL so only the matching subset is scored."""
+
+    required_skills: List[str] = field(default_factory=list)
+    any_skills: List[str] = field(default_factory=list)
+    min_years: Optional[float] = None
+    min_edu: Optional[int] = None
+    include_duplicates: bool = False
+    id_range: Optional[Tuple[int, int]] = None
+
+    def __post_init__(self) -> None:
+        self.required_skills = _canonical(self.required_skills)
+        self.any_skills = _canonical(self.any_skills)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.required_skills or self.any_skills or self.min_years is not None or self.min_edu is not None)
+
+    def where_clause(self, alias: str = 'c') -> Tuple[str, list]:
+        """SQL predicate over ``candidates`` (aliased ``alias``) and its parameters."""
+        clauses: List[str] = []
+        params: list = []
+        if not self.include_duplicates:
+            # Linked near-duplicates are represented by their cluster root.
+            clauses.append(f'{alias}.duplicate_of IS NULL')
+        if self.id_range is not None:
+            # Shards are contiguous rowid ranges, so each one seeks rather than scans.
+            clauses.append(f'{alias}.id BETWEEN ? AND ?')
+            params.extend(int(bound) for bound in self.id_range)
+        if self.min_years is not None:
+            clauses.append(f'{alias}.years_exp >= ?')
+            params.append(float(self.min_years))
+        if self.min_edu is not None:
+            clauses.append(f'{alias}.edu_level >= ?')
+            params.append(int(self.min_edu))
+        if self.required_skills:
+            placeholders = ','.join(['?'] * len(self.required_skills))
+            clauses.append(
+                f'{alias}.id IN (SELECT candidate_id FROM candidate_skills WHERE skill IN ({placeholders}) '
+                'GROUP BY candidate_id HAVING COUNT(*) = ?)'
+            )
+            params.extend(self.required_skills)
+            params.append(len(self.required_skills))
+        if self.any_skills:
+            placeholders = ','.join(['?'] * len(self.any_skills))
+            clauses.append(f'{alias}.id IN (SELECT candidate_id FROM candidate_skills WHERE skill IN ({placeholders}))')
+            params.extend(self.any_skills)
+        if not clauses:
+            return '1=1', []
+        return ' AND '.join(clauses), params
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+
+@dataclass
+class ExplorationParams:
+    strategy: str = 'epsilon'
+    epsilon: float = 0.1
+    explore_slots: int = 1
+    temperature: float = 0.1
+
+
+@dataclass
+class Slate:
+    """Row indices into the scored pool, in display order, plus a per-slot explore flag."""
+
+    indices: np.ndarray
+    explore: np.ndarray
+
+
+StrategyFn = Callable[[np.ndarray, np.ndarray, int, np.random.Generator, ExplorationParams], Slate]
+STRATEGIES: Dict[str, StrategyFn] = {}
+
+
+def register_strategy(name: str) -> Callable[[StrategyFn], StrategyFn]:
+    def decorator(fn: StrategyFn) -> StrategyFn:
+        STRATEGIES[name] = fn
+        return fn
+
+    return decorator
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first, in O(N + k log k)."""
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind='stable')]
+
+
+def _greedy_slate(scores: np.ndarray, k: int) -> Slate:
+    indices = top_k_indices(scores, k)
+    return Slate(indices=indices, explore=np.zeros(indices.shape[0], dtype=bool))
+
+
+@register_strategy('greedy')
+def greedy(features, weights, k, rng, params) -> Slate:
+    return _greedy_slate(features @ weights, k)
+
+
+@register_strategy('epsilon')
+def epsilon_greedy(features, weights, k, rng, params) -> Slate:
+    n = features.shape[0]
+    epsilon = max(0.0, min(1.0, params.epsilon))
+    if n > k and rng.random() < epsilon:
+        # Sampling without replacement draws only k positions; the pool is never shuffled.
+        indices = rng.choice(n, size=k, replace=False)
+        return Slate(indices=indices, explore=np.ones(k, dtype=bool))
+    return greedy(features, weights, k, rng, params)
+
+
+@register_strategy('mixed')
+def mixed(features, weights, k, rng, params) -> Slate:
+    """Top-(k - m) by score with m uniformly sampled exploration slots at random positions."""
+    n = features.shape[0]
+    scores = features @ weights
+    slots = max(0, min(params.explore_slots, k, n - min(k, n)))
+    if slots == 0:
+        return _greedy_slate(scores, k)
+    exploit = top_k_indices(scores, k - slots)
+    remaining = np.ones(n, dtype=bool)
+    remaining[exploit] = False
+    pool = np.flatnonzero(remaining)
+    sampled = pool[rng.choice(pool.shape[0], size=slots, replace=False)]
+    return _interleave(exploit, sampled, rng)
+
+
+def _interleave(exploit: np.ndarray, sampled: np.ndarray, rng: np.random.Generator) -> Slate:
+    """Place ``sampled`` at random positions among ``exploit``, which keeps its order."""
+    slots = sampled.shape[0]
+    size = exploit.shape[0] + slots
+    positions = np.sort(rng.choice(size, size=slots, replace=False))
+    indices = np.empty(size, dtype=np.int64)
+    explore = np.zeros(size, dtype=bool)
+    explore[positions] = True
+    indices[explore] = sampled
+    indices[~explore] = exploit
+    return Slate(indices=indices, explore=explore)
+
+
+def _perturbed_slate(scores: np.ndarray, keys: np.ndarray, k: int) -> Slate:
+    indices = top_k_indices(keys, k)
+    greedy_set = top_k_indices(scores, k)
+    return Slate(indices=indices, explore=~np.isin(indices, greedy_set))
+
+
+@register_strategy('softmax')
+def softmax(features, weights, k, rng, params) -> Slate:
+    """Plackett-Luce sample of k items via the Gumbel-top-k trick."""
+    scores = features @ weights
+    temperature = max(params.temperature, 1e-6)
+    keys = scores / temperature + rng.gumbel(size=scores.shape[0])
+    return _perturbed_slate(scores, keys, k)
+
+
+@register_strategy('thompson')
+def thompson(features, weights, k, rng, params) -> Slate:
+    """Rank by one weight vector drawn from an isotropic Gaussian around the current weights."""
+    scores = features @ weights
+    sampled = weights + rng.normal(scale=max(params.temperature, 0.0), size=weights.shape[0]).astype(weights.dtype)
+    return _perturbed_slate(scores, features @ sampled, k)
+
+
+# Sharded ranking: every built-in strategy is a top-k under some per-candidate
+# key, so each shard keeps its local top-k by score and by key and the merged
+# lists contain the exact slate the strategy would pick from the whole pool.
+# Random keys are a function of (seed, candidate id), so a seed picks the same
+# slate whether the pool is ranked whole or split into any number of shards.
+SHARDABLE_STRATEGIES = frozenset({'greedy', 'epsilon', 'mixed', 'softmax', 'thompson'})
+_MASK64 = (1 << 64) - 1
+
+
+@dataclass
+class KeyPlan:
+    """Pool-wide draws made once before scatter; shards derive their keys from it."""
+
+    kind: str  # 'score', 'uniform', 'gumbel' or 'sampled'
+    temperature: float = 1.0
+    weights: Optional[np.ndarray] = None
+    seed: int = 0
+
+
+def plan_keys(params: ExplorationParams, weights: np.ndarray, rng: np.random.Generator, seed: int = 0) -> KeyPlan:
+    if params.strategy not in SHARDABLE_STRATEGIES:
+        raise ValueError(f'strategy {params.strategy!r} cannot be sharded')
+    if params.strategy == 'epsilon':
+        explore = rng.random() < max(0.0, min(1.0, params.epsilon))
+        return KeyPlan(kind='uniform' if explore else 'score', seed=seed)
+    if params.strategy == 'mixed':
+        return KeyPlan(kind='uniform', seed=seed)
+    if params.strategy == 'softmax':
+        return KeyPlan(kind='gumbel', temperature=max(params.temperature, 1e-6), seed=seed)
+    if params.strategy == 'thompson':
+        noise = rng.normal(scale=max(params.temperature, 0.0), size=weights.shape[0]).astype(weights.dtype)
+        return KeyPlan(kind='sampled', weights=weights + noise, seed=seed)
+    return KeyPlan(kind='score', seed=seed)
+
+
+def candidate_uniforms(seed: int, candidate_ids: np.ndarray) -> np.ndarray:
+    """Uniform draws in (0, 1), one per candidate, that depend only on ``seed`` and the candidate id.
+
+    A SplitMix64 finaliser over ``id * golden + mixed seed``; vectorised, no generator state.
+    """
+    mixed = np.uint64((seed * 0xD1B54A32D192ED03) & _MASK64)
+    with np.errstate(over='ignore'):
+        x = np.asarray(candidate_ids, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15) + mixed
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return ((x >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0**-53
+
+
+def shard_keys(plan: KeyPlan, features: np.ndarray, scores: np.ndarray, candidate_ids: np.ndarray) -> np.ndarray:
+    if plan.kind == 'uniform':
+        # The top-k of i.i.d. uniform keys is a uniform sample without replacement.
+        return candidate_uniforms(plan.seed, candidate_ids)
+    if plan.kind == 'gumbel':
+        return scores / plan.temperature - np.log(-np.log(candidate_uniforms(plan.seed, candidate_ids)))
+    if plan.kind == 'sampled':
+        return features @ plan.weights
+    return scores
+
+
+def merge_slate(
+    plan: KeyPlan,
+    params: ExplorationParams,
+    scores: np.ndarray,
+    keys: np.ndarray,
+    pool_size: int,
+    k: int,
+    rng: np.random.Generator,
+) -> Slate:
+    """Select from the gathered shard top-k lists; ``pool_size`` is the full pool's size."""
+    if scores.shape[0] == 0 or k <= 0:
+        return Slate(indices=np.zeros(0, dtype=np.int64), explore=np.zeros(0, dtype=bool))
+    if plan.kind == 'uniform' and params.strategy == 'mixed':
+        slots = max(0, min(params.explore_slots, k, pool_size - min(k, pool_size)))
+        if slots == 0:
+            return _greedy_slate(scores, k)
+        exploit = top_k_indices(scores, k - slots)
+        remaining = np.ones(scores.shape[0], dtype=bool)
+        remaining[exploit] = False
+        pool = np.flatnonzero(remaining)
+        return _interleave(exploit, pool[top_k_indices(keys[pool], slots)], rng)
+    if plan.kind == 'uniform':
+        if pool_size <= k:
+            return _greedy_slate(scores, k)
+        indices = top_k_indices(keys, k)
+        return Slate(indices=indices, explore=np.ones(indices.shape[0], dtype=bool))
+    if plan.kind in ('gumbel', 'sampled'):
+        return _perturbed_slate(scores, keys, k)
+    return _greedy_slate(scores, k)
+
+
+def keyed_slate(
+    features: np.ndarray,
+    weights: np.ndarray,
+    candidate_ids: np.ndarray,
+    k: int,
+    params: ExplorationParams,
+    seed: int,
+) -> Slate:
+    """Whole-pool slate of a shardable strategy; identical to scatter-gather for the same seed.
+
+    ``candidate_ids`` must be in ascending order, as shards are gathered.
+    """
+    rng = np.random.default_rng(seed)
+    plan = plan_keys(params, weights, rng, seed)
+    scores = features @ weights
+    keys = shard_keys(plan, features, scores, candidate_ids)
+    return merge_slate(plan, params, scores, keys, features.shape[0], k, rng)
+
+
+def new_seed() -> int:
+    return random.SystemRandom().getrandbits(32)
+
+
+def select_slate(
+    features: np.ndarray,
+    weights: np.ndarray,
+    k: int,
+    params: ExplorationParams,
+    seed: Optional[int] = None,
+) -> tuple[Slate, int]:
+    strategy = STRATEGIES.get(params.strategy)
+    if strategy is None:
+        raise ValueError(f'unknown strategy {params.strategy!r}; expected one of {sorted(STRATEGIES)}')
+    if seed is None:
+        seed = new_seed()
+    rng = np.random.default_rng(seed)
+    if features.shape[0] == 0 or k <= 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return Slate(indices=empty, explore=np.zeros(0, dtype=bool)), seed
+    return strategy(features, weights, k, rng, params), seed
+
+
+def slate_id(job_id: int, strategy: str, seed: int, candidate_ids: Iterable[int]) -> str:
+    payload = f'{job_id}:{strategy}:{seed}:' + ','.join(str(cid) for cid in candidate_ids)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
@@ -1,89 +1,331 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, List
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
-from ..embeddings import embed_text
-from ..utils.extraction import jd_skills
-from ..utils.vectors import blob_to_vector, feature_vector, normalize_skill_overlap, safe_cosine
+from ..config import BM25_FEATURE_ENABLED
+from ..database import db_connection
+from ..events import publish
+from ..profiling import stage
+from ..utils.extraction import skill_bitset
+from ..utils.fts import saturate_bm25
+from ..utils.vectors import blob_to_vector, pack_rows, safe_cosine, unpack_rows
+from ..write_queue import run_write
+from .candidate_filter import CandidateFilter
+from .job_profile_service import JobProfile, load_job_profile
+from .search_service import bm25_scores
 
+logger = logging.getLogger(__name__)
 
-def ensure_features(conn, job_id: int) -> List[Dict]:
-    job = conn.execute('SELECT * FROM jobs WHERE id=?', (job_id,)).fetchone()
-    if job is None:
+# Order of the ranking weights (model_service.WEIGHT_COLUMNS).
+FEATURE_COLUMNS = ('sem_sim', 'skill_overlap', 'jaccard', 'years', 'edu', 'bm25')
+# Stored per (job, candidate) in features.packed; the rest depend on the candidate alone.
+JOB_FEATURE_COLUMNS = ('sem_sim', 'skill_overlap', 'jaccard', 'bm25')
+CANDIDATE_FEATURE_COLUMNS = ('years', 'edu')
+_JOB_POSITIONS = [FEATURE_COLUMNS.index(col) for col in JOB_FEATURE_COLUMNS]
+_CANDIDATE_POSITIONS = [FEATURE_COLUMNS.index(col) for col in CANDIDATE_FEATURE_COLUMNS]
+UPSERT_CHUNK = 10000
+MAX_ROWID = 2**63 - 1
+# Bump whenever the meaning of stored features changes; jobs below it are
+# recomputed in full at startup. 1: skill_overlap scaled by the JD's own skill
+# count; 2: packed job-side layout.
+FEATURE_VERSION = 2
+
+
+def ensure_features(conn, job_id: int, candidate_filter: Optional[CandidateFilter] = None) -> List[Dict]:
+    """Recompute and store a job's features outside any write transaction, in chunks."""
+    profile = load_job_profile(conn, job_id)
+    if profile is None:
         return []
 
-    job_embedding = blob_to_vector(job['embedding']) if job['embedding'] else embed_text(job['description'])
-    job_skill_set = set(jd_skills(job['description']))
+    rows = compute_features(conn, profile, candidate_filter)
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        chunk = rows[start: start + UPSERT_CHUNK]
+        run_write(lambda writer, chunk=chunk: _upsert_if_current(writer, profile, chunk))
+    return rows
 
-    candidates = conn.execute('SELECT * FROM candidates').fetchall()
-    rows: List[Dict] = []
-    for candidate in candidates:
-        resume_embedding = blob_to_vector(candidate['embedding'])
-        cosine = safe_cosine(job_embedding, resume_embedding)
-        sem_sim = (cosine + 1.0) / 2.0
-        skills = set(json.loads(candidate['skills']))
-        overlap = float(len(job_skill_set & skills))
-        union = len(job_skill_set | skills)
-        jaccard = overlap / union if union else 0.0
-        years_norm = min(float(candidate['years_exp']), 20.0) / 20.0
-        edu_norm = min(max(int(candidate['edu_level']), 0), 4) / 4.0
-        rows.append(
-            {
-                'job_id': job_id,
-                'candidate_id': int(candidate['id']),
-                'sem_sim': sem_sim,
-                'skill_overlap_raw': overlap,
-                'jaccard': jaccard,
-                'years': years_norm,
-                'edu': edu_norm,
-            }
+
+def refresh_job_features(conn, job_id: int, since: int, up_to: int) -> None:
+    """Score candidates ``since < id <= up_to`` for a job and record the coverage."""
+    profile = load_job_profile(conn, job_id)
+    if profile is None:
+        return
+    ensure_features(conn, job_id, CandidateFilter(id_range=(since + 1, up_to)))
+
+    def mark(writer) -> None:
+        current = writer.execute('SELECT profile_version FROM jobs WHERE id=?', (job_id,)).fetchone()
+        if current is None or int(current['profile_version']) != profile.profile_version:
+            return  # the edit recorded its own coverage
+        writer.execute(
+            'UPDATE jobs SET features_version=?, features_scored_up_to=MAX(features_scored_up_to, ?) WHERE id=?',
+            (FEATURE_VERSION, up_to, job_id),
         )
+        advance_coverage(writer, [job_id])
 
-    rows = normalize_skill_overlap(rows)
-    for row in rows:
-        conn.execute(
-            '''
-            INSERT INTO features (job_id, candidate_id, sem_sim, skill_overlap, jaccard, years, edu)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(job_id, candidate_id) DO UPDATE SET
-                sem_sim=excluded.sem_sim,
-                skill_overlap=excluded.skill_overlap,
-                jaccard=excluded.jaccard,
-                years=excluded.years,
-                edu=excluded.edu
-            ''',
+    run_write(mark)
+
+
+def advance_coverage(conn, job_ids: Sequence[int]) -> None:
+    """Move each job's ``features_scored_up_to`` past candidates that already have features.
+
+    The watermark stops below the first comparable candidate still missing a
+    row, so a candidate committed but not yet scored is picked up by the next
+    startup backfill. Only ids above the current watermark are examined.
+    """
+    if not job_ids:
+        return
+    conn.execute(
+        f'''
+        UPDATE jobs SET features_scored_up_to = COALESCE(
             (
-                row['job_id'],
-                row['candidate_id'],
-                row['sem_sim'],
-                row.get('skill_overlap', 0.0),
-                row['jaccard'],
-                row['years'],
-                row['edu'],
+                SELECT MIN(c.id) - 1 FROM candidates c
+                WHERE c.id > jobs.features_scored_up_to AND c.duplicate_of IS NULL
+                  AND c.embedding_model IS jobs.embedding_model
+                  AND NOT EXISTS (SELECT 1 FROM features f WHERE f.job_id = jobs.id AND f.candidate_id = c.id)
             ),
+            (SELECT COALESCE(MAX(id), 0) FROM candidates)
         )
-    conn.commit()
-    return rows
+        WHERE id IN ({', '.join('?' for _ in job_ids)}) AND features_version = ?
+        ''',
+        (*job_ids, FEATURE_VERSION),
+    )
+
+
+def features_complete(conn, job_id: int) -> bool:
+    """Whether every comparable candidate has stored, current features for the job."""
+    row = conn.execute(
+        'SELECT features_version, features_scored_up_to FROM jobs WHERE id=?', (job_id,)
+    ).fetchone()
+    if row is None:
+        return True
+    return int(row['features_version']) == FEATURE_VERSION and int(row['features_scored_up_to']) >= max_candidate_id(conn)
+
+
+def _upsert_if_current(conn, profile: JobProfile, rows: List[Dict]) -> None:
+    current = conn.execute('SELECT profile_version FROM jobs WHERE id=?', (profile.job_id,)).fetchone()
+    # An edit since ``rows`` were computed has already stored features for the new description.
+    if current is not None and int(current['profile_version']) == profile.profile_version:
+        upsert_features(conn, rows)
+
+
+def store_job_features(conn, profile: JobProfile, rows: List[Dict], scored_up_to: int) -> None:
+    """Replace a job's features inside the transaction that writes the job row.
+
+    ``rows`` were computed beforehand for candidates with ids up to
+    ``scored_up_to``; candidates ingested since then are scored here.
+    """
+    conn.execute('DELETE FROM features WHERE job_id=?', (profile.job_id,))
+    upsert_features(conn, [dict(row, job_id=profile.job_id) for row in rows])
+    upsert_features(conn, compute_features(conn, profile, CandidateFilter(id_range=(scored_up_to + 1, MAX_ROWID))))
+    conn.execute(
+        'UPDATE jobs SET features_version=?, features_scored_up_to=? WHERE id=?',
+        (FEATURE_VERSION, max_candidate_id(conn), profile.job_id),
+    )
+
+
+def _comparable_jobs(conn, candidate_id: int) -> List:
+    return conn.execute(
+        '''
+        SELECT j.id, j.profile_version FROM jobs j JOIN candidates c ON c.id = ?
+        WHERE j.embedding_model IS c.embedding_model AND j.skills IS NOT NULL AND j.fts_query IS NOT NULL
+        ''',
+        (candidate_id,),
+    ).fetchall()
+
+
+def score_candidate(conn, candidate_id: int) -> List[Tuple[JobProfile, List[Dict]]]:
+    """Features of a stored candidate against every comparable job; reads only.
+
+    Run on a read-only connection after the candidate is committed, then hand
+    the result to :func:`store_candidate_features` on the writer.
+    """
+    candidate_filter = CandidateFilter(id_range=(candidate_id, candidate_id))
+    scored = []
+    for job in _comparable_jobs(conn, candidate_id):
+        profile = load_job_profile(conn, int(job['id']))
+        if profile is not None:
+            scored.append((profile, compute_features(conn, profile, candidate_filter)))
+    return scored
+
+
+def store_candidate_features(
+    conn, candidate_id: int, scored: Optional[List[Tuple[JobProfile, List[Dict]]]] = None
+) -> None:
+    """Store a candidate's features inside the caller's write transaction.
+
+    Rows in ``scored`` are kept for jobs whose profile is unchanged; any other
+    comparable job (edited or created since scoring, or all of them when
+    ``scored`` is omitted) is scored here.
+    """
+    row = conn.execute('SELECT duplicate_of FROM candidates WHERE id=?', (candidate_id,)).fetchone()
+    if row is None or row['duplicate_of'] is not None:
+        return  # superseded meanwhile; duplicates are never ranked
+    ready = {(profile.job_id, profile.profile_version): rows for profile, rows in scored or []}
+    candidate_filter = CandidateFilter(id_range=(candidate_id, candidate_id))
+    rows: List[Dict] = []
+    jobs = _comparable_jobs(conn, candidate_id)
+    for job in jobs:
+        key = (int(job['id']), int(job['profile_version']))
+        if key in ready:
+            rows.extend(ready[key])
+            continue
+        profile = load_job_profile(conn, key[0])
+        if profile is not None:
+            rows.extend(compute_features(conn, profile, candidate_filter))
+    upsert_features(conn, rows)
+    advance_coverage(conn, [int(job['id']) for job in jobs])
+
+
+def jobs_ranking_candidate(conn, candidate_id: int) -> List[int]:
+    """Jobs with stored features for ``candidate_id``; one primary-key probe per job."""
+    rows = conn.execute(
+        'SELECT j.id FROM jobs j WHERE EXISTS (SELECT 1 FROM features f WHERE f.job_id = j.id AND f.candidate_id = ?) ORDER BY j.id',
+        (candidate_id,),
+    ).fetchall()
+    return [int(row['id']) for row in rows]
+
+
+def max_candidate_id(conn) -> int:
+    return int(conn.execute('SELECT COALESCE(MAX(id), 0) AS hi FROM candidates').fetchone()['hi'])
+
+
+def compute_features(conn, profile: JobProfile, candidate_filter: Optional[CandidateFilter] = None) -> List[Dict]:
+    """Feature rows for every candidate matching ``candidate_filter``; reads only, nothing is stored."""
+    where, params = (candidate_filter or CandidateFilter()).where_clause('c')
+    with stage('load_candidates'):
+        # Only candidates embedded by the job's model are comparable; during a
+        # re-embedding run the rest wait for the atomic flip.
+        candidates = conn.execute(
+            f'''
+            SELECT c.id, c.embedding, c.skills FROM candidates c
+            WHERE c.embedding_model IS ? AND {where}
+            ''',
+            (profile.embedding_model, *params),
+        ).fetchall()
+    # Overlap is scaled by the JD's own skill count so a candidate's features do
+    # not depend on which other candidates happen to be scored alongside it.
+    overlap_denom = float(max(1, len(profile.skills)))
+    with stage('bm25'):
+        lexical = bm25_scores(conn, profile.fts_query, candidate_filter) if BM25_FEATURE_ENABLED else {}
+    with stage('compute_features'):
+        return [_feature_row(profile.job_id, profile, candidate, overlap_denom, lexical) for candidate in candidates]
+
+
+def _feature_row(job_id: int, profile, candidate, overlap_denom: float, lexical: Dict[int, float]) -> Dict:
+    resume_embedding = blob_to_vector(candidate['embedding'])
+    cosine = safe_cosine(profile.embedding, resume_embedding)
+    skill_bits = skill_bitset(json.loads(candidate['skills']))
+    overlap = float((profile.skill_bits & skill_bits).bit_count())
+    union = (profile.skill_bits | skill_bits).bit_count()
+    return {
+        'job_id': job_id,
+        'candidate_id': int(candidate['id']),
+        'sem_sim': (cosine + 1.0) / 2.0,
+        'skill_overlap': overlap / overlap_denom,
+        'jaccard': overlap / union if union else 0.0,
+        'bm25': saturate_bm25(lexical.get(int(candidate['id']), 0.0)),
+    }
+
+
+def candidate_features(years_exp: Sequence[float], edu_level: Sequence[int]) -> np.ndarray:
+    """``years`` and ``edu`` columns for candidates with these raw fields."""
+    years = np.minimum(np.asarray(years_exp, dtype=np.float32), 20.0) / 20.0
+    edu = np.clip(np.asarray(edu_level, dtype=np.float32), 0, 4) / 4.0
+    return np.stack([years, edu], axis=1).astype(np.float32)
+
+
+def feature_matrix(rows: Sequence) -> np.ndarray:
+    """Full feature matrix in ``FEATURE_COLUMNS`` order for rows from :func:`load_feature_rows`."""
+    matrix = np.empty((len(rows), len(FEATURE_COLUMNS)), dtype=np.float32)
+    matrix[:, _JOB_POSITIONS] = unpack_rows([row['packed'] for row in rows], len(JOB_FEATURE_COLUMNS))
+    matrix[:, _CANDIDATE_POSITIONS] = candidate_features(
+        [row['years_exp'] for row in rows], [row['edu_level'] for row in rows]
+    )
+    return matrix
+
+
+def upsert_features(conn, rows: List[Dict]) -> None:
+    packed = pack_rows(np.array([[row[col] for col in JOB_FEATURE_COLUMNS] for row in rows], dtype=np.float32))
+    conn.executemany(
+        '''
+        INSERT INTO features (job_id, candidate_id, packed) VALUES (?, ?, ?)
+        ON CONFLICT(job_id, candidate_id) DO UPDATE SET packed=excluded.packed
+        ''',
+        [(row['job_id'], row['candidate_id'], blob) for row, blob in zip(rows, packed)],
+    )
+
+
+def load_feature_rows(conn, job_id: int, candidate_filter: Optional[CandidateFilter] = None) -> List:
+    """Stored features plus display fields for candidates comparable with the job; reads only.
+
+    Turn the rows into scores with :func:`feature_matrix`.
+    """
+    where, params = (candidate_filter or CandidateFilter()).where_clause('c')
+    return conn.execute(
+        f'''
+        SELECT f.candidate_id, f.packed, c.full_name, c.email, c.phone, c.skills, c.years_exp, c.edu_level
+        FROM features f
+        JOIN candidates c ON c.id = f.candidate_id
+        JOIN jobs j ON j.id = f.job_id
+        WHERE f.job_id = ? AND c.embedding_model IS j.embedding_model AND {where}
+        ORDER BY f.candidate_id
+        ''',
+        (job_id, *params),
+    ).fetchall()
 
 
 def fetch_feature_vectors(conn, job_id: int, candidate_ids: List[int]) -> Dict[int, np.ndarray]:
     query_placeholders = ','.join(['?'] * len(candidate_ids))
     rows = conn.execute(
-        f'SELECT candidate_id, sem_sim, skill_overlap, jaccard, years, edu FROM features WHERE job_id=? AND candidate_id IN ({query_placeholders})',
+        f'''
+        SELECT f.candidate_id, f.packed, c.years_exp, c.edu_level FROM features f
+        JOIN candidates c ON c.id = f.candidate_id
+        WHERE f.job_id=? AND f.candidate_id IN ({query_placeholders})
+        ''',
         (job_id, *candidate_ids),
     ).fetchall()
-    vectors: Dict[int, np.ndarray] = {}
-    for row in rows:
-        vectors[int(row['candidate_id'])] = feature_vector(
-            {
-                'sem_sim': float(row['sem_sim']),
-                'skill_overlap': float(row['skill_overlap']),
-                'jaccard': float(row['jaccard']),
-                'years': float(row['years']),
-                'edu': float(row['edu']),
-            }
-        )
-    return vectors
+    matrix = feature_matrix(rows)
+    return {int(row['candidate_id']): matrix[index] for index, row in enumerate(rows)}
+
+
+def _jobs_behind(conn, up_to: int) -> List:
+    return conn.execute(
+        'SELECT id, features_version, features_scored_up_to FROM jobs WHERE features_version < ? OR features_scored_up_to < ? ORDER BY id',
+        (FEATURE_VERSION, up_to),
+    ).fetchall()
+
+
+def backfill_features() -> int:
+    """Score candidates above each job's coverage watermark; jobs on an old feature version start from zero.
+
+    Found with one pass over ``jobs``; the features table is never scanned.
+    """
+    with db_connection() as conn:
+        up_to = max_candidate_id(conn)
+        stale = []
+        for job in _jobs_behind(conn, up_to):
+            since = int(job['features_scored_up_to']) if int(job['features_version']) == FEATURE_VERSION else 0
+            refresh_job_features(conn, int(job['id']), since, up_to)
+            stale.append(int(job['id']))
+    if stale:
+        publish('rankings', job_ids=stale, reason='backfill')
+    return len(stale)
+
+
+def start_feature_backfill() -> None:
+    """Fill features for databases written before they were computed at write time."""
+
+    def run() -> None:
+        try:
+            refreshed = backfill_features()
+        except Exception:
+            logger.exception('feature backfill failed')
+            return
+        if refreshed:
+            logger.info('computed features for %d jobs', refreshed)
+
+    threading.Thread(target=run, name='feature-backfill', daemon=True).start()
@@ -1,53 +1,67 @@
 from __future__ import annotations
 
 import math
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 
 from ..database import db_connection
-from ..services.feature_service import ensure_features, fetch_feature_vectors
-from ..services.model_service import get_hyperparams, get_weights, set_weights
+from ..events import publish
+from ..profiling import stage
+from ..services.feature_service import fetch_feature_vectors
+from ..services.model_service import get_hyperparams, get_weights, get_weights_version, set_weights
 from ..utils.time import now_iso
+from ..write_queue import run_write
 
 
-def apply_feedback(job_id: int, shown_ids: List[int], chosen_id: int) -> Dict:
+def apply_feedback(job_id: int, shown_ids: List[int], chosen_id: int, slate_id: Optional[str] = None) -> Dict:
     if not shown_ids:
         raise ValueError('shown_candidate_ids must contain at least one id')
     if chosen_id not in shown_ids:
         raise ValueError('chosen_candidate_id must be among shown_candidate_ids')
 
-    with db_connection() as conn:
-        ensure_features(conn, job_id)
-        feature_map = fetch_feature_vectors(conn, job_id, shown_ids)
-        if len(feature_map) != len(shown_ids):
-            missing = sorted(set(shown_ids) - set(feature_map))
-            raise ValueError(f'missing feature vectors for candidates {missing}')
+    with db_connection(readonly=True) as conn:
+        with stage('fetch_feature_vectors'):
+            feature_map = fetch_feature_vectors(conn, job_id, shown_ids)
+    if len(feature_map) != len(shown_ids):
+        missing = sorted(set(shown_ids) - set(feature_map))
+        raise ValueError(f'missing feature vectors for candidates {missing}')
 
+    def update(conn) -> Dict:
+        # Read-modify-write of the shared weights runs on the writer, so
+        # concurrent feedback is applied in sequence rather than lost.
         weights = get_weights(conn)
         lr, l2 = get_hyperparams(conn)
         winner_vec = feature_map[chosen_id]
         updates = 0
 
-        for cid in shown_ids:
-            if cid == chosen_id:
-                continue
-            loser_vec = feature_map[cid]
-            delta = winner_vec - loser_vec
-            logit = float(np.dot(weights, delta))
-            prob = 1.0 / (1.0 + math.exp(-logit))
-            gradient = (1.0 - prob) * delta - l2 * weights
-            weights = weights + lr * gradient
-            conn.execute(
-                'INSERT INTO pairwise_prefs (job_id, winner_candidate_id, loser_candidate_id, created_at) VALUES (?, ?, ?, ?)',
-                (job_id, chosen_id, cid, now_iso()),
-            )
-            updates += 1
-
-        set_weights(conn, weights)
-        conn.commit()
-
-    return {
-        'updated_pairs': updates,
-        'new_weights': weights.tolist(),
-    }
+        with stage('pairwise_sgd'):
+            for cid in shown_ids:
+                if cid == chosen_id:
+                    continue
+                loser_vec = feature_map[cid]
+                delta = winner_vec - loser_vec
+                logit = float(np.dot(weights, delta))
+                prob = 1.0 / (1.0 + math.exp(-logit))
+                gradient = (1.0 - prob) * delta - l2 * weights
+                weights = weights + lr * gradient
+                conn.execute(
+                    'INSERT INTO pairwise_prefs (job_id, winner_candidate_id, loser_candidate_id, created_at, slate_id) VALUES (?, ?, ?, ?, ?)',
+                    (job_id, chosen_id, cid, now_iso(), slate_id),
+                )
+                updates += 1
+
+        with stage('set_weights'):
+            set_weights(conn, weights)
+        return {
+            'updated_pairs': updates,
+            'new_weights': weights.tolist(),
+            'weights_version': get_weights_version(conn),
+        }
+
+    with stage('update_weights'):
+        result = run_write(update)
+    # New weights reorder every job's ranking.
+    publish('model', version=result['weights_version'], weights=result['new_weights'])
+    publish('rankings', job_ids=None, reason='weights')
+    return result
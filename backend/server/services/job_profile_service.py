@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional
+
+import numpy as np
+
+from ..config import JOB_PROFILE_CACHE_SIZE
+from ..embeddings import embed_text
+from ..utils.extraction import extract_edu_level, extract_years, jd_skills, skill_bitset
+from ..utils.fts import build_match_query
+from ..utils.vectors import blob_to_vector
+from ..write_queue import run_write
+
+
+@dataclass(frozen=True)
+class JobProfile:
+    """Everything ranking needs from a job, derived once from its description."""
+
+    job_id: int
+    embedding: np.ndarray
+    skills: FrozenSet[str]
+    skill_bits: int
+    min_years: float
+    min_edu: int
+    fts_query: str
+    embedding_model: Optional[str]
+    profile_version: int
+
+
+@dataclass(frozen=True)
+class JobRequirements:
+    skills: List[str]
+    min_years: float
+    min_edu: int
+    fts_query: str
+
+
+def derive_requirements(description: str) -> JobRequirements:
+    return JobRequirements(
+        skills=jd_skills(description),
+        min_years=extract_years(description),
+        min_edu=extract_edu_level(description),
+        fts_query=build_match_query(description),
+    )
+
+
+def _normalise(vec: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vec))
+    if norm == 0:
+        return vec.astype(np.float32)
+    return (vec / norm).astype(np.float32)
+
+
+class _ProfileCache:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(0, capacity)
+        self._items: 'OrderedDict[int, JobProfile]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id: int) -> Optional[JobProfile]:
+        with self._lock:
+            profile = self._items.get(job_id)
+            if profile is not None:
+                self._items.move_to_end(job_id)
+            return profile
+
+    def put(self, profile: JobProfile) -> None:
+        if self.capacity == 0:
+            return
+        with self._lock:
+            self._items[profile.job_id] = profile
+            self._items.move_to_end(profile.job_id)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def discard(self, job_id: int) -> None:
+        with self._lock:
+            self._items.pop(job_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_CACHE = _ProfileCache(JOB_PROFILE_CACHE_SIZE)
+
+
+def _backfill_profile(conn, job_id: int) -> None:
+    """One-time derivation for jobs created before profiles were persisted."""
+    row = conn.execute('SELECT description, embedding, embedding_model FROM jobs WHERE id=?', (job_id,)).fetchone()
+    requirements = derive_requirements(row['description'])
+    embedding, model = row['embedding'], row['embedding_model']
+    if embedding is None:
+        vector, model = embed_text(row['description'])
+        embedding = vector.astype(np.float32).tobytes()
+    params = (
+        embedding,
+        model,
+        json.dumps(requirements.skills),
+        requirements.min_years,
+        requirements.min_edu,
+        requirements.fts_query,
+        job_id,
+    )
+    run_write(
+        lambda writer: writer.execute(
+            'UPDATE jobs SET embedding=?, embedding_model=?, skills=?, min_years=?, min_edu=?, fts_query=? WHERE id=?',
+            params,
+        )
+    )
+
+
+def load_job_profile(conn, job_id: int) -> Optional[JobProfile]:
+    profile = _CACHE.get(job_id)
+    if profile is not None:
+        # One indexed integer read keeps the cache honest across worker processes.
+        current = conn.execute('SELECT profile_version FROM jobs WHERE id=?', (job_id,)).fetchone()
+        if current is not None and int(current['profile_version']) == profile.profile_version:
+            return profile
+        _CACHE.discard(job_id)
+        if current is None:
+            return None
+
+    query = '''
+        SELECT id, embedding, skills, min_years, min_edu, fts_query, embedding_model, profile_version
+        FROM jobs WHERE id=?
+    '''
+    row = conn.execute(query, (job_id,)).fetchone()
+    if row is None:
+        return None
+    if row['skills'] is None or row['fts_query'] is None:
+        _backfill_profile(conn, job_id)
+        row = conn.execute(query, (job_id,)).fetchone()
+
+    requirements = JobRequirements(
+        skills=json.loads(row['skills']),
+        min_years=float(row['min_years'] or 0.0),
+        min_edu=int(row['min_edu'] or 0),
+        fts_query=row['fts_query'],
+    )
+    profile = build_profile(
+        int(row['id']), blob_to_vector(row['embedding']), requirements, row['embedding_model'], int(row['profile_version'])
+    )
+    _CACHE.put(profile)
+    return profile
+
+
+def build_profile(
+    job_id: int,
+    embedding: np.ndarray,
+    requirements: JobRequirements,
+    embedding_model: Optional[str],
+    profile_version: int = 0,
+) -> JobProfile:
+    """Profile for a job that may not be stored yet, so its features can be computed before the write."""
+    skills = frozenset(requirements.skills)
+    return JobProfile(
+        job_id=job_id,
+        embedding=_normalise(embedding),
+        skills=skills,
+        skill_bits=skill_bitset(skills),
+        min_years=float(requirements.min_years or 0.0),
+        min_edu=int(requirements.min_edu or 0),
+        fts_query=requirements.fts_query,
+        embedding_model=embedding_model,
+        profile_version=profile_version,
+    )
+
+
+def invalidate_job_profile(job_id: int) -> None:
+    _CACHE.discard(job_id)
+
+
+def clear_job_profiles() -> None:
+    _CACHE.clear()
@@ -1,17 +1,101 @@
 from __future__ import annotations
 
+import json
+from dataclasses import replace
+from typing import Dict, List, Tuple
+
 from ..database import db_connection
 from ..embeddings import embed_text
+from ..events import publish
+from ..utils.extraction import EXTRACTOR_VERSION
 from ..utils.time import now_iso
 from ..utils.vectors import vector_to_blob
+from ..write_queue import run_write
+from .candidate_filter import CandidateFilter
+from .feature_service import compute_features, max_candidate_id, store_job_features
+from .job_profile_service import JobProfile, build_profile, derive_requirements, invalidate_job_profile
+
+
+def _score_pool(profile: JobProfile) -> Tuple[List[Dict], int]:
+    """Features of the current pool for a job about to be written, computed off the writer."""
+    with db_connection(readonly=True) as conn:
+        scored_up_to = max_candidate_id(conn)
+        rows = compute_features(conn, profile, CandidateFilter(id_range=(0, scored_up_to)))
+    return rows, scored_up_to
 
 
 def create_job(title: str, description: str) -> int:
-    embedding = embed_text(description)
-    with db_connection() as conn:
+    embedding, model = embed_text(description)
+    requirements = derive_requirements(description)
+    profile = build_profile(0, embedding, requirements, model)
+    rows, scored_up_to = _score_pool(profile)
+
+    def insert(conn) -> int:
         cur = conn.execute(
-            'INSERT INTO jobs (title, description, embedding, created_at) VALUES (?, ?, ?, ?)',
-            (title, description, vector_to_blob(embedding), now_iso()),
+            '''
+            INSERT INTO jobs (
+                title, description, embedding, created_at, skills, min_years, min_edu, fts_query,
+                embedding_model, extractor_version
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                title,
+                description,
+                vector_to_blob(embedding),
+                now_iso(),
+                json.dumps(requirements.skills),
+                requirements.min_years,
+                requirements.min_edu,
+                requirements.fts_query,
+                model,
+                EXTRACTOR_VERSION,
+            ),
         )
-        conn.commit()
-        return int(cur.lastrowid)
+        job_id = int(cur.lastrowid)
+        # The job becomes visible together with its features.
+        store_job_features(conn, replace(profile, job_id=job_id), rows, scored_up_to)
+        return job_id
+
+    job_id = run_write(insert)
+    publish('rankings', job_ids=[job_id], reason='job_created')
+    return job_id
+
+
+def update_job(job_id: int, title: str, description: str) -> None:
+    embedding, model = embed_text(description)
+    requirements = derive_requirements(description)
+    rows, scored_up_to = _score_pool(build_profile(job_id, embedding, requirements, model))
+
+    def update(conn) -> None:
+        cur = conn.execute(
+            '''
+            UPDATE jobs SET title=?, description=?, embedding=?, skills=?, min_years=?, min_edu=?, fts_query=?,
+                embedding_model=?, extractor_version=?, profile_version=profile_version + 1
+            WHERE id=?
+            ''',
+            (
+                title,
+                description,
+                vector_to_blob(embedding),
+                json.dumps(requirements.skills),
+                requirements.min_years,
+                requirements.min_edu,
+                requirements.fts_query,
+                model,
+                EXTRACTOR_VERSION,
+                job_id,
+            ),
+        )
+        if cur.rowcount == 0:
+            raise ValueError(f'job {job_id} not found')
+        # Features computed against the old description are swapped out in the same transaction.
+        version = int(conn.execute('SELECT profile_version FROM jobs WHERE id=?', (job_id,)).fetchone()['profile_version'])
+        profile = build_profile(job_id, embedding, requirements, model, version)
+        store_job_features(conn, profile, rows, scored_up_to)
+        # Any staged reprocess row predates this edit and must not overwrite it.
+        conn.execute('DELETE FROM job_reprocess WHERE job_id=?', (job_id,))
+
+    run_write(update)
+    invalidate_job_profile(job_id)
+    publish('rankings', job_ids=[job_id], reason='job_updated')
@@ -6,18 +6,13 @@ import numpy as np
 
 from ..utils.time import now_iso
 
+# Order matches feature_service.FEATURE_COLUMNS.
+WEIGHT_COLUMNS = ('w_sem', 'w_overlap', 'w_jaccard', 'w_years', 'w_edu', 'w_bm25')
+
 
 def get_weights(conn) -> np.ndarray:
-    row = conn.execute(
-        'SELECT w_sem, w_overlap, w_jaccard, w_years, w_edu FROM model_weights WHERE id=1'
-    ).fetchone()
-    return np.array([
-        float(row['w_sem']),
-        float(row['w_overlap']),
-        float(row['w_jaccard']),
-        float(row['w_years']),
-        float(row['w_edu']),
-    ], dtype=np.float32)
+    row = conn.execute(f'SELECT {", ".join(WEIGHT_COLUMNS)} FROM model_weights WHERE id=1').fetchone()
+    return np.array([float(row[col]) for col in WEIGHT_COLUMNS], dtype=np.float32)
 
 
 def get_hyperparams(conn) -> Tuple[float, float]:
@@ -25,32 +20,25 @@ def get_hyperparams(conn) -> Tuple[float, float]:
     return float(row['lr']), float(row['l2'])
 
 
+def get_weights_version(conn) -> int:
+    return int(conn.execute('SELECT version FROM model_weights WHERE id=1').fetchone()['version'])
+
+
 def set_weights(conn, weights: np.ndarray) -> None:
+    """Store new weights and bump the version clients use to detect the change."""
+    assignments = ', '.join(f'{col}=?' for col in WEIGHT_COLUMNS)
     conn.execute(
-        'UPDATE model_weights SET w_sem=?, w_overlap=?, w_jaccard=?, w_years=?, w_edu=?, updated_at=? WHERE id=1',
-        (
-            float(weights[0]),
-            float(weights[1]),
-            float(weights[2]),
-            float(weights[3]),
-            float(weights[4]),
-            now_iso(),
-        ),
+        f'UPDATE model_weights SET {assignments}, updated_at=?, version=version + 1 WHERE id=1',
+        (*(float(value) for value in weights[: len(WEIGHT_COLUMNS)]), now_iso()),
     )
-    conn.commit()
 
 
 def get_model_payload(conn) -> dict:
     row = conn.execute('SELECT * FROM model_weights WHERE id=1').fetchone()
     return {
-        'weights': [
-            float(row['w_sem']),
-            float(row['w_overlap']),
-            float(row['w_jaccard']),
-            float(row['w_years']),
-            float(row['w_edu']),
-        ],
+        'weights': [float(row[col]) for col in WEIGHT_COLUMNS],
         'lr': float(row['lr']),
         'l2': float(row['l2']),
         'updated_at': row['updated_at'],
+        'version': int(row['version']),
     }
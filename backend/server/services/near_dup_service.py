@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config import NEAR_DUP_POLICY, NEAR_DUP_THRESHOLD
+from ..database import db_connection
+from ..utils.minhash import BANDS, band_keys, blob_to_signature, signature, signature_to_blob, similarity
+from ..write_queue import run_write
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('off', 'link', 'replace', 'reject')
+BACKFILL_BATCH = 500
+
+
+@dataclass
+class NearDuplicate:
+    candidate_id: int  # root of the matched cluster
+    matched_id: int
+    similarity: float
+
+
+class NearDuplicateError(ValueError):
+    """Raised under the ``reject`` policy when an upload nearly matches an existing resume."""
+
+    def __init__(self, match: NearDuplicate) -> None:
+        super().__init__(f'near-duplicate of candidate {match.candidate_id} (similarity {match.similarity:.2f})')
+        self.match = match
+
+
+def near_dup_policy() -> str:
+    return NEAR_DUP_POLICY if NEAR_DUP_POLICY in POLICIES else 'link'
+
+
+def find_near_duplicate(conn, sig: np.ndarray, threshold: float = NEAR_DUP_THRESHOLD) -> Optional[NearDuplicate]:
+    """Best indexed match at or above ``threshold``; only LSH bucket collisions are compared."""
+    keys = band_keys(sig)
+    values = ','.join(['(?, ?)'] * BANDS)
+    params: list = [value for band, bucket in enumerate(keys) for value in (band, bucket)]
+    rows = conn.execute(
+        f'''
+        WITH probe(band, bucket) AS (VALUES {values})
+        SELECT m.candidate_id, m.signature FROM candidate_minhash m
+        WHERE m.candidate_id IN (
+            SELECT b.candidate_id FROM probe p JOIN minhash_bands b ON b.band = p.band AND b.bucket = p.bucket
+        )
+        ''',
+        params,
+    ).fetchall()
+    best_id, best_sim = None, threshold
+    for row in rows:
+        sim = similarity(sig, blob_to_signature(row['signature']))
+        if sim >= best_sim:
+            best_id, best_sim = int(row['candidate_id']), sim
+    if best_id is None:
+        return None
+    root = conn.execute('SELECT COALESCE(duplicate_of, id) AS root FROM candidates WHERE id=?', (best_id,)).fetchone()
+    if root is None:
+        return None
+    return NearDuplicate(candidate_id=int(root['root']), matched_id=best_id, similarity=best_sim)
+
+
+def index_signature(conn, candidate_id: int, sig: np.ndarray) -> None:
+    conn.execute(
+        'INSERT OR REPLACE INTO candidate_minhash (candidate_id, signature) VALUES (?, ?)',
+        (candidate_id, signature_to_blob(sig)),
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO minhash_bands (band, bucket, candidate_id) VALUES (?, ?, ?)',
+        [(band, bucket, candidate_id) for band, bucket in enumerate(band_keys(sig))],
+    )
+
+
+def link_duplicate(conn, candidate_id: int, match: NearDuplicate, policy: str) -> None:
+    """Record ``candidate_id`` in ``match``'s cluster; ``replace`` makes it the new root."""
+    if policy == 'link':
+        conn.execute(
+            'UPDATE candidates SET duplicate_of=?, duplicate_similarity=? WHERE id=?',
+            (match.candidate_id, match.similarity, candidate_id),
+        )
+    elif policy == 'replace':
+        conn.execute(
+            '''
+            UPDATE candidates SET duplicate_of=?,
+                duplicate_similarity=CASE WHEN id=? THEN ? ELSE duplicate_similarity END
+            WHERE id=? OR duplicate_of=?
+            ''',
+            (candidate_id, match.candidate_id, match.similarity, match.candidate_id, match.candidate_id),
+        )
+        # Superseded rows no longer take part in ranking.
+        conn.execute(
+            'DELETE FROM features WHERE candidate_id IN (SELECT id FROM candidates WHERE duplicate_of=?)',
+            (candidate_id,),
+        )
+
+
+def list_clusters(limit: int = 50, offset: int = 0) -> List[Dict]:
+    with db_connection() as conn:
+        roots = conn.execute(
+            '''
+            SELECT r.id, r.full_name, r.email, r.created_at, COUNT(m.id) AS members
+            FROM candidates m JOIN candidates r ON r.id = m.duplicate_of
+            GROUP BY r.id
+            ORDER BY members DESC, r.id
+            LIMIT ? OFFSET ?
+            ''',
+            (limit, offset),
+        ).fetchall()
+        if not roots:
+            return []
+        placeholders = ','.join(['?'] * len(roots))
+        members = conn.execute(
+            f'''
+            SELECT id, full_name, email, created_at, duplicate_of, duplicate_similarity FROM candidates
+            WHERE duplicate_of IN ({placeholders}) ORDER BY id
+            ''',
+            [row['id'] for row in roots],
+        ).fetchall()
+    by_root: Dict[int, List[Dict]] = {}
+    for row in members:
+        by_root.setdefault(int(row['duplicate_of']), []).append(
+            {
+                'candidate_id': int(row['id']),
+                'full_name': row['full_name'],
+                'email': row['email'],
+                'created_at': row['created_at'],
+                'similarity': row['duplicate_similarity'],
+            }
+        )
+    return [
+        {
+            'candidate_id': int(row['id']),
+            'full_name': row['full_name'],
+            'email': row['email'],
+            'created_at': row['created_at'],
+            'members': by_root.get(int(row['id']), []),
+        }
+        for row in roots
+    ]
+
+
+def backfill_signatures() -> int:
+    """Index candidates ingested before near-duplicate detection; existing rows are not re-clustered."""
+    done = 0
+    last_id = 0
+    while True:
+        with db_connection() as conn:
+            rows = conn.execute(
+                '''
+                SELECT c.id, c.text FROM candidates c
+                WHERE c.id > ? AND NOT EXISTS (SELECT 1 FROM candidate_minhash m WHERE m.candidate_id = c.id)
+                ORDER BY c.id LIMIT ?
+                ''',
+                (last_id, BACKFILL_BATCH),
+            ).fetchall()
+        if not rows:
+            return done
+        signatures = [(int(row['id']), signature(row['text'])) for row in rows]
+
+        def index_batch(conn) -> None:
+            for candidate_id, sig in signatures:
+                index_signature(conn, candidate_id, sig)
+
+        run_write(index_batch)
+        done += len(rows)
+        last_id = int(rows[-1]['id'])
+
+
+def start_signature_backfill() -> None:
+    def run() -> None:
+        try:
+            indexed = backfill_signatures()
+        except Exception:
+            logger.exception('minhash backfill failed')
+            return
+        if indexed:
+            logger.info('indexed minhash signatures for %d existing candidates', indexed)
+
+    with db_connection() as conn:
+        missing = conn.execute(
+            'SELECT 1 FROM candidates c WHERE NOT EXISTS (SELECT 1 FROM candidate_minhash m WHERE m.candidate_id = c.id) LIMIT 1'
+        ).fetchone()
+    if missing is not None:
+        threading.Thread(target=run, name='minhash-backfill', daemon=True).start()
@@ -1,71 +1,105 @@
 from __future__ import annotations
 
 import json
-import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 
+from ..config import RANKING_SHARDS
 from ..database import db_connection
-from ..services.feature_service import ensure_features
+from ..profiling import stage
+from ..services.feature_service import FEATURE_COLUMNS, feature_matrix, features_complete, load_feature_rows
 from ..services.model_service import get_weights
-from ..utils.vectors import feature_vector
-
-
-def fetch_rankings(job_id: int, k: int, epsilon: float) -> Dict:
-    with db_connection() as conn:
-        ensure_features(conn, job_id)
-        rows = conn.execute(
-            '''
-            SELECT f.*, c.full_name, c.email, c.phone, c.skills, c.years_exp, c.edu_level
-            FROM features f
-            JOIN candidates c ON c.id = f.candidate_id
-            WHERE f.job_id = ?
-            ''',
-            (job_id,),
-        ).fetchall()
-        weights = get_weights(conn)
+from .candidate_filter import CandidateFilter
+from .exploration import SHARDABLE_STRATEGIES, ExplorationParams, keyed_slate, new_seed, select_slate, slate_id
+from .shard_service import scatter_gather
+
+
+def fetch_rankings(
+    job_id: int,
+    k: int,
+    epsilon: float,
+    strategy: str = 'epsilon',
+    seed: Optional[int] = None,
+    explore_slots: int = 1,
+    temperature: float = 0.1,
+    candidate_filter: Optional[CandidateFilter] = None,
+    columnar: bool = False,
+) -> Dict:
+    """Rank a slate for ``job_id``; ``columnar`` returns parallel per-field arrays instead of row dicts."""
+    params = ExplorationParams(strategy=strategy, epsilon=epsilon, explore_slots=explore_slots, temperature=temperature)
+    if RANKING_SHARDS > 1 and params.strategy in SHARDABLE_STRATEGIES:
+        picked, features, scores, explore, weights, used_seed, complete = _rank_sharded(job_id, k, params, seed, candidate_filter)
+    else:
+        picked, features, scores, explore, weights, used_seed, complete = _rank_local(job_id, k, params, seed, candidate_filter)
+
+    with stage('build_columns'):
+        columns = _build_columns(picked, features, scores, explore)
+
+    data = {
+        'weights': weights.tolist(),
+        'strategy': params.strategy,
+        'seed': used_seed,
+        'slate_id': slate_id(job_id, params.strategy, used_seed, columns['candidate_id']),
+        # False while a backfill or a just-uploaded resume has yet to be scored for this job.
+        'features_complete': complete,
+    }
+    if columnar:
+        data.update(format='columnar', count=len(picked), columns=columns)
+    else:
+        data['candidates'] = rows_from_columns(columns)
+    return data
+
 
-    candidates: List[Dict] = []
-    for row in rows:
-        features = {
-            'sem_sim': float(row['sem_sim']),
-            'skill_overlap': float(row['skill_overlap']),
-            'jaccard': float(row['jaccard']),
-            'years': float(row['years']),
-            'edu': float(row['edu']),
-        }
-        vec = feature_vector(features)
-        score = float(np.dot(weights, vec))
-        candidates.append(
-            {
-                'candidate_id': int(row['candidate_id']),
-                'full_name': row['full_name'],
-                'email': row['email'],
-                'phone': row['phone'],
-                'skills': json.loads(row['skills']),
-                'years_exp': float(row['years_exp']),
-                'edu_level_raw': int(row['edu_level']),
-                **features,
-                'score': score,
-            }
-        )
-
-    explore = False
-    if candidates:
-        rng = random.Random()
-        if len(candidates) > k and rng.random() < max(0.0, min(1.0, epsilon)):
-            explore = True
-            rng.shuffle(candidates)
-            candidates = candidates[:k]
+def _rank_local(job_id: int, k: int, params: ExplorationParams, seed: Optional[int], candidate_filter: Optional[CandidateFilter]):
+    # Features are stored when jobs and candidates are written, so ranking never writes.
+    with db_connection(readonly=True) as conn:
+        with stage('load_features'):
+            rows = load_feature_rows(conn, job_id, candidate_filter)
+            weights = get_weights(conn)
+            complete = features_complete(conn, job_id)
+
+    with stage('select_slate'):
+        matrix = feature_matrix(rows)
+        if params.strategy in SHARDABLE_STRATEGIES:
+            # Keyed by candidate id, so the slate matches the sharded path for the same seed.
+            used_seed = new_seed() if seed is None else seed
+            ids = np.array([int(row['candidate_id']) for row in rows], dtype=np.int64)
+            slate = keyed_slate(matrix, weights, ids, k, params, used_seed)
         else:
-            candidates.sort(key=lambda item: item['score'], reverse=True)
-            candidates = candidates[:k]
+            slate, used_seed = select_slate(matrix, weights, k, params, seed)
+        features = matrix[slate.indices]
+        scores = features @ weights
+    picked = [rows[int(index)] for index in slate.indices]
+    return picked, features, scores, slate.explore, weights, used_seed, complete
+
+
+def _rank_sharded(job_id: int, k: int, params: ExplorationParams, seed: Optional[int], candidate_filter: Optional[CandidateFilter]):
+    """Scatter-gather over candidate id ranges of the stored features."""
+    with db_connection(readonly=True) as conn:
+        weights = get_weights(conn)
+        complete = features_complete(conn, job_id)
+    used_seed = new_seed() if seed is None else seed
+    rows, features, scores, slate = scatter_gather(job_id, weights, params, k, used_seed, candidate_filter)
+    picked = [rows[int(index)] for index in slate.indices]
+    return picked, features[slate.indices], scores[slate.indices], slate.explore, weights, used_seed, complete
 
-    for candidate in candidates:
-        candidate['explore'] = explore
 
+def _build_columns(picked: List, features: np.ndarray, scores: np.ndarray, explore) -> Dict[str, List]:
     return {
-        'weights': weights.tolist(),
-        'candidates': candidates,
+        'candidate_id': [int(row['candidate_id']) for row in picked],
+        'full_name': [row['full_name'] for row in picked],
+        'email': [row['email'] for row in picked],
+        'phone': [row['phone'] for row in picked],
+        'skills': [json.loads(row['skills']) for row in picked],
+        'years_exp': [float(row['years_exp']) for row in picked],
+        'edu_level_raw': [int(row['edu_level']) for row in picked],
+        **{col: features[:, position].tolist() for position, col in enumerate(FEATURE_COLUMNS)},
+        'score': scores.tolist(),
+        'explore': np.asarray(explore, dtype=bool).tolist(),
     }
+
+
+def rows_from_columns(columns: Dict[str, List]) -> List[Dict]:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
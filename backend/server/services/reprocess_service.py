@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..database import db_connection
+from ..embeddings import embed_texts, embedding_model_name
+from ..events import publish
+from ..utils.extraction import EXTRACTOR_VERSION, extract_fields
+from ..utils.time import now_iso
+from ..utils.vectors import vector_to_blob
+from ..write_queue import run_write
+from .feature_service import backfill_features
+from .job_profile_service import clear_job_profiles, derive_requirements
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 256
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+_THREAD: Optional[threading.Thread] = None
+_THREAD_LOCK = threading.Lock()
+
+
+def stamp_unversioned_rows(model: str) -> None:
+    """Attribute rows written before versioning to the currently configured embedder."""
+    with db_connection() as conn:
+        for table in ('candidates', 'jobs'):
+            conn.execute(
+                f'UPDATE {table} SET embedding_model=COALESCE(embedding_model, ?), '
+                'extractor_version=COALESCE(extractor_version, ?) '
+                'WHERE embedding_model IS NULL OR extractor_version IS NULL',
+                (model, EXTRACTOR_VERSION),
+            )
+        conn.commit()
+
+
+def _run_payload(row) -> Dict:
+    return {
+        'run_id': int(row['id']),
+        'embedding_model': row['embedding_model'],
+        'extractor_version': int(row['extractor_version']),
+        'force': bool(row['force']),
+        'status': row['status'],
+        'total': int(row['total']),
+        'processed': int(row['processed']),
+        'error': row['error'],
+        'started_at': row['started_at'],
+        'finished_at': row['finished_at'],
+    }
+
+
+def _stale_clause(table: str) -> str:
+    return f'(? OR {table}.embedding_model IS NOT ? OR {table}.extractor_version IS NOT ?)'
+
+
+def _count_stale(conn, run) -> int:
+    params = (int(run['force']), run['embedding_model'], int(run['extractor_version']))
+    candidates = conn.execute(f'SELECT COUNT(*) AS n FROM candidates WHERE {_stale_clause("candidates")}', params).fetchone()['n']
+    jobs = conn.execute(f'SELECT COUNT(*) AS n FROM jobs WHERE {_stale_clause("jobs")}', params).fetchone()['n']
+    return int(candidates) + int(jobs)
+
+
+def reprocess_status() -> Optional[Dict]:
+    with db_connection() as conn:
+        row = conn.execute('SELECT * FROM reprocess_runs ORDER BY id DESC LIMIT 1').fetchone()
+    return _run_payload(row) if row else None
+
+
+def _open_run(conn, model: str, force: bool):
+    active = conn.execute(
+        'SELECT * FROM reprocess_runs WHERE status=? ORDER BY id DESC LIMIT 1', (STATUS_RUNNING,)
+    ).fetchone()
+    if active is not None and (
+        active['embedding_model'] != model or int(active['extractor_version']) != EXTRACTOR_VERSION
+    ):
+        _finish(conn, int(active['id']), STATUS_CANCELLED, 'superseded by a run with different targets')
+        active = None
+    if active is None:
+        cur = conn.execute(
+            '''
+            INSERT INTO reprocess_runs (embedding_model, extractor_version, force, status, started_at)
+            VALUES (?, ?, ?, ?, ?)
+            ''',
+            (model, EXTRACTOR_VERSION, int(force), STATUS_RUNNING, now_iso()),
+        )
+        run_id = int(cur.lastrowid)
+    else:
+        # A run interrupted by a restart resumes after its last staged rows.
+        run_id = int(active['id'])
+    run = conn.execute('SELECT * FROM reprocess_runs WHERE id=?', (run_id,)).fetchone()
+    conn.execute('UPDATE reprocess_runs SET total=? WHERE id=?', (_count_stale(conn, run), run_id))
+    return conn.execute('SELECT * FROM reprocess_runs WHERE id=?', (run_id,)).fetchone()
+
+
+def start_reprocess(force: bool = False) -> Dict:
+    """Start (or resume) a background run towards the current embedder and extractor versions."""
+    global _THREAD
+    model = embedding_model_name()
+    with _THREAD_LOCK:
+        if _THREAD is not None and _THREAD.is_alive():
+            current = reprocess_status()
+            if current is not None and current['status'] == STATUS_RUNNING:
+                return current
+        run = run_write(lambda conn: _open_run(conn, model, force))
+        run_id = int(run['id'])
+        _THREAD = threading.Thread(target=_run, args=(run_id,), name=f'reprocess-{run_id}', daemon=True)
+        _THREAD.start()
+    return _run_payload(run)
+
+
+def _finish(conn, run_id: int, status: str, error: Optional[str] = None) -> None:
+    conn.execute('DELETE FROM candidate_reprocess WHERE run_id=?', (run_id,))
+    conn.execute('DELETE FROM job_reprocess WHERE run_id=?', (run_id,))
+    conn.execute(
+        'UPDATE reprocess_runs SET status=?, error=?, finished_at=? WHERE id=?',
+        (status, error, now_iso(), run_id),
+    )
+
+
+def _store_staged(conn, run_id: int, sql: str, staged: list) -> None:
+    conn.executemany(sql, staged)
+    conn.execute('UPDATE reprocess_runs SET processed=processed + ? WHERE id=?', (len(staged), run_id))
+
+
+def _embed_for_run(run, texts: List[str]) -> np.ndarray:
+    """Vectors for staging; fails the run if the embedder no longer serves the run's model."""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors, model = embed_texts(texts)
+    if model != run['embedding_model']:
+        raise RuntimeError(f'embedder switched to {model} during a run towards {run["embedding_model"]}; start a new run')
+    return vectors
+
+
+def _stage_candidates(conn, run) -> int:
+    """Stage one batch of stale, not-yet-staged candidates; returns how many were staged."""
+    run_id = int(run['id'])
+    embed = bool(run['force'])
+    rows = conn.execute(
+        f'''
+        SELECT candidates.id, candidates.text, candidates.embedding_model FROM candidates
+        WHERE {_stale_clause("candidates")}
+          AND NOT EXISTS (SELECT 1 FROM candidate_reprocess r WHERE r.run_id=? AND r.candidate_id=candidates.id)
+        ORDER BY candidates.id LIMIT ?
+        ''',
+        (int(run['force']), run['embedding_model'], int(run['extractor_version']), run_id, BATCH_SIZE),
+    ).fetchall()
+    if not rows:
+        return 0
+    fields = [extract_fields(row['text']) for row in rows]
+    needs_embedding = [i for i, row in enumerate(rows) if embed or row['embedding_model'] != run['embedding_model']]
+    vectors = _embed_for_run(run, [rows[i]['text'] for i in needs_embedding])
+    blobs: Dict[int, bytes] = {i: vector_to_blob(vectors[pos]) for pos, i in enumerate(needs_embedding)}
+    staged = [
+        (
+            run_id,
+            int(row['id']),
+            parsed.full_name,
+            parsed.email,
+            parsed.phone,
+            blobs.get(i),
+            parsed.years_exp,
+            parsed.edu_level,
+            json.dumps(parsed.skills),
+        )
+        for i, (row, parsed) in enumerate(zip(rows, fields))
+    ]
+    run_write(
+        lambda writer: _store_staged(
+            writer,
+            run_id,
+            '''
+            INSERT INTO candidate_reprocess
+                (run_id, candidate_id, full_name, email, phone, embedding, years_exp, edu_level, skills)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            staged,
+        )
+    )
+    return len(rows)
+
+
+def _stage_jobs(conn, run) -> int:
+    run_id = int(run['id'])
+    rows = conn.execute(
+        f'''
+        SELECT jobs.id, jobs.description, jobs.embedding_model FROM jobs
+        WHERE {_stale_clause("jobs")}
+          AND NOT EXISTS (SELECT 1 FROM job_reprocess r WHERE r.run_id=? AND r.job_id=jobs.id)
+        ORDER BY jobs.id LIMIT ?
+        ''',
+        (int(run['force']), run['embedding_model'], int(run['extractor_version']), run_id, BATCH_SIZE),
+    ).fetchall()
+    if not rows:
+        return 0
+    needs_embedding = [i for i, row in enumerate(rows) if run['force'] or row['embedding_model'] != run['embedding_model']]
+    vectors = _embed_for_run(run, [rows[i]['description'] for i in needs_embedding])
+    blobs: Dict[int, bytes] = {i: vector_to_blob(vectors[pos]) for pos, i in enumerate(needs_embedding)}
+    staged = []
+    for i, row in enumerate(rows):
+        requirements = derive_requirements(row['description'])
+        staged.append(
+            (
+                run_id,
+                int(row['id']),
+                blobs.get(i),
+                json.dumps(requirements.skills),
+                requirements.min_years,
+                requirements.min_edu,
+                requirements.fts_query,
+            )
+        )
+    run_write(
+        lambda writer: _store_staged(
+            writer,
+            run_id,
+            'INSERT INTO job_reprocess (run_id, job_id, embedding, skills, min_years, min_edu, fts_query) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            staged,
+        )
+    )
+    return len(rows)
+
+
+def _flip(conn, run) -> None:
+    """Swap every staged row into place in one transaction so readers never see a mix."""
+    run_id = int(run['id'])
+    model = run['embedding_model']
+    version = int(run['extractor_version'])
+    conn.execute(
+        '''
+        UPDATE candidates SET
+            full_name=r.full_name, email=r.email, phone=r.phone,
+            embedding=COALESCE(r.embedding, candidates.embedding),
+            years_exp=r.years_exp, edu_level=r.edu_level, skills=r.skills,
+            embedding_model=?, extractor_version=?
+        FROM candidate_reprocess r
+        WHERE r.run_id=? AND r.candidate_id=candidates.id
+        ''',
+        (model, version, run_id),
+    )
+    conn.execute(
+        'DELETE FROM candidate_skills WHERE candidate_id IN (SELECT candidate_id FROM candidate_reprocess WHERE run_id=?)',
+        (run_id,),
+    )
+    conn.execute(
+        '''
+        INSERT OR IGNORE INTO candidate_skills (skill, candidate_id)
+        SELECT j.value, r.candidate_id FROM candidate_reprocess r, json_each(r.skills) j WHERE r.run_id=?
+        ''',
+        (run_id,),
+    )
+    conn.execute(
+        '''
+        UPDATE jobs SET
+            embedding=COALESCE(r.embedding, jobs.embedding),
+            skills=r.skills, min_years=r.min_years, min_edu=r.min_edu, fts_query=r.fts_query,
+            embedding_model=?, extractor_version=?, profile_version=jobs.profile_version + 1
+        FROM job_reprocess r
+        WHERE r.run_id=? AND r.job_id=jobs.id
+        ''',
+        (model, version, run_id),
+    )
+    conn.execute('DELETE FROM features WHERE candidate_id IN (SELECT candidate_id FROM candidate_reprocess WHERE run_id=?)', (run_id,))
+    conn.execute('DELETE FROM features WHERE job_id IN (SELECT job_id FROM job_reprocess WHERE run_id=?)', (run_id,))
+    # Pull coverage back below the dropped rows so the backfill after the flip rescores them.
+    conn.execute(
+        '''
+        UPDATE jobs SET features_scored_up_to = MIN(
+            features_scored_up_to, (SELECT MIN(candidate_id) - 1 FROM candidate_reprocess WHERE run_id=?)
+        )
+        WHERE EXISTS (SELECT 1 FROM candidate_reprocess WHERE run_id=?)
+        ''',
+        (run_id, run_id),
+    )
+    conn.execute(
+        'UPDATE jobs SET features_version=0, features_scored_up_to=0 WHERE id IN (SELECT job_id FROM job_reprocess WHERE run_id=?)',
+        (run_id,),
+    )
+    conn.execute('DELETE FROM candidate_reprocess WHERE run_id=?', (run_id,))
+    conn.execute('DELETE FROM job_reprocess WHERE run_id=?', (run_id,))
+
+
+def _run(run_id: int) -> None:
+    try:
+        with db_connection() as conn:
+            run = conn.execute('SELECT * FROM reprocess_runs WHERE id=?', (run_id,)).fetchone()
+            # Bounded batches: at most BATCH_SIZE texts and vectors are held at once.
+            while _stage_candidates(conn, run) or _stage_jobs(conn, run):
+                pass
+        run_write(lambda writer: _flip(writer, run))
+        clear_job_profiles()
+        # The flip dropped the affected features; the run completes once they are stored again.
+        backfill_features()
+        run_write(lambda writer: _finish(writer, run_id, STATUS_COMPLETED))
+        publish('rankings', job_ids=None, reason='reprocess')
+        logger.info('reprocess run %d completed', run_id)
+    except Exception as exc:
+        logger.exception('reprocess run %d failed', run_id)
+        run_write(lambda writer: _finish(writer, run_id, STATUS_FAILED, str(exc)))
@@ -1,93 +1,242 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
-import os
-import re
-import time
-from typing import Dict
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
+import numpy as np
 from werkzeug.datastructures import FileStorage
 
-from ..config import MAX_FILE_SIZE_BYTES, UPLOAD_DIR
+from ..admission import admit
+from ..config import MAX_FILE_SIZE_BYTES
 from ..database import db_connection
 from ..embeddings import embed_text
-from ..utils.extraction import (
-    extract_contact,
-    extract_edu_level,
-    extract_name,
-    extract_skills,
-    extract_years,
-    read_pdf_text,
-)
+from ..events import publish
+from ..utils.extraction import EXTRACTOR_VERSION, ParsedResume, parse_resume
+from ..utils.minhash import signature
+from ..utils.storage import discard_content, store_content
 from ..utils.time import now_iso
 from ..utils.vectors import vector_to_blob
+from ..write_queue import run_write
+from .feature_service import jobs_ranking_candidate, score_candidate, store_candidate_features
+from .near_dup_service import (
+    NearDuplicate,
+    NearDuplicateError,
+    find_near_duplicate,
+    index_signature,
+    link_duplicate,
+    near_dup_policy,
+)
 
 ALLOWED_MIME_TYPES = {'application/pdf', 'application/x-pdf', 'binary/octet-stream'}
+READ_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class UploadBuffer:
+    filename: str
+    data: bytes
+    sha256: str
 
 
-def validate_file(storage: FileStorage) -> None:
+def read_upload(storage: FileStorage) -> UploadBuffer:
+    """Drain the upload into memory, enforcing the size limit and hashing as it streams."""
     if storage.mimetype not in ALLOWED_MIME_TYPES:
         raise ValueError('only PDF files are accepted')
-    stream = storage.stream
-    stream.seek(0, os.SEEK_END)
-    size = stream.tell()
-    stream.seek(0)
-    if size > MAX_FILE_SIZE_BYTES:
-        raise ValueError('file too large (10MB limit)')
+    hasher = hashlib.sha256()
+    buffer = io.BytesIO()
+    size = 0
+    while True:
+        chunk = storage.stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > MAX_FILE_SIZE_BYTES:
+            raise ValueError('file too large (10MB limit)')
+        hasher.update(chunk)
+        buffer.write(chunk)
+    return UploadBuffer(filename=storage.filename or 'resume.pdf', data=buffer.getvalue(), sha256=hasher.hexdigest())
 
 
-def _persist_file(storage: FileStorage) -> str:
-    timestamp = int(time.time() * 1000)
-    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', storage.filename or 'resume.pdf')
-    filename = f'{timestamp}_{safe_name}'
-    path = UPLOAD_DIR / filename
-    storage.save(path)
-    return str(path)
+def _candidate_payload(row: sqlite3.Row, duplicate: bool) -> Dict:
+    return {
+        'candidate_id': int(row['id']),
+        'full_name': row['full_name'],
+        'email': row['email'],
+        'phone': row['phone'],
+        'skills': json.loads(row['skills']),
+        'years_exp': float(row['years_exp']),
+        'edu_level': int(row['edu_level']),
+        'content_hash': row['content_hash'],
+        'duplicate': duplicate,
+        'near_duplicate': _near_duplicate_payload(row['duplicate_of'], row['duplicate_similarity']),
+    }
 
 
-def ingest_resume(storage: FileStorage) -> Dict:
-    validate_file(storage)
-    path = _persist_file(storage)
-    text = read_pdf_text(path)
-    if not text.strip():
-        os.remove(path)
-        raise ValueError('could not extract text from PDF')
-
-    email, phone = extract_contact(text)
-    full_name = extract_name(text)
-    years_exp = extract_years(text)
-    edu_level = extract_edu_level(text)
-    skills = extract_skills(text)
-    embedding = embed_text(text)
+def _near_duplicate_payload(
+    candidate_id: Optional[int], similarity: Optional[float], action: str = 'link'
+) -> Optional[Dict]:
+    """``link``: this resume is represented by ``candidate_id``; ``replace``: it superseded ``candidate_id``."""
+    if candidate_id is None:
+        return None
+    return {'candidate_id': int(candidate_id), 'similarity': similarity, 'action': action}
+
+
+def find_by_content_hash(conn: sqlite3.Connection, digest: str) -> Optional[sqlite3.Row]:
+    return conn.execute('SELECT * FROM candidates WHERE content_hash=?', (digest,)).fetchone()
+
+
+def release_content(conn: sqlite3.Connection, digest: str) -> None:
+    """Delete the stored upload for ``digest`` unless a candidate references it.
+
+    Run on the writer (or inside the caller's write transaction) so a
+    concurrent insert of the same bytes cannot slip in between the check and the unlink.
+    """
+    if find_by_content_hash(conn, digest) is None:
+        discard_content(digest)
+
+
+def insert_candidate(
+    conn: sqlite3.Connection,
+    parsed: ParsedResume,
+    embedding: np.ndarray,
+    embedding_model: str,
+    pdf_path: str,
+    content_hash: str,
+) -> int:
+    """Insert a parsed resume and its skill postings; the caller owns the transaction.
 
+    ``embedding_model`` must be the name returned with ``embedding`` by the embedder.
+    """
+    cursor = conn.execute(
+        '''
+        INSERT INTO candidates (
+            full_name, email, phone, pdf_path, text, embedding, years_exp, edu_level, skills, created_at, content_hash,
+            embedding_model, extractor_version
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        (
+            parsed.full_name,
+            parsed.email,
+            parsed.phone,
+            pdf_path,
+            parsed.text,
+            vector_to_blob(embedding),
+            parsed.years_exp,
+            parsed.edu_level,
+            json.dumps(parsed.skills),
+            now_iso(),
+            content_hash,
+            embedding_model,
+            EXTRACTOR_VERSION,
+        ),
+    )
+    candidate_id = int(cursor.lastrowid)
+    conn.executemany(
+        'INSERT OR IGNORE INTO candidate_skills (skill, candidate_id) VALUES (?, ?)',
+        [(skill, candidate_id) for skill in parsed.skills],
+    )
+    return candidate_id
+
+
+def register_candidate(
+    conn: sqlite3.Connection,
+    parsed: ParsedResume,
+    embedding: np.ndarray,
+    embedding_model: str,
+    pdf_path: str,
+    content_hash: str,
+    sig: np.ndarray,
+) -> Tuple[int, Optional[NearDuplicate]]:
+    """Insert a resume under the near-duplicate policy; the caller owns the transaction.
+
+    Features are stored after the commit (:func:`score_new_candidate`).
+    """
+    policy = near_dup_policy()
+    match = find_near_duplicate(conn, sig) if policy != 'off' else None
+    if match is not None and policy == 'reject':
+        raise NearDuplicateError(match)
+    candidate_id = insert_candidate(conn, parsed, embedding, embedding_model, pdf_path, content_hash)
+    if match is not None:
+        link_duplicate(conn, candidate_id, match, policy)
+    index_signature(conn, candidate_id, sig)
+    return candidate_id, match
+
+
+def score_new_candidate(candidate_id: int) -> None:
+    """Store features for a committed candidate against every job.
+
+    Scoring runs on a read-only connection so the writer is only held for the
+    upsert; until then the candidate is not ranked.
+    """
+    with db_connection(readonly=True) as conn:
+        scored = score_candidate(conn, candidate_id)
+    run_write(lambda conn: store_candidate_features(conn, candidate_id, scored))
+
+
+def ingest_resume(storage: FileStorage) -> Dict:
+    upload = read_upload(storage)
     with db_connection() as conn:
-        cursor = conn.execute(
-            '''
-            INSERT INTO candidates (full_name, email, phone, pdf_path, text, embedding, years_exp, edu_level, skills, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''',
-            (
-                full_name,
-                email,
-                phone,
-                path,
-                text,
-                vector_to_blob(embedding),
-                years_exp,
-                edu_level,
-                json.dumps(skills),
-                now_iso(),
-            ),
+        existing = find_by_content_hash(conn, upload.sha256)
+    if existing is not None:
+        return _candidate_payload(existing, duplicate=True)
+
+    # Parsing and inference are the expensive stages; bound how many run at once.
+    with admit('ingest'):
+        parsed = parse_resume(upload.data)
+        if parsed is None:
+            raise ValueError('could not extract text from PDF')
+        sig = signature(parsed.text)
+        if near_dup_policy() == 'reject':
+            # Fail before paying for the embedding; the writer re-checks to close the race.
+            with db_connection() as conn:
+                match = find_near_duplicate(conn, sig)
+            if match is not None:
+                raise NearDuplicateError(match)
+        embedding, embedding_model = embed_text(parsed.text)
+    path = store_content(upload.sha256, upload.data)
+
+    try:
+        candidate_id, match = run_write(
+            lambda conn: register_candidate(conn, parsed, embedding, embedding_model, str(path), upload.sha256, sig)
         )
-        conn.commit()
-        candidate_id = int(cursor.lastrowid)
+    except NearDuplicateError:
+        # Rejected by the writer's re-check: the stored copy belongs to no candidate.
+        run_write(lambda conn: release_content(conn, upload.sha256))
+        raise
+    except sqlite3.IntegrityError:
+        # A concurrent upload of the same bytes won the race.
+        with db_connection() as conn:
+            existing = find_by_content_hash(conn, upload.sha256)
+        if existing is None:
+            raise
+        return _candidate_payload(existing, duplicate=True)
 
+    score_new_candidate(candidate_id)
+    near_duplicate = _near_duplicate_payload(match.candidate_id, match.similarity, near_dup_policy()) if match else None
+    _announce_candidate(candidate_id, parsed.full_name, near_duplicate)
     return {
         'candidate_id': candidate_id,
-        'full_name': full_name,
-        'email': email,
-        'phone': phone,
-        'skills': skills,
-        'years_exp': years_exp,
-        'edu_level': edu_level,
+        'full_name': parsed.full_name,
+        'email': parsed.email,
+        'phone': parsed.phone,
+        'skills': parsed.skills,
+        'years_exp': parsed.years_exp,
+        'edu_level': parsed.edu_level,
+        'content_hash': upload.sha256,
+        'duplicate': False,
+        'near_duplicate': near_duplicate,
     }
+
+
+def _announce_candidate(candidate_id: int, full_name: str, near_duplicate: Optional[Dict]) -> None:
+    with db_connection(readonly=True) as conn:
+        job_ids = jobs_ranking_candidate(conn, candidate_id)
+    publish('candidate', candidate_id=candidate_id, full_name=full_name, near_duplicate=near_duplicate)
+    if job_ids:
+        # Linked near-duplicates are not ranked, so they invalidate nothing.
+        publish('rankings', job_ids=job_ids, reason='candidate')
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Dict, List, Optional
+
+from ..database import db_connection
+from .candidate_filter import CandidateFilter
+
+
+def bm25_scores(conn, match_query: str, candidate_filter: Optional[CandidateFilter] = None) -> Dict[int, float]:
+    """Raw BM25 relevance (higher is better) for every candidate matching ``match_query``."""
+    if not match_query:
+        return {}
+    candidate_filter = candidate_filter or CandidateFilter()
+    where, params = candidate_filter.where_clause('c')
+    rowid_range, range_params = '', []
+    if candidate_filter.id_range is not None:
+        # Lets FTS5 skip posting-list entries outside the range instead of joining them away.
+        rowid_range, range_params = 'AND candidates_fts.rowid BETWEEN ? AND ?', list(candidate_filter.id_range)
+    rows = conn.execute(
+        f'''
+        SELECT candidates_fts.rowid AS candidate_id, -bm25(candidates_fts) AS score
+        FROM candidates_fts
+        JOIN candidates c ON c.id = candidates_fts.rowid
+        WHERE candidates_fts MATCH ? {rowid_range} AND {where}
+        ''',
+        (match_query, *range_params, *params),
+    ).fetchall()
+    return {int(row['candidate_id']): float(row['score']) for row in rows}
+
+
+def search_candidates(query: str, limit: int = 20) -> List[Dict]:
+    if not query.strip():
+        raise ValueError('q must not be empty')
+    with db_connection() as conn:
+        try:
+            rows = conn.execute(
+                '''
+                SELECT c.id, c.full_name, c.email, c.skills, c.years_exp, c.edu_level,
+                       -bm25(candidates_fts) AS bm25,
+                       snippet(candidates_fts, 0, '[', ']', '…', 12) AS snippet
+                FROM candidates_fts
+                JOIN candidates c ON c.id = candidates_fts.rowid
+                WHERE candidates_fts MATCH ?
+                ORDER BY bm25(candidates_fts)
+                LIMIT ?
+                ''',
+                (query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as exc:
+            raise ValueError(f'invalid search query: {exc}') from exc
+    return [
+        {
+            'candidate_id': int(row['id']),
+            'full_name': row['full_name'],
+            'email': row['email'],
+            'skills': json.loads(row['skills']),
+            'years_exp': float(row['years_exp']),
+            'edu_level': int(row['edu_level']),
+            'bm25': float(row['bm25']),
+            'snippet': row['snippet'],
+        }
+        for row in rows
+    ]
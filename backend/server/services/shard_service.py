@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import RANKING_SHARD_WORKERS, RANKING_SHARDS
+from ..database import db_connection
+from ..profiling import clear_active_profile, stage
+from .candidate_filter import CandidateFilter
+from .exploration import ExplorationParams, KeyPlan, Slate, merge_slate, plan_keys, shard_keys, top_k_indices
+from .feature_service import FEATURE_COLUMNS, feature_matrix, load_feature_rows
+
+
+@dataclass
+class ShardTask:
+    shard: int
+    id_range: Tuple[int, int]
+    job_id: int
+    candidate_filter: CandidateFilter
+    weights: np.ndarray
+    plan: KeyPlan
+    k: int
+
+
+@dataclass
+class ShardResult:
+    """A shard's local top-k by score and by selection key, with everything needed to display them."""
+
+    pool_size: int
+    rows: List[Dict]
+    features: np.ndarray
+    scores: np.ndarray
+    keys: np.ndarray
+
+
+def shard_ranges(conn, shards: int) -> List[Tuple[int, int]]:
+    """Split the candidate id space into ``shards`` contiguous, non-empty ranges."""
+    row = conn.execute('SELECT MIN(id) AS lo, MAX(id) AS hi FROM candidates').fetchone()
+    if row['lo'] is None:
+        return []
+    lo, hi = int(row['lo']), int(row['hi'])
+    step = -(-(hi - lo + 1) // max(1, shards))
+    return [(start, min(hi, start + step - 1)) for start in range(lo, hi + 1, step)]
+
+
+def rank_shard(task: ShardTask) -> ShardResult:
+    """Score one id range of the job's stored features and keep its local candidates for the gather step."""
+    shard_filter = replace(task.candidate_filter, id_range=task.id_range)
+    with db_connection(readonly=True) as conn:
+        rows = load_feature_rows(conn, task.job_id, shard_filter)
+    matrix = feature_matrix(rows)
+    scores = matrix @ task.weights
+    ids = np.array([int(row['candidate_id']) for row in rows], dtype=np.int64)
+    keys = shard_keys(task.plan, matrix, scores, ids)
+    local = np.union1d(top_k_indices(scores, task.k), top_k_indices(keys, task.k))
+    return ShardResult(
+        pool_size=len(rows),
+        rows=[dict(rows[int(index)]) for index in local],
+        features=matrix[local],
+        scores=scores[local],
+        keys=keys[local],
+    )
+
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _init_worker() -> None:
+    # A worker forked while a request was being profiled must not keep its profiler.
+    clear_active_profile()
+    sys.setprofile(None)
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=RANKING_SHARD_WORKERS, initializer=_init_worker)
+        return _EXECUTOR
+
+
+def start_shard_pool() -> None:
+    """Start the shard workers up front so the first ranking does not pay for them."""
+    if RANKING_SHARDS > 1 and RANKING_SHARD_WORKERS > 0:
+        executor = _executor()
+        list(executor.map(_noop, range(RANKING_SHARD_WORKERS)))
+
+
+def _noop(_index: int) -> None:
+    return None
+
+
+def _run(tasks: List[ShardTask]) -> List[ShardResult]:
+    global _EXECUTOR
+    if RANKING_SHARD_WORKERS <= 0 or len(tasks) <= 1:
+        return [rank_shard(task) for task in tasks]
+    try:
+        return list(_executor().map(rank_shard, tasks))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); the next request gets a fresh pool.
+        with _EXECUTOR_LOCK:
+            _EXECUTOR = None
+        raise
+
+
+def scatter_gather(
+    job_id: int,
+    weights: np.ndarray,
+    params: ExplorationParams,
+    k: int,
+    seed: int,
+    candidate_filter: Optional[CandidateFilter] = None,
+) -> Tuple[List[Dict], np.ndarray, np.ndarray, Slate]:
+    """Rank each shard in the pool and merge the local top-k lists into one slate.
+
+    Returns the gathered rows, their features and scores, and the slate indexing into them.
+    """
+    with db_connection(readonly=True) as conn:
+        ranges = shard_ranges(conn, RANKING_SHARDS)
+    rng = np.random.default_rng(seed)
+    plan = plan_keys(params, weights, rng, seed)
+    tasks = [
+        ShardTask(
+            shard=shard,
+            id_range=id_range,
+            job_id=job_id,
+            candidate_filter=candidate_filter or CandidateFilter(),
+            weights=weights,
+            plan=plan,
+            k=k,
+        )
+        for shard, id_range in enumerate(ranges)
+    ]
+    with stage('scatter'):
+        results = _run(tasks) if k > 0 else []
+    with stage('gather'):
+        rows = [row for result in results for row in result.rows]
+        features = (
+            np.concatenate([result.features for result in results])
+            if results
+            else np.zeros((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+        )
+        scores = np.concatenate([result.scores for result in results]) if results else np.zeros(0, dtype=np.float32)
+        keys = np.concatenate([result.keys for result in results]) if results else np.zeros(0, dtype=np.float32)
+        pool_size = sum(result.pool_size for result in results)
+        slate = merge_slate(plan, params, scores, keys, pool_size, k, rng)
+    return rows, features, scores, slate
@@ -0,0 +1,342 @@
+"""Binary snapshots of the corpus, jobs, features, feedback and model.
+
+A snapshot is a directory holding ``manifest.json`` and one or more ``.npz``
+parts per table. Each part stores a table's rows column by column:
+
+- INTEGER and REAL columns become int64 / float64 arrays.
+- TEXT and BLOB columns become one contiguous byte buffer plus an offsets
+  array.
+- Vector columns (embeddings, MinHash signatures) of uniform width become an
+  ``(n, dim)`` matrix.
+- Nullable columns carry a ``<name>.null`` mask.
+
+Import verifies every part before touching the database, then loads the whole
+snapshot in one transaction, so a failed import leaves the database as it was.
+Columns are matched by name, so a snapshot taken before a column migration
+still loads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import UPLOAD_DIR
+from ..database import db_connection
+from ..utils.storage import upload_name
+from ..utils.time import now_iso
+from .job_profile_service import clear_job_profiles
+
+FORMAT = 'resume-selector-snapshot'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+PART_ROWS = 100_000
+
+# Load order respects references; derived state (FTS) is rebuilt instead of copied.
+TABLES = (
+    'model_weights',
+    'candidates',
+    'candidate_skills',
+    'candidate_minhash',
+    'minhash_bands',
+    'jobs',
+    'features',
+    'pairwise_prefs',
+)
+# Cleared on --replace because they refer to ids in the old corpus.
+STALE_TABLES = ('import_checkpoints', 'candidate_reprocess', 'job_reprocess', 'reprocess_runs')
+VECTOR_COLUMNS = {
+    ('candidates', 'embedding'): np.dtype('<f4'),
+    ('jobs', 'embedding'): np.dtype('<f4'),
+    ('candidate_minhash', 'signature'): np.dtype('<u4'),
+    ('features', 'packed'): np.dtype('<f4'),
+}
+FTS_TRIGGERS = ('candidates_fts_ai', 'candidates_fts_ad', 'candidates_fts_au')
+
+
+@dataclass
+class SnapshotSummary:
+    path: str
+    tables: Dict[str, int] = field(default_factory=dict)
+    uploads: int = 0
+    bytes: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(self.tables.values())
+
+
+Progress = Callable[[str, int], None]
+
+
+def _columns(conn, table: str) -> List[Dict]:
+    return [
+        {'name': row['name'], 'type': (row['type'] or '').upper(), 'notnull': bool(row['notnull']), 'default': row['dflt_value']}
+        for row in conn.execute(f'PRAGMA table_info({table})')
+    ]
+
+
+def _encode_column(table: str, column: Dict, values: Sequence) -> Dict[str, np.ndarray]:
+    name = column['name']
+    nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    arrays: Dict[str, np.ndarray] = {}
+    if nulls.any():
+        arrays[f'{name}.null'] = nulls
+    if column['type'].startswith('INT'):
+        arrays[name] = np.array([0 if value is None else value for value in values], dtype=np.int64)
+    elif column['type'] in ('REAL', 'FLOAT', 'DOUBLE'):
+        arrays[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    else:
+        raw = [b'' if value is None else value.encode('utf-8') if isinstance(value, str) else bytes(value) for value in values]
+        dtype = VECTOR_COLUMNS.get((table, name))
+        widths = {len(item) for item in raw}
+        if dtype is not None and not nulls.any() and len(widths) == 1 and raw and len(raw[0]) % dtype.itemsize == 0:
+            arrays[name] = np.frombuffer(b''.join(raw), dtype=dtype).reshape(len(raw), -1)
+        else:
+            arrays[name] = np.frombuffer(b''.join(raw), dtype=np.uint8)
+            arrays[f'{name}.offsets'] = np.cumsum([0] + [len(item) for item in raw], dtype=np.int64)
+    return arrays
+
+
+def _decode_column(column: Dict, arrays, count: int) -> List:
+    name = column['name']
+    data = arrays[name]
+    if f'{name}.offsets' in arrays:
+        offsets = arrays[f'{name}.offsets']
+        buffer = data.tobytes()
+        values = [buffer[offsets[i]:offsets[i + 1]] for i in range(count)]
+        if column['type'] == 'TEXT':
+            values = [value.decode('utf-8') for value in values]
+    elif data.ndim == 2:
+        values = [row.tobytes() for row in data]
+    else:
+        values = data.tolist()
+    if f'{name}.null' in arrays:
+        values = [None if null else value for value, null in zip(values, arrays[f'{name}.null'].tolist())]
+    return values
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_snapshot(
+    dest: Path,
+    include_uploads: bool = False,
+    compress: bool = False,
+    part_rows: int = PART_ROWS,
+    progress: Optional[Progress] = None,
+) -> SnapshotSummary:
+    """Write every table in ``TABLES`` to ``dest`` from one consistent read snapshot."""
+    started = time.perf_counter()
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    if (dest / MANIFEST).exists():
+        raise ValueError(f'{dest} already holds a snapshot')
+    summary = SnapshotSummary(path=str(dest))
+    save = np.savez_compressed if compress else np.savez
+    manifest: Dict = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'created_at': now_iso(),
+        'upload_dir': str(UPLOAD_DIR.resolve()),
+        'tables': {},
+    }
+
+    with db_connection(readonly=True) as conn:
+        # One read transaction: under WAL every table is read as of the same commit.
+        conn.execute('BEGIN')
+        for table in TABLES:
+            columns = _columns(conn, table)
+            names = [column['name'] for column in columns]
+            cursor = conn.execute(f'SELECT {", ".join(names)} FROM {table}')
+            parts = []
+            total = 0
+            while True:
+                rows = cursor.fetchmany(max(1, part_rows))
+                if not rows and parts:
+                    break
+                # An empty table still gets one (empty) part so its schema travels.
+                arrays: Dict[str, np.ndarray] = {}
+                for index, column in enumerate(columns):
+                    arrays.update(_encode_column(table, column, [row[index] for row in rows]))
+                path = dest / f'{table}-{len(parts):05d}.npz'
+                save(path, **arrays)
+                parts.append({'file': path.name, 'rows': len(rows), 'sha256': _sha256(path)})
+                summary.bytes += path.stat().st_size
+                total += len(rows)
+                if progress:
+                    progress(table, total)
+                if len(rows) < max(1, part_rows):
+                    break
+            manifest['tables'][table] = {'columns': columns, 'rows': total, 'parts': parts}
+            summary.tables[table] = total
+        models = conn.execute('SELECT DISTINCT embedding_model FROM candidates').fetchall()
+        manifest['embedding_models'] = sorted(str(row['embedding_model']) for row in models)
+        pdf_paths = [row['pdf_path'] for row in conn.execute('SELECT pdf_path FROM candidates')] if include_uploads else []
+        conn.rollback()
+
+    for pdf_path in pdf_paths:
+        try:
+            name = upload_name(Path(pdf_path))
+        except ValueError:
+            continue  # stored outside the upload directory
+        target = dest / 'uploads' / name
+        if Path(pdf_path).exists() and not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(pdf_path, target)
+            summary.uploads += 1
+            summary.bytes += target.stat().st_size
+    manifest['uploads'] = summary.uploads
+
+    (dest / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    summary.elapsed_s = time.perf_counter() - started
+    return summary
+
+
+def read_manifest(src: Path) -> Dict:
+    path = Path(src) / MANIFEST
+    if not path.exists():
+        raise ValueError(f'{src} is not a snapshot (no {MANIFEST})')
+    manifest = json.loads(path.read_text())
+    if manifest.get('format') != FORMAT or int(manifest.get('version', 0)) > FORMAT_VERSION:
+        raise ValueError(f'unsupported snapshot format {manifest.get("format")} v{manifest.get("version")}')
+    return manifest
+
+
+def _shared_columns(conn, table: str, snapshot_columns: List[Dict]) -> List[str]:
+    """Columns present in both the snapshot and this database; fails if a required column is missing."""
+    available = {column['name'] for column in snapshot_columns}
+    shared = []
+    for column in _columns(conn, table):
+        if column['name'] in available:
+            shared.append(column['name'])
+        elif column['notnull'] and column['default'] is None:
+            raise ValueError(f'snapshot has no values for required column {table}.{column["name"]}')
+    return shared
+
+
+def _legacy_features(table: str, spec: Dict) -> bool:
+    # Snapshots from before packed features are skipped; startup backfill recomputes them.
+    return table == 'features' and 'packed' not in {column['name'] for column in spec['columns']}
+
+
+def _rebase_upload(path: str, source_dir: Path) -> str:
+    try:
+        return str(UPLOAD_DIR / Path(path).relative_to(source_dir))
+    except ValueError:
+        return path
+
+
+def _verify_parts(src: Path, tables: Sequence[str], manifest: Dict) -> None:
+    for table in tables:
+        for part in manifest['tables'][table]['parts']:
+            path = src / part['file']
+            if not path.exists():
+                raise ValueError(f'{part["file"]} is missing from the snapshot')
+            if _sha256(path) != part['sha256']:
+                raise ValueError(f'{part["file"]} does not match its manifest checksum')
+
+
+def _iter_parts(src: Path, spec: Dict) -> Iterator[Tuple[Dict, object]]:
+    for part in spec['parts']:
+        with np.load(src / part['file'], allow_pickle=False) as arrays:
+            yield part, arrays
+
+
+def import_snapshot(
+    src: Path,
+    replace: bool = False,
+    verify: bool = True,
+    progress: Optional[Progress] = None,
+) -> SnapshotSummary:
+    """Bulk-load a snapshot into this database in a single transaction.
+
+    The database must hold no candidates or jobs unless ``replace`` is set, in
+    which case the current corpus, jobs, features, feedback and migration
+    state are deleted first. Part checksums and column compatibility are
+    checked before anything is deleted, and any later failure rolls the whole
+    import back. Run it with the server stopped.
+    """
+    started = time.perf_counter()
+    src = Path(src)
+    manifest = read_manifest(src)
+    summary = SnapshotSummary(path=str(src))
+    source_upload_dir = Path(manifest['upload_dir'])
+
+    with db_connection() as conn:
+        conn.execute('PRAGMA synchronous = NORMAL')
+        occupied = conn.execute('SELECT (SELECT COUNT(*) FROM candidates) + (SELECT COUNT(*) FROM jobs) AS n').fetchone()['n']
+        if occupied and not replace:
+            raise ValueError('database already holds candidates or jobs; import with replace to overwrite them')
+        plans = {
+            table: _shared_columns(conn, table, spec['columns'])
+            for table, spec in manifest['tables'].items()
+            if table in TABLES and not _legacy_features(table, spec)
+        }
+        if verify:
+            _verify_parts(src, list(plans), manifest)
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # The full-text index is rebuilt once at the end rather than row by row.
+            triggers = [
+                row['sql']
+                for row in conn.execute(
+                    f"SELECT sql FROM sqlite_master WHERE type='trigger' AND name IN ({', '.join('?' for _ in FTS_TRIGGERS)})",
+                    FTS_TRIGGERS,
+                )
+            ]
+            for trigger in FTS_TRIGGERS:
+                conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            conn.execute("INSERT INTO candidates_fts(candidates_fts) VALUES ('delete-all')")
+            for table in (*TABLES, *STALE_TABLES):
+                conn.execute(f'DELETE FROM {table}')
+
+            for table, names in plans.items():
+                spec = manifest['tables'][table]
+                types = {column['name']: column for column in spec['columns']}
+                sql = f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join("?" for _ in names)})'
+                loaded = 0
+                for part, arrays in _iter_parts(src, spec):
+                    columns = [_decode_column(types[name], arrays, part['rows']) for name in names]
+                    if table == 'candidates' and 'pdf_path' in names:
+                        index = names.index('pdf_path')
+                        columns[index] = [_rebase_upload(path, source_upload_dir) for path in columns[index]]
+                    conn.executemany(sql, zip(*columns))
+                    loaded += part['rows']
+                    if progress:
+                        progress(table, loaded)
+                summary.tables[table] = loaded
+
+            conn.execute("INSERT INTO candidates_fts(candidates_fts) VALUES ('rebuild')")
+            for trigger_sql in triggers:
+                conn.execute(trigger_sql)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    uploads = src / 'uploads'
+    if uploads.is_dir():
+        for path in uploads.rglob('*.pdf'):
+            target = UPLOAD_DIR / path.relative_to(uploads)
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(path, target)
+                summary.uploads += 1
+    clear_job_profiles()
+    summary.elapsed_s = time.perf_counter() - started
+    return summary
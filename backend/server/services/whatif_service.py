@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from ..config import WHATIF_MAX_SCENARIOS
+from ..database import db_connection
+from ..profiling import stage
+from .candidate_filter import CandidateFilter
+from .exploration import top_k_indices
+from .feature_service import feature_matrix, load_feature_rows
+from .model_service import WEIGHT_COLUMNS, get_weights
+
+Scenario = Union[Sequence[float], Dict[str, float]]
+
+
+def resolve_scenarios(current: np.ndarray, scenarios: List[Scenario]) -> np.ndarray:
+    """Weight matrix of shape (features, scenarios).
+
+    A scenario is either a full weight vector in ``WEIGHT_COLUMNS`` order or a
+    mapping of weight names to values that overrides the current weights.
+    """
+    if not scenarios:
+        raise ValueError('at least one weight vector is required')
+    if len(scenarios) > WHATIF_MAX_SCENARIOS:
+        raise ValueError(f'at most {WHATIF_MAX_SCENARIOS} weight vectors per request')
+    columns = []
+    for scenario in scenarios:
+        if isinstance(scenario, dict):
+            unknown = sorted(set(scenario) - set(WEIGHT_COLUMNS))
+            if unknown:
+                raise ValueError(f'unknown weights {unknown}; expected names from {list(WEIGHT_COLUMNS)}')
+            vector = current.copy()
+            for name, value in scenario.items():
+                vector[WEIGHT_COLUMNS.index(name)] = value
+        else:
+            if len(scenario) != len(WEIGHT_COLUMNS):
+                raise ValueError(f'weight vectors must have {len(WEIGHT_COLUMNS)} entries ({", ".join(WEIGHT_COLUMNS)})')
+            vector = np.asarray(scenario, dtype=np.float32)
+        if not np.all(np.isfinite(vector)):
+            raise ValueError('weights must be finite')
+        columns.append(vector)
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+def pool_ranks(scores: np.ndarray) -> np.ndarray:
+    """0-based rank of every row within each column of ``scores``, best first; ties keep pool order."""
+    order = np.argsort(-scores, axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[0])[:, None], axis=0)
+    return ranks
+
+
+def rank_shift_stats(baseline_ranks: np.ndarray, ranks: np.ndarray, baseline_top: np.ndarray, top: np.ndarray, ids: np.ndarray) -> Dict:
+    n = ranks.shape[0]
+    shift = np.abs(ranks - baseline_ranks)
+    entered = np.setdiff1d(top, baseline_top)
+    dropped = np.setdiff1d(baseline_top, top)
+    if n > 1:
+        squared = float(np.sum((ranks - baseline_ranks).astype(np.float64) ** 2))
+        spearman = 1.0 - 6.0 * squared / (n * (n * n - 1.0))
+    else:
+        spearman = 1.0
+    return {
+        'overlap_at_k': float(len(np.intersect1d(top, baseline_top)) / len(top)) if len(top) else 1.0,
+        'entered': [int(ids[index]) for index in entered],
+        'dropped': [int(ids[index]) for index in dropped],
+        'mean_abs_rank_shift': float(shift.mean()) if n else 0.0,
+        'max_abs_rank_shift': int(shift.max()) if n else 0,
+        'spearman': spearman,
+    }
+
+
+def what_if(
+    job_id: int,
+    scenarios: List[Scenario],
+    k: int = 5,
+    candidate_filter: Optional[CandidateFilter] = None,
+) -> Dict:
+    """Re-score the job's stored features under hypothetical weights; nothing is written.
+
+    All weight vectors, plus the current one, are applied in one matrix
+    product. Each scenario reports its top-k and how far the pool's ranking
+    moved relative to the current weights.
+    """
+    with db_connection(readonly=True) as conn:
+        if conn.execute('SELECT 1 FROM jobs WHERE id=?', (job_id,)).fetchone() is None:
+            raise ValueError(f'job {job_id} not found')
+        with stage('load_features'):
+            rows = load_feature_rows(conn, job_id, candidate_filter)
+            current = get_weights(conn)
+    weights = resolve_scenarios(current, scenarios)
+
+    with stage('whatif_scores'):
+        matrix = feature_matrix(rows)
+        ids = np.array([int(row['candidate_id']) for row in rows], dtype=np.int64)
+        scores = matrix @ np.concatenate([current[:, None], weights], axis=1)
+        ranks = pool_ranks(scores)
+        tops = [top_k_indices(scores[:, column], k) for column in range(scores.shape[1])]
+
+    def slate(column: int) -> List[Dict]:
+        return [
+            {
+                'candidate_id': int(ids[index]),
+                'full_name': rows[int(index)]['full_name'],
+                'score': float(scores[index, column]),
+                'rank': int(ranks[index, column]),
+                'current_rank': int(ranks[index, 0]),
+                'rank_shift': int(ranks[index, 0] - ranks[index, column]),
+            }
+            for index in tops[column]
+        ]
+
+    return {
+        'job_id': job_id,
+        'k': k,
+        'pool_size': len(rows),
+        'current': {'weights': current.tolist(), 'candidates': slate(0)},
+        'scenarios': [
+            {
+                'weights': weights[:, column - 1].tolist(),
+                'candidates': slate(column),
+                'stats': rank_shift_stats(ranks[:, 0], ranks[:, column], tops[0], tops[column], ids),
+            }
+            for column in range(1, scores.shape[1])
+        ],
+    }
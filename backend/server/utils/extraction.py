@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import io
 import re
-from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from pypdf import PdfReader
 
+# Bump whenever a change here alters what is extracted from existing text;
+# candidates stamped with an older version are picked up by reprocessing.
+EXTRACTOR_VERSION = 1
+
 SKILL_TERMS: Set[str] = {
     'python', 'javascript', 'typescript', 'java', 'c++', 'c#', 'go', 'rust', 'sql',
     'flask', 'fastapi', 'django', 'node', 'node.js', 'express', 'graphql', 'rest', 'grpc',
@@ -43,6 +50,12 @@ SKILL_ALIASES: Dict[str, str] = {
     'featureengineering': 'feature-engineering'
 }
 
+# Stable bit positions for canonical skills, used for bitset overlap maths.
+SKILL_INDEX: Dict[str, int] = {
+    skill: index
+    for index, skill in enumerate(sorted(SKILL_TERMS | set(PHRASE_SKILLS.values()) | set(SKILL_ALIASES.values())))
+}
+
 EDU_MAP = {
     'doctor': 4,
     'doctorate': 4,
@@ -62,9 +75,9 @@ EDU_MAP = {
 }
 
 
-def read_pdf_text(path: str) -> str:
+def read_pdf_text(source: Union[str, Path, IO[bytes]]) -> str:
     try:
-        reader = PdfReader(path)
+        reader = PdfReader(source)
         contents: List[str] = []
         for page in reader.pages:
             contents.append(page.extract_text() or '')
@@ -145,3 +158,44 @@ def extract_skills(text: str) -> List[str]:
 
 def jd_skills(description: str) -> List[str]:
     return extract_skills(description)
+
+
+def skill_bitset(skills: Iterable[str]) -> int:
+    bits = 0
+    for skill in skills:
+        index = SKILL_INDEX.get(skill)
+        if index is not None:
+            bits |= 1 << index
+    return bits
+
+
+@dataclass
+class ParsedResume:
+    text: str
+    full_name: str
+    email: str
+    phone: str
+    years_exp: float
+    edu_level: int
+    skills: List[str]
+
+
+def parse_resume(data: bytes) -> Optional[ParsedResume]:
+    """Extract text and structured fields from PDF bytes; ``None`` when no text is found."""
+    text = read_pdf_text(io.BytesIO(data))
+    if not text.strip():
+        return None
+    return extract_fields(text)
+
+
+def extract_fields(text: str) -> ParsedResume:
+    email, phone = extract_contact(text)
+    return ParsedResume(
+        text=text,
+        full_name=extract_name(text),
+        email=email,
+        phone=phone,
+        years_exp=extract_years(text),
+        edu_level=extract_edu_level(text),
+        skills=extract_skills(text),
+    )
@@ -0,0 +1,95 @@
+"""Wire format shared by the embedding server and its clients.
+
+Request:  ``>I`` payload length, then a UTF-8 JSON array of texts. An empty
+          array is a handshake.
+Response: ``>BII`` header of (status, rows, dim). On success ``rows * dim``
+          little-endian float32 values follow. On error ``rows`` carries the
+          byte length of a UTF-8 error message that follows instead. A
+          handshake is answered with ``STATUS_HELLO``, where ``rows`` carries
+          the byte length of the server's UTF-8 model name that follows.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import struct
+from typing import List, Tuple
+
+import numpy as np
+
+REQUEST_HEADER = struct.Struct('>I')
+RESPONSE_HEADER = struct.Struct('>BII')
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_HELLO = 2
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class RemoteError(Exception):
+    """The server reported a failure; the connection is still usable."""
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ProtocolError('connection closed mid-frame')
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_request(sock: socket.socket, texts: List[str]) -> None:
+    payload = json.dumps(texts).encode('utf-8')
+    sock.sendall(REQUEST_HEADER.pack(len(payload)) + payload)
+
+
+def read_request(sock: socket.socket) -> List[str]:
+    (length,) = REQUEST_HEADER.unpack(recv_exact(sock, REQUEST_HEADER.size))
+    if length > MAX_REQUEST_BYTES:
+        raise ProtocolError(f'request of {length} bytes exceeds limit')
+    texts = json.loads(recv_exact(sock, length).decode('utf-8'))
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise ProtocolError('request must be a JSON array of strings')
+    return texts
+
+
+def send_vectors(sock: socket.socket, vectors: np.ndarray) -> None:
+    matrix = np.ascontiguousarray(vectors, dtype='<f4')
+    rows, dim = matrix.shape
+    sock.sendall(RESPONSE_HEADER.pack(STATUS_OK, rows, dim) + matrix.tobytes())
+
+
+def send_error(sock: socket.socket, message: str) -> None:
+    payload = message.encode('utf-8')
+    sock.sendall(RESPONSE_HEADER.pack(STATUS_ERROR, len(payload), 0) + payload)
+
+
+def send_hello(sock: socket.socket, model_name: str, dim: int) -> None:
+    payload = model_name.encode('utf-8')
+    sock.sendall(RESPONSE_HEADER.pack(STATUS_HELLO, len(payload), dim) + payload)
+
+
+def read_hello(sock: socket.socket) -> Tuple[str, int]:
+    """(model name, dim) from a handshake reply."""
+    status, rows, dim = RESPONSE_HEADER.unpack(recv_exact(sock, RESPONSE_HEADER.size))
+    if status != STATUS_HELLO:
+        raise ProtocolError(f'expected a handshake reply, got status {status}')
+    return recv_exact(sock, rows).decode('utf-8'), dim
+
+
+def read_vectors(sock: socket.socket) -> Tuple[np.ndarray, int]:
+    status, rows, dim = RESPONSE_HEADER.unpack(recv_exact(sock, RESPONSE_HEADER.size))
+    if status == STATUS_ERROR:
+        raise RemoteError(recv_exact(sock, rows).decode('utf-8', errors='replace'))
+    if status != STATUS_OK:
+        raise ProtocolError(f'unexpected response status {status}')
+    data = recv_exact(sock, rows * dim * 4)
+    return np.frombuffer(data, dtype='<f4').reshape(rows, dim).astype(np.float32), dim
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is', 'it', 'of', 'on',
+    'or', 'our', 'that', 'the', 'this', 'to', 'we', 'will', 'with', 'you', 'your', 'who', 'etc', 'plus',
+    'looking', 'hiring', 'experience', 'preferred', 'required', 'skills', 'years', 'strong', 'team', 'role',
+}
+
+# bm25() is unbounded; s / (s + BM25_SATURATION) maps it into [0, 1) without
+# depending on which other candidates are scored in the same pass.
+BM25_SATURATION = 5.0
+MAX_QUERY_TERMS = 32
+
+
+def match_terms(text: str, max_terms: int = MAX_QUERY_TERMS) -> List[str]:
+    seen: List[str] = []
+    for token in re.findall(r'[a-z0-9]+', text.lower()):
+        if len(token) < 2 or token in STOPWORDS or token in seen:
+            continue
+        seen.append(token)
+        if len(seen) >= max_terms:
+            break
+    return seen
+
+
+def build_match_query(text: str, max_terms: int = MAX_QUERY_TERMS) -> str:
+    """OR-query over the salient tokens of ``text``; empty when nothing is searchable."""
+    return ' OR '.join(f'"{term}"' for term in match_terms(text, max_terms))
+
+
+def saturate_bm25(score: float) -> float:
+    score = max(0.0, score)
+    return score / (score + BM25_SATURATION)
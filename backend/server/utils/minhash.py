@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from typing import List, Set
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Fixed seed: signatures are persisted, so the permutations must never change.
+_rng = np.random.RandomState(0x5EED)
+_A = _rng.randint(1, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Word ``size``-grams of the normalised text; layout and punctuation do not matter."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i: i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (``NUM_PERM`` uint32 values) of the text's shingle set."""
+    hashed = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles(text)), dtype=np.uint64)
+    if hashed.size == 0:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    # (a * x + b) mod p for every permutation at once; a, x < 2**32 so nothing overflows.
+    permuted = (np.outer(_A, hashed) + _B[:, None]) % _PRIME
+    return (permuted.min(axis=1) & _MAX_HASH).astype(np.uint32)
+
+
+def signature_to_blob(sig: np.ndarray) -> bytes:
+    return sig.astype('<u4').tobytes()
+
+
+def blob_to_signature(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype='<u4')
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    """One LSH bucket per band; near-duplicates collide in at least one band with high probability."""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature_to_blob(sig[band * ROWS_PER_BAND: (band + 1) * ROWS_PER_BAND])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the underlying shingle sets."""
+    return float(np.mean(a == b))
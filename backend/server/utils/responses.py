@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from flask import Response, request
+
+from ..config import RESPONSE_COMPRESSION_MIN_BYTES
+from ..profiling import stage
+
+try:  # optional: several times faster than the stdlib encoder
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:  # optional: ~20% smaller than gzip on ranking payloads
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+# Fast settings: higher levels cost 2-5x the time for ~10% fewer bytes on ranking payloads.
+GZIP_LEVEL = 1
+BROTLI_QUALITY = 4
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, otherwise the stdlib encoder."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def supported_encodings() -> tuple:
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the preferred supported coding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    best, best_q = None, 0.0
+    # supported_encodings() is in preference order, so ties keep the earlier coding.
+    for coding in supported_encodings():
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    raise ValueError(f'unsupported content encoding: {encoding}')
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Encode ``payload`` as JSON, compressing it when the client accepts it and it is worth it."""
+    with stage('encode_json'):
+        body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if len(body) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is not None:
+        with stage(f'compress_{encoding}'):
+            response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
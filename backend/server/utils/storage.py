@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+
+from ..config import UPLOAD_DIR
+
+CONTENT_NAME_RE = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.pdf$')
+
+
+def content_path(digest: str, suffix: str = '.pdf') -> Path:
+    """Sharded location for a blob: ``uploads/ab/cd/<digest><suffix>``."""
+    return UPLOAD_DIR / digest[:2] / digest[2:4] / f'{digest}{suffix}'
+
+
+def store_content(digest: str, data: bytes, suffix: str = '.pdf') -> Path:
+    path = content_path(digest, suffix)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.part')
+    with open(tmp_path, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def discard_content(digest: str, suffix: str = '.pdf') -> None:
+    """Delete a stored blob; callers make sure no row still references it."""
+    content_path(digest, suffix).unlink(missing_ok=True)
+
+
+def upload_name(path: Path) -> str:
+    """Name under which ``/uploads`` serves the stored file."""
+    return Path(path).resolve().relative_to(UPLOAD_DIR.resolve()).as_posix()
+
+
+def digest_from_name(name: str) -> str | None:
+    match = CONTENT_NAME_RE.match(name)
+    return match.group(1) if match else None
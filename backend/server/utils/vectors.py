@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import List, Sequence
+
 import numpy as np
 
 
@@ -19,22 +21,12 @@ def safe_cosine(a: np.ndarray, b: np.ndarray) -> float:
     return max(-1.0, min(1.0, value))
 
 
-def feature_vector(row: dict) -> np.ndarray:
-    return np.array([
-        row['sem_sim'],
-        row['skill_overlap'],
-        row['jaccard'],
-        row['years'],
-        row['edu'],
-    ], dtype=np.float32)
-
-
-def normalize_skill_overlap(rows: list[dict]) -> list[dict]:
-    if not rows:
-        return rows
-    min_val = min(row['skill_overlap_raw'] for row in rows)
-    max_val = max(row['skill_overlap_raw'] for row in rows)
-    denom = max(1.0, max_val - min_val)
-    for row in rows:
-        row['skill_overlap'] = (row['skill_overlap_raw'] - min_val) / denom
-    return rows
+def pack_rows(matrix: np.ndarray) -> List[bytes]:
+    """One little-endian float32 blob per row of ``matrix``."""
+    data = np.ascontiguousarray(matrix, dtype='<f4')
+    return [row.tobytes() for row in data]
+
+
+def unpack_rows(blobs: Sequence[bytes], width: int) -> np.ndarray:
+    """Inverse of :func:`pack_rows`: one join and one copy for the whole batch."""
+    return np.frombuffer(b''.join(blobs), dtype='<f4').reshape(-1, width).astype(np.float32)
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .admission import STATUS_QUEUE_TIMEOUT, Overloaded
+from .config import WRITE_BATCH_WINDOW_MS, WRITE_MAX_BATCH_SIZE, WRITE_QUEUE_ENABLED, WRITE_TIMEOUT_S
+from .database import db_connection, get_connection
+from .profiling import RequestProfile, active_profile, bound_profile, stage
+
+logger = logging.getLogger(__name__)
+
+WriteFn = Callable[[sqlite3.Connection], Any]
+
+
+class WriteTimeout(Overloaded):
+    """The writer did not apply an operation in time (503).
+
+    ``withdrawn`` is True when the operation was dropped before it ran; otherwise
+    it was already running and may still commit.
+    """
+
+    def __init__(self, withdrawn: bool) -> None:
+        super().__init__('write', STATUS_QUEUE_TIMEOUT, retry_after=1)
+        self.withdrawn = withdrawn
+
+
+@dataclass
+class _WriteOp:
+    fn: WriteFn
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    # The submitting request's profile, so stages run on the writer are reported with it.
+    profile: Optional[RequestProfile] = None
+
+
+class WriteQueue:
+    """Single writer thread that applies queued write operations with group commit.
+
+    Operations arriving within ``window_s`` of the first queued one (up to
+    ``max_batch_size``) share one ``BEGIN IMMEDIATE ... COMMIT``. Each runs in
+    its own savepoint, so a failing operation is rolled back alone and its
+    exception is delivered to its caller only. Results resolve after the
+    commit, so callers never observe an uncommitted write.
+
+    Operations receive the writer's connection and must not commit, open
+    transactions, or submit further writes.
+
+    Every dequeued operation is resolved: anything that escapes a batch fails
+    the batch's unresolved futures and the next batch starts on a fresh
+    connection. A writer killed by a ``BaseException`` is restarted by the next
+    :meth:`submit`.
+    """
+
+    def __init__(self, window_s: float, max_batch_size: int) -> None:
+        self.window_s = max(0.0, window_s)
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: 'queue.Queue[_WriteOp]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._transactions = 0
+        self._ops = 0
+        self._failed_ops = 0
+        self._failed_commits = 0
+        self._writer_errors = 0
+        self._restarts = 0
+        self._timeouts = 0
+        self._max_batch = 0
+        self._wait_total = 0.0
+        self._commit_total = 0.0
+
+    def submit(self, fn: WriteFn) -> Future:
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('write operations must not submit nested writes')
+        self._ensure_started()
+        op = _WriteOp(fn=fn, future=Future(), profile=active_profile())
+        self._queue.put(op)
+        return op.future
+
+    def run(self, fn: WriteFn, timeout_s: float) -> Any:
+        """Submit ``fn`` and wait up to ``timeout_s`` for its result; raises :class:`WriteTimeout`."""
+        future = self.submit(fn)
+        try:
+            return future.result(timeout=timeout_s)
+        except FutureTimeoutError:
+            # A queued operation is withdrawn; one the writer already picked up cannot be.
+            withdrawn = future.cancel()
+            with self._stats_lock:
+                self._timeouts += 1
+            raise WriteTimeout(withdrawn) from None
+
+    def _ensure_started(self) -> None:
+        # Started lazily so forking servers spawn the thread in each worker.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    logger.error('sqlite writer thread died; restarting it')
+                    with self._stats_lock:
+                        self._restarts += 1
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[_WriteOp]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        conn: Optional[sqlite3.Connection] = None
+        while True:
+            batch: List[_WriteOp] = []
+            try:
+                # Marking the futures running means a caller that times out can no longer withdraw them.
+                batch = [op for op in self._collect() if op.future.set_running_or_notify_cancel()]
+                if not batch:
+                    continue
+                if conn is None:
+                    conn = get_connection()
+                    # Transactions are managed explicitly below.
+                    conn.isolation_level = None
+                started = time.monotonic()
+                self._apply(conn, batch)
+                self._record(batch, started, time.monotonic() - started)
+            except BaseException as exc:
+                self._abandon(conn, batch, exc)
+                conn = None
+                if not isinstance(exc, Exception):
+                    raise
+
+    def _abandon(self, conn: Optional[sqlite3.Connection], batch: List[_WriteOp], exc: BaseException) -> None:
+        """Fail whatever ``batch`` left unresolved and drop the connection, rolling back its transaction."""
+        logger.error('sqlite writer failed a batch of %d writes', len(batch), exc_info=exc)
+        for op in batch:
+            if not op.future.done():
+                op.future.set_exception(exc)
+        with self._stats_lock:
+            self._writer_errors += 1
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _apply(self, conn: sqlite3.Connection, batch: List[_WriteOp]) -> None:
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for op in batch:
+                conn.execute('SAVEPOINT write_op')
+                try:
+                    with bound_profile(op.profile), stage('write_op'):
+                        result = op.fn(conn)
+                except Exception as exc:
+                    conn.execute('ROLLBACK TO write_op')
+                    conn.execute('RELEASE write_op')
+                    outcomes.append((op, None, exc))
+                else:
+                    conn.execute('RELEASE write_op')
+                    outcomes.append((op, result, None))
+            conn.execute('COMMIT')
+        except sqlite3.Error as exc:
+            logger.warning('group commit of %d writes failed: %s', len(batch), exc)
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            with self._stats_lock:
+                self._failed_commits += 1
+            for op in batch:
+                op.future.set_exception(exc)
+            return
+        for op, result, exc in outcomes:
+            if exc is not None:
+                op.future.set_exception(exc)
+            else:
+                op.future.set_result(result)
+
+    def _record(self, batch: List[_WriteOp], started: float, commit_s: float) -> None:
+        with self._stats_lock:
+            self._transactions += 1
+            self._ops += len(batch)
+            self._failed_ops += sum(1 for op in batch if op.future.exception() is not None)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._wait_total += sum(started - op.enqueued_at for op in batch)
+            self._commit_total += commit_s
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            transactions = self._transactions
+            ops = self._ops
+            return {
+                'enabled': True,
+                'window_ms': self.window_s * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'queue_depth': self._queue.qsize(),
+                'transactions': transactions,
+                'writes': ops,
+                'failed_writes': self._failed_ops,
+                'failed_commits': self._failed_commits,
+                'writer_errors': self._writer_errors,
+                'writer_restarts': self._restarts,
+                'writer_alive': self._thread is not None and self._thread.is_alive(),
+                'timeouts': self._timeouts,
+                'mean_batch_size': ops / transactions if transactions else 0.0,
+                'max_batch_seen': self._max_batch,
+                'queue_wait_ms_mean': self._wait_total / ops * 1000.0 if ops else 0.0,
+                'transaction_ms_mean': self._commit_total / transactions * 1000.0 if transactions else 0.0,
+            }
+
+
+_WRITE_QUEUE: Optional[WriteQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_write_queue() -> Optional[WriteQueue]:
+    global _WRITE_QUEUE
+    if not WRITE_QUEUE_ENABLED:
+        return None
+    if _WRITE_QUEUE is None:
+        with _QUEUE_LOCK:
+            if _WRITE_QUEUE is None:
+                _WRITE_QUEUE = WriteQueue(WRITE_BATCH_WINDOW_MS / 1000.0, WRITE_MAX_BATCH_SIZE)
+    return _WRITE_QUEUE
+
+
+def run_write(fn: WriteFn) -> Any:
+    """Apply ``fn(conn)`` in a committed write transaction and return its result.
+
+    Raises :class:`WriteTimeout` when the writer has not applied it within ``WRITE_TIMEOUT_S``.
+    """
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        return write_queue.run(fn, WRITE_TIMEOUT_S)
+    with db_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        return result
+
+
+def write_stats() -> Dict:
+    write_queue = get_write_queue()
+    return write_queue.stats() if write_queue is not None else {'enabled': False}
@@ -0,0 +1,56 @@
+"""Export or restore a binary snapshot of the corpus, jobs, features, feedback and model.
+
+    python snapshot.py export /backups/2024-06-01 --uploads
+    python snapshot.py import /backups/2024-06-01 --replace
+
+Import bulk-loads the bundle in large transactions; run it with the server stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+
+from server.database import init_db
+from server.services.snapshot_service import PART_ROWS, SnapshotSummary, export_snapshot, import_snapshot
+
+
+def print_progress(table: str, rows: int) -> None:
+    print(f"  {table}: {rows} rows")
+
+
+def print_summary(action: str, summary: SnapshotSummary) -> None:
+    rate = summary.rows / summary.elapsed_s if summary.elapsed_s else 0.0
+    print(
+        f"{action} {summary.rows} rows in {len(summary.tables)} tables, {summary.uploads} uploads, "
+        f"{summary.bytes / 1e6:.1f} MB in {summary.elapsed_s:.1f}s ({rate:.0f} rows/s): {summary.path}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write a snapshot directory")
+    export.add_argument("dest", type=pathlib.Path)
+    export.add_argument("--uploads", action="store_true", help="Copy the stored resume PDFs into the snapshot")
+    export.add_argument("--compress", action="store_true", help="Deflate each part (smaller, slower)")
+    export.add_argument("--part-rows", type=int, default=PART_ROWS, help="Rows per part file")
+    restore = commands.add_parser("import", help="Load a snapshot directory")
+    restore.add_argument("src", type=pathlib.Path)
+    restore.add_argument("--replace", action="store_true", help="Delete the current corpus, jobs and model first")
+    restore.add_argument("--no-verify", action="store_true", help="Skip part checksums")
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "export":
+        summary = export_snapshot(
+            args.dest, include_uploads=args.uploads, compress=args.compress, part_rows=args.part_rows, progress=print_progress
+        )
+        print_summary("Exported", summary)
+    else:
+        summary = import_snapshot(args.src, replace=args.replace, verify=not args.no_verify, progress=print_progress)
+        print_summary("Imported", summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# server.config reads the environment once at import time, so point every test
+# module at a throwaway database, upload directory and the stub embedder before
+# anything under server/ is collected.
+_SESSION_DIR = tempfile.mkdtemp(prefix="resume-selector-tests-")
+os.environ.setdefault("RESUME_SELECTOR_EMBEDDER", "stub")
+os.environ.setdefault("RESUME_SELECTOR_DB_PATH", os.path.join(_SESSION_DIR, "test.sqlite3"))
+os.environ.setdefault("RESUME_SELECTOR_UPLOAD_DIR", os.path.join(_SESSION_DIR, "uploads"))
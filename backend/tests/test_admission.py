@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from server.admission import STATUS_QUEUE_FULL, STATUS_QUEUE_TIMEOUT, AdmissionGate, Overloaded
+
+
+def _hold(gate, release):
+    entered = threading.Event()
+
+    def run():
+        with gate.admit():
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert entered.wait(5)
+    return thread
+
+
+def test_full_queue_is_rejected_immediately():
+    gate = AdmissionGate("ingest", limit=1, queue_size=0, timeout_s=5)
+    release = threading.Event()
+    holder = _hold(gate, release)
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as info:
+        with gate.admit():
+            pass
+    assert time.monotonic() - started < 1
+    assert info.value.status == STATUS_QUEUE_FULL
+    assert info.value.retry_after >= 1
+    release.set()
+    holder.join()
+    assert gate.stats()["rejected_queue_full"] == 1
+
+
+def test_waiters_time_out_and_are_admitted_in_order():
+    gate = AdmissionGate("embed", limit=1, queue_size=4, timeout_s=0.1)
+    release = threading.Event()
+    holder = _hold(gate, release)
+    with pytest.raises(Overloaded) as info:
+        with gate.admit():
+            pass
+    assert info.value.status == STATUS_QUEUE_TIMEOUT
+    assert gate.stats()["queue_depth"] == 0
+
+    gate.timeout_s = 5
+    order = []
+
+    def waiter(index):
+        with gate.admit():
+            order.append(index)
+
+    waiters = []
+    for index in range(3):
+        waiters.append(threading.Thread(target=waiter, args=(index,)))
+        waiters[-1].start()
+        while gate.stats()["queue_depth"] < index + 1:
+            time.sleep(0.001)
+    release.set()
+    for thread in [holder, *waiters]:
+        thread.join()
+    assert order == [0, 1, 2]
+    stats = gate.stats()
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
+    assert stats["admitted"] == 4 and stats["rejected_timeout"] == 1
+
+
+def test_zero_limit_disables_gate():
+    gate = AdmissionGate("ingest", limit=0, queue_size=0, timeout_s=0)
+    with gate.admit():
+        with gate.admit():
+            pass
+    assert gate.stats()["enabled"] is False
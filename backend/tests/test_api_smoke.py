@@ -9,6 +9,7 @@ import pytest
 def client(tmp_path, monkeypatch):
     monkeypatch.setenv("RESUME_SELECTOR_DB_PATH", str(tmp_path / "test.sqlite3"))
     monkeypatch.setenv("RESUME_SELECTOR_EMBEDDER", "stub")
+    monkeypatch.setenv("RESUME_SELECTOR_UPLOAD_DIR", str(tmp_path / "uploads"))
     module_name = "backend.app"
     if module_name in sys.modules:
         del sys.modules[module_name]
@@ -44,3 +45,802 @@ def test_create_job_flow(client):
     assert ranking_data["job_id"] == job_id
     assert "candidates" in ranking_data
     assert isinstance(ranking_data["weights"], list)
+
+
+def _sample_pdf_bytes(tmp_path, index=0):
+    from seed_samples import RESUMES, write_pdf
+
+    spec = RESUMES[index]
+    path = tmp_path / spec.filename
+    write_pdf(path, spec.full_name, [spec.full_name, spec.email, "Skills: " + ", ".join(spec.skills), spec.education])
+    return path.read_bytes()
+
+
+def test_upload_resume_flow(client, tmp_path):
+    import io
+
+    data = _sample_pdf_bytes(tmp_path)
+    resp = client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(data), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["candidate_id"] > 0
+    assert "python" in body["skills"]
+    assert len(body["content_hash"]) == 64
+
+
+def test_reupload_is_deduplicated_and_served_with_etag(client, tmp_path):
+    import io
+
+    data = _sample_pdf_bytes(tmp_path, index=1)
+
+    def upload():
+        return client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(data), "cv.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        ).get_json()
+
+    first = upload()
+    second = upload()
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert second["candidate_id"] == first["candidate_id"]
+
+    digest = first["content_hash"]
+    url = f"/uploads/{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.data == data
+    assert resp.headers["ETag"] == f'"{digest}"'
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert client.get(url, headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+    partial = client.get(url, headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.data == data[:10]
+
+
+def test_upload_rejects_unparseable_pdf(client):
+    import io
+
+    resp = client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(b"not a pdf"), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 400
+
+
+def test_job_edit_invalidates_profile(client, tmp_path):
+    import io
+
+    data = _sample_pdf_bytes(tmp_path, index=2)
+    client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(data), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    )
+    job_id = client.post("/jobs", json={"title": "Ops", "description": "Cobol mainframe operator"}).get_json()["job_id"]
+    before = client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0.0").get_json()["candidates"]
+    assert all(item["jaccard"] == 0.0 for item in before)
+
+    resp = client.put(f"/jobs/{job_id}", json={"title": "Web", "description": "TypeScript, Flask and Redis"})
+    assert resp.status_code == 200
+    after = client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0.0").get_json()["candidates"]
+    assert max(item["jaccard"] for item in after) > 0.0
+
+    assert client.put("/jobs/999999", json={"title": "x", "description": "y"}).status_code == 404
+
+
+def test_rankings_filters_push_down(client, tmp_path):
+    import io
+
+    for index in range(3):
+        data = _sample_pdf_bytes(tmp_path, index=index)
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(data), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python and Kubernetes"}).get_json()["job_id"]
+
+    resp = client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0&skills=Kubernetes,python&any_skills=mlflow,spark&min_years=0")
+    assert resp.status_code == 200
+    filtered = resp.get_json()["candidates"]
+    assert filtered
+    for item in filtered:
+        assert {"kubernetes", "python"} <= set(item["skills"])
+        assert {"mlflow", "spark"} & set(item["skills"])
+
+    unfiltered = client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0").get_json()["candidates"]
+    assert len(unfiltered) > len(filtered)
+    by_id = {item["candidate_id"]: item["score"] for item in unfiltered}
+    for item in filtered:
+        assert item["score"] == by_id[item["candidate_id"]]
+
+    assert client.get(f"/rankings?job_id={job_id}&min_years=abc").status_code == 400
+
+
+def test_search_and_bm25_feature(client, tmp_path):
+    import io
+
+    data = _sample_pdf_bytes(tmp_path, index=0)
+    client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(data), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    )
+    resp = client.get("/search?q=kubernetes&limit=5")
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert results and all(item["bm25"] > 0 for item in results)
+    assert "[" in results[0]["snippet"]
+    assert client.get('/search?q="unbalanced').status_code == 400
+
+    job_id = client.post("/jobs", json={"title": "K8s", "description": "Kubernetes and Terraform"}).get_json()["job_id"]
+    ranking = client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0").get_json()
+    assert len(ranking["weights"]) == 6
+    assert max(item["bm25"] for item in ranking["candidates"]) > 0
+    assert len(client.get("/models").get_json()["weights"]) == 6
+
+
+def test_reprocess_migrates_stale_rows(client, tmp_path):
+    import io
+    import time
+
+    from server.database import db_connection
+
+    data = _sample_pdf_bytes(tmp_path, index=1)
+    uploaded = client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(data), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    ).get_json()
+    # Earlier tests may already hold this sample; rankings show the cluster root.
+    candidate_id = (uploaded["near_duplicate"] or uploaded)["candidate_id"]
+    job_id = client.post("/jobs", json={"title": "Data", "description": "Python and SQL"}).get_json()["job_id"]
+    assert client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0").status_code == 200
+
+    with db_connection() as conn:
+        conn.execute("UPDATE candidates SET extractor_version=0, skills='[]' WHERE id=?", (candidate_id,))
+        conn.execute("UPDATE jobs SET embedding_model='old-model' WHERE id=?", (job_id,))
+        conn.commit()
+    # A job on another model is never ranked against current-model candidates.
+    assert client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0").get_json()["candidates"] == []
+
+    resp = client.post("/reprocess", json={})
+    assert resp.status_code == 202
+    for _ in range(100):
+        run = client.get("/reprocess").get_json()
+        if run["status"] != "running":
+            break
+        time.sleep(0.05)
+    assert run["status"] == "completed"
+    assert run["processed"] >= 2
+
+    with db_connection() as conn:
+        cand = conn.execute("SELECT skills, extractor_version FROM candidates WHERE id=?", (candidate_id,)).fetchone()
+        job = conn.execute("SELECT embedding_model, profile_version FROM jobs WHERE id=?", (job_id,)).fetchone()
+        staged = conn.execute("SELECT COUNT(*) AS n FROM candidate_reprocess").fetchone()["n"]
+    assert cand["skills"] != "[]" and cand["extractor_version"] >= 1
+    assert job["embedding_model"] == "stub" and job["profile_version"] >= 1
+    assert staged == 0
+    ranked = client.get(f"/rankings?job_id={job_id}&k=50&epsilon=0").get_json()["candidates"]
+    assert candidate_id in {item["candidate_id"] for item in ranked}
+
+
+def test_rankings_columnar_and_compressed(client, tmp_path):
+    import gzip
+    import io
+    import json
+
+    for index in range(3):
+        data = _sample_pdf_bytes(tmp_path, index=index)
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(data), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python and Kubernetes"}).get_json()["job_id"]
+    query = f"/rankings?job_id={job_id}&k=50&strategy=greedy&seed=7"
+
+    rows = client.get(query).get_json()
+    columnar = client.get(query + "&format=columnar").get_json()
+    assert columnar["format"] == "columnar"
+    assert columnar["count"] == len(rows["candidates"])
+    assert columnar["slate_id"] == rows["slate_id"]
+    rebuilt = [dict(zip(columnar["columns"], values)) for values in zip(*columnar["columns"].values())]
+    assert rebuilt == rows["candidates"]
+    assert client.get(query + "&format=xml").status_code == 400
+
+    resp = client.get(query, headers={"Accept-Encoding": "gzip;q=1.0, br;q=0"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert json.loads(gzip.decompress(resp.data)) == rows
+    assert "Content-Encoding" not in client.get(query, headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_negotiate_encoding():
+    from server.utils.responses import negotiate_encoding, supported_encodings
+
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("*") == supported_encodings()[0]
+
+
+def test_profiling_hook_writes_profiles(tmp_path, monkeypatch):
+    import io
+
+    import server.profiling as profiling
+    import server.routes.profiles as profile_routes
+    from server import create_app
+
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(profile_routes, "PROFILE_DIR", tmp_path / "profiles")
+    app = create_app()
+    app.testing = True
+    client = app.test_client()
+
+    data = _sample_pdf_bytes(tmp_path, index=0)
+    client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(data), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python"}).get_json()["job_id"]
+    assert "X-Profile-Id" not in client.get(f"/rankings?job_id={job_id}").headers
+
+    resp = client.get(f"/rankings?job_id={job_id}&k=5", headers={"X-Profile": "1"})
+    profile_id = resp.headers["X-Profile-Id"]
+    listed = client.get("/profiles").get_json()["profiles"]
+    assert listed[0]["profile_id"] == profile_id
+    assert listed[0]["path"] == "/rankings"
+
+    detail = client.get(f"/profiles/{profile_id}").get_json()
+    names = {item["name"] for item in detail["stages"]}
+    assert {"load_features", "select_slate", "encode_json"} <= names
+    assert "fetch_rankings" in detail["top_functions"]
+    assert client.get(f"/profiles/{profile_id}.prof").status_code == 200
+    assert client.get("/profiles/missing").status_code == 404
+
+
+def test_profiled_feedback_reports_writer_stages(tmp_path, monkeypatch):
+    import io
+
+    import server.profiling as profiling
+    import server.routes.profiles as profile_routes
+    from server import create_app
+    from server.write_queue import get_write_queue
+
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(profile_routes, "PROFILE_DIR", tmp_path / "profiles")
+    app = create_app()
+    app.testing = True
+    client = app.test_client()
+    assert get_write_queue() is not None
+
+    for index in range(2):
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path, index=index)), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python"}).get_json()["job_id"]
+    shown = [c["candidate_id"] for c in client.get(f"/rankings?job_id={job_id}&k=2&strategy=greedy").get_json()["candidates"]]
+    resp = client.post(
+        "/feedback",
+        json={"job_id": job_id, "shown_candidate_ids": shown, "chosen_candidate_id": shown[-1]},
+        headers={"X-Profile": "1"},
+    )
+    assert resp.status_code == 200
+
+    stages = client.get(f"/profiles/{resp.headers['X-Profile-Id']}").get_json()["stages"]
+    by_name = {item["name"]: item for item in stages}
+    assert {"update_weights", "write_op", "pairwise_sgd", "set_weights"} <= set(by_name)
+    assert by_name["write_op"]["depth"] == by_name["update_weights"]["depth"] + 1
+    assert by_name["pairwise_sgd"]["depth"] == by_name["write_op"]["depth"] + 1
+    assert by_name["write_op"]["ms"] <= by_name["update_weights"]["ms"]
+
+
+def test_near_duplicate_uploads_are_clustered(client, tmp_path, monkeypatch):
+    import io
+
+    import server.services.near_dup_service as near_dup
+
+    def upload(text_lines):
+        from seed_samples import write_pdf
+
+        path = tmp_path / "near.pdf"
+        write_pdf(path, text_lines[0], text_lines)
+        return client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(path.read_bytes()), "near.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+
+    body = [
+        "Quinn Near-Duplicate",
+        "quinn.neardup@example.com",
+        "Summary: staff data engineer building streaming pipelines with Kafka, Flink and Spark on AWS.",
+        "Skills: Python, Scala, Kafka, Spark, Airflow, Terraform, Kubernetes, PostgreSQL",
+        "Experience: 9 years of data platform work across fintech and logistics companies.",
+        "Education: BSc Computer Science",
+    ]
+    first = upload(body + ["Phone: (555) 010-0001"]).get_json()
+    assert first["near_duplicate"] is None
+
+    second = upload(body + ["Phone: (555) 010-0002"]).get_json()
+    assert second["duplicate"] is False
+    assert second["near_duplicate"]["candidate_id"] == first["candidate_id"]
+    assert second["near_duplicate"]["similarity"] >= 0.8
+
+    clusters = client.get("/duplicates").get_json()["clusters"]
+    cluster = next(c for c in clusters if c["candidate_id"] == first["candidate_id"])
+    assert [m["candidate_id"] for m in cluster["members"]] == [second["candidate_id"]]
+
+    job_id = client.post("/jobs", json={"title": "DE", "description": "Kafka and Spark"}).get_json()["job_id"]
+    ranked = {c["candidate_id"] for c in client.get(f"/rankings?job_id={job_id}&k=500&epsilon=0").get_json()["candidates"]}
+    assert first["candidate_id"] in ranked and second["candidate_id"] not in ranked
+
+    monkeypatch.setattr(near_dup, "NEAR_DUP_POLICY", "reject")
+    rejected = upload(body + ["Phone: (555) 010-0003"])
+    assert rejected.status_code == 409
+    assert rejected.get_json()["candidate_id"] == first["candidate_id"]
+
+
+def test_pre_hash_candidates_are_hashed_on_startup(client, tmp_path):
+    import io
+    import shutil
+
+    from seed_samples import write_pdf
+    from server.database import db_connection, init_db
+
+    pdf = tmp_path / "legacy.pdf"
+    write_pdf(pdf, "Imani Legacy", ["Imani Legacy", "imani.legacy@example.com", "Skills: cobol, db2, jcl", "Mainframe batch since 2004"])
+
+    def upload():
+        return client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(pdf.read_bytes()), "cv.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        ).get_json()
+
+    first = upload()
+    # Rewind the row to how uploads were stored before content hashing.
+    legacy = tmp_path / "uploads-legacy" / "1234_cv.pdf"
+    legacy.parent.mkdir()
+    shutil.copyfile(pdf, legacy)
+    with db_connection() as conn:
+        conn.execute("UPDATE candidates SET content_hash=NULL, pdf_path=? WHERE id=?", (str(legacy), first["candidate_id"]))
+        conn.commit()
+
+    init_db()
+    again = upload()
+    assert again["duplicate"] is True
+    assert again["candidate_id"] == first["candidate_id"]
+    assert again["content_hash"] == first["content_hash"]
+
+
+def test_rejected_near_duplicate_leaves_no_stored_file(client, tmp_path, monkeypatch):
+    import hashlib
+    import io
+
+    import server.services.near_dup_service as near_dup
+    import server.services.resume_service as resume_service
+    from seed_samples import write_pdf
+    from server.utils.storage import content_path
+
+    def pdf(phone):
+        path = tmp_path / "orphan.pdf"
+        lines = [
+            "Rowan Orphan-Check",
+            "rowan.orphan@example.com",
+            phone,
+            "Summary: site reliability engineer running Kubernetes, Prometheus and Terraform on GCP.",
+            "Skills: Go, Python, Kubernetes, Terraform, Prometheus, Grafana, PostgreSQL",
+            "Experience: 7 years of on-call and platform work for payments companies.",
+        ]
+        write_pdf(path, lines[0], lines)
+        return path.read_bytes()
+
+    def upload(data):
+        return client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(data), "orphan.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+
+    first = upload(pdf("Phone: (555) 020-0001")).get_json()
+    monkeypatch.setattr(near_dup, "NEAR_DUP_POLICY", "reject")
+    # A racing upload: the pre-check misses the match and the writer's re-check rejects it.
+    real = resume_service.find_near_duplicate
+    calls = []
+
+    def racing(conn, sig):
+        calls.append(sig)
+        return None if len(calls) == 1 else real(conn, sig)
+
+    monkeypatch.setattr(resume_service, "find_near_duplicate", racing)
+    data = pdf("Phone: (555) 020-0002")
+    rejected = upload(data)
+    assert rejected.status_code == 409
+    assert rejected.get_json()["candidate_id"] == first["candidate_id"]
+    assert len(calls) == 2
+    assert not content_path(hashlib.sha256(data).hexdigest()).exists()
+    assert content_path(first["content_hash"]).exists()
+
+
+def test_sharded_rankings_match_single_pool(client, tmp_path, monkeypatch):
+    import io
+
+    import server.services.ranking_service as ranking_service
+    import server.services.shard_service as shard_service
+
+    for index in range(3):
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path, index=index)), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python and Kubernetes"}).get_json()["job_id"]
+    query = f"/rankings?job_id={job_id}&k=2&strategy=greedy"
+    single = client.get(query).get_json()["candidates"]
+    exploring = [
+        f"/rankings?job_id={job_id}&k=3&seed=5&strategy=softmax&temperature=0.5",
+        f"/rankings?job_id={job_id}&k=3&seed=5&strategy=epsilon&epsilon=1",
+        f"/rankings?job_id={job_id}&k=3&seed=5&strategy=mixed&explore_slots=2",
+    ]
+    unsharded = [client.get(url).get_json()["candidates"] for url in exploring]
+
+    monkeypatch.setattr(ranking_service, "RANKING_SHARDS", 3)
+    monkeypatch.setattr(shard_service, "RANKING_SHARDS", 3)
+    monkeypatch.setattr(shard_service, "RANKING_SHARD_WORKERS", 2)
+    try:
+        sharded = client.get(query).get_json()["candidates"]
+        softmax = client.get(f"/rankings?job_id={job_id}&k=2&strategy=softmax&seed=5").get_json()["candidates"]
+        again = client.get(f"/rankings?job_id={job_id}&k=2&strategy=softmax&seed=5").get_json()["candidates"]
+        resharded = [client.get(url).get_json()["candidates"] for url in exploring]
+    finally:
+        if shard_service._EXECUTOR is not None:
+            shard_service._EXECUTOR.shutdown()
+            shard_service._EXECUTOR = None
+
+    assert [c["candidate_id"] for c in sharded] == [c["candidate_id"] for c in single]
+    assert [c["score"] for c in sharded] == pytest.approx([c["score"] for c in single])
+    assert sharded[0]["full_name"] == single[0]["full_name"]
+    assert [c["candidate_id"] for c in softmax] == [c["candidate_id"] for c in again]
+    # Exploration noise is keyed by candidate id, so a seed picks the same slate with or without shards.
+    for whole, split in zip(unsharded, resharded):
+        assert [(c["candidate_id"], c["explore"]) for c in split] == [(c["candidate_id"], c["explore"]) for c in whole]
+
+    shown = [c["candidate_id"] for c in sharded]
+    resp = client.post("/feedback", json={"job_id": job_id, "shown_candidate_ids": shown, "chosen_candidate_id": shown[-1]})
+    assert resp.status_code == 200
+
+
+def test_ingest_backpressure_returns_retry_after(client, tmp_path, monkeypatch):
+    import io
+
+    import server.admission as admission
+
+    gate = admission.AdmissionGate("ingest", limit=1, queue_size=0, timeout_s=1)
+    monkeypatch.setitem(admission.GATES, "ingest", gate)
+    with gate.admit():
+        resp = client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path)), "cv.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+        assert resp.status_code == 429
+        assert int(resp.headers["Retry-After"]) >= 1
+        assert resp.get_json()["stage"] == "ingest"
+        assert client.get("/health").status_code == 200
+        stats = client.get("/metrics").get_json()["admission"]["ingest"]
+        assert stats["active"] == 1 and stats["rejected_queue_full"] == 1
+
+
+def test_features_are_stored_at_write_time(client, tmp_path):
+    import io
+
+    from server.database import db_connection
+
+    def feature_count(job_id, candidate_id=None):
+        with db_connection() as conn:
+            sql = "SELECT COUNT(*) AS n FROM features WHERE job_id=?"
+            params = [job_id]
+            if candidate_id is not None:
+                sql += " AND candidate_id=?"
+                params.append(candidate_id)
+            return conn.execute(sql, params).fetchone()["n"]
+
+    def comparable(job_id):
+        with db_connection() as conn:
+            return conn.execute(
+                """
+                SELECT COUNT(*) AS n FROM candidates c JOIN jobs j ON j.id=?
+                WHERE c.embedding_model IS j.embedding_model AND c.duplicate_of IS NULL
+                """,
+                (job_id,),
+            ).fetchone()["n"]
+
+    job_id = client.post("/jobs", json={"title": "SRE", "description": "Kubernetes, Terraform and Go"}).get_json()["job_id"]
+    assert feature_count(job_id) == comparable(job_id)
+
+    uploaded = client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path, index=1)), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    ).get_json()
+    if uploaded["near_duplicate"] is None:
+        assert feature_count(job_id, uploaded["candidate_id"]) == 1
+    assert feature_count(job_id) == comparable(job_id)
+
+    before = client.get(f"/rankings?job_id={job_id}&k=50&strategy=greedy").get_json()["candidates"]
+    client.put(f"/jobs/{job_id}", json={"title": "SRE", "description": "Python and PostgreSQL"})
+    assert feature_count(job_id) == comparable(job_id)
+    after = client.get(f"/rankings?job_id={job_id}&k=50&strategy=greedy").get_json()["candidates"]
+    assert {c["candidate_id"] for c in after} == {c["candidate_id"] for c in before}
+    assert [c["score"] for c in after] != [c["score"] for c in before]
+
+
+def test_whatif_rescoring_leaves_weights_untouched(client, tmp_path):
+    import io
+
+    for index in range(3):
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path, index=index)), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python; 5+ years; MSc"}).get_json()["job_id"]
+    before = client.get("/models").get_json()["weights"]
+    greedy = client.get(f"/rankings?job_id={job_id}&k=2&strategy=greedy").get_json()["candidates"]
+
+    resp = client.post(
+        "/rankings/whatif",
+        json={"job_id": job_id, "k": 2, "weights": [before, {"w_years": before[3] * 2 + 1}, [0, 0, 0, 1, 0, 0]]},
+    )
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [c["candidate_id"] for c in data["current"]["candidates"]] == [c["candidate_id"] for c in greedy]
+    same, doubled, years_only = data["scenarios"]
+    assert same["stats"]["spearman"] == pytest.approx(1.0)
+    assert same["stats"]["mean_abs_rank_shift"] == 0 and same["stats"]["entered"] == []
+    assert doubled["weights"][3] == pytest.approx(before[3] * 2 + 1)
+    assert doubled["weights"][:3] == pytest.approx(before[:3])
+    scores = [c["score"] for c in years_only["candidates"]]
+    assert scores == sorted(scores, reverse=True)
+    for candidate in years_only["candidates"]:
+        assert candidate["rank_shift"] == candidate["current_rank"] - candidate["rank"]
+    assert client.get("/models").get_json()["weights"] == before
+
+    assert client.post("/rankings/whatif", json={"job_id": job_id, "weights": [{"w_typo": 1}]}).status_code == 400
+    assert client.post("/rankings/whatif", json={"job_id": job_id, "weights": [[1, 2]]}).status_code == 400
+    assert client.post("/rankings/whatif", json={"job_id": job_id, "weights": []}).status_code == 400
+
+
+def test_events_stream_announces_changes(client, tmp_path):
+    import io
+    import json
+
+    from seed_samples import write_pdf
+
+    pdf = tmp_path / "events.pdf"
+    write_pdf(pdf, "Iris Okafor", ["Iris Okafor", "iris@example.org", "Skills: python, kubernetes, rust", "Event sourcing and SSE fan-out at scale"])
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python and Kubernetes"}).get_json()["job_id"]
+    stream = client.get(f"/events?job_id={job_id}", buffered=False)
+    assert stream.mimetype == "text/event-stream"
+    frames = iter(stream.response)
+    assert next(frames).startswith(b"retry:")
+
+    uploaded = client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(pdf.read_bytes()), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    ).get_json()
+    assert uploaded["duplicate"] is False and uploaded["near_duplicate"] is None
+    ranked = [c["candidate_id"] for c in client.get(f"/rankings?job_id={job_id}&k=2&strategy=greedy").get_json()["candidates"]]
+    version = client.get("/models").get_json()["version"]
+    feedback = client.post("/feedback", json={"job_id": job_id, "shown_candidate_ids": ranked, "chosen_candidate_id": ranked[-1]})
+    assert feedback.get_json()["weights_version"] == version + 1
+
+    events = []
+    while len(events) < 4:
+        frame = next(frames)
+        if not frame.startswith(b":"):
+            fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+            events.append((fields["event"], json.loads(fields["data"])))
+    stream.close()
+
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["candidate", "rankings", "model", "rankings"]
+    assert events[0][1]["candidate_id"] == uploaded["candidate_id"]
+    assert job_id in events[1][1]["job_ids"]
+    assert events[2][1]["version"] == version + 1
+    assert events[3][1]["job_ids"] is None
+    assert client.get("/events?types=bogus").status_code == 400
+    spaced = client.get("/events?types=model,%20rankings", buffered=False)
+    assert spaced.status_code == 200
+    assert next(iter(spaced.response)).startswith(b"retry:")
+    spaced.close()
+
+
+def test_snapshot_round_trip(client, tmp_path, monkeypatch):
+    import io
+
+    import server.database as database
+    import server.services.snapshot_service as snapshot_service
+    from server.services.snapshot_service import export_snapshot, import_snapshot, read_manifest
+
+    for index in range(3):
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path, index=index)), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    job_id = client.post("/jobs", json={"title": "MLE", "description": "Python and Kubernetes"}).get_json()["job_id"]
+    query = f"/rankings?job_id={job_id}&k=3&strategy=greedy"
+    before = client.get(query).get_json()
+    shown = [c["candidate_id"] for c in before["candidates"]]
+    client.post("/feedback", json={"job_id": job_id, "shown_candidate_ids": shown, "chosen_candidate_id": shown[-1]})
+    before = client.get(query).get_json()
+    search = client.get("/search?q=python").get_json()
+    model = client.get("/models").get_json()
+
+    exported = export_snapshot(tmp_path / "snap", include_uploads=True, part_rows=2)
+    manifest = read_manifest(tmp_path / "snap")
+    assert exported.uploads >= 3
+    assert manifest["tables"]["candidates"]["rows"] == exported.tables["candidates"]
+    assert len(manifest["tables"]["candidates"]["parts"]) > 1
+
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "restored.sqlite3")
+    monkeypatch.setattr(snapshot_service, "UPLOAD_DIR", tmp_path / "restored-uploads")
+    database.init_db()
+    imported = import_snapshot(tmp_path / "snap")
+    assert imported.tables == exported.tables
+    assert imported.uploads == exported.uploads
+
+    assert client.get("/models").get_json() == model
+    after = client.get(query).get_json()
+    assert after["candidates"] == before["candidates"]
+    with database.db_connection() as conn:
+        pdf_path = conn.execute("SELECT pdf_path FROM candidates WHERE id=?", (shown[0],)).fetchone()["pdf_path"]
+    assert pdf_path.startswith(str(tmp_path / "restored-uploads")) and os.path.exists(pdf_path)
+    assert client.get("/search?q=python").get_json() == search
+    with pytest.raises(ValueError):
+        import_snapshot(tmp_path / "snap")
+
+
+def test_failed_snapshot_import_keeps_existing_corpus(client, tmp_path, monkeypatch):
+    import io
+
+    import server.database as database
+    import server.services.snapshot_service as snapshot_service
+    from server.services.snapshot_service import export_snapshot, import_snapshot
+
+    for index in range(3):
+        client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(_sample_pdf_bytes(tmp_path, index=index)), f"cv{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+    exported = export_snapshot(tmp_path / "snap", part_rows=2)
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "restored.sqlite3")
+    monkeypatch.setattr(snapshot_service, "UPLOAD_DIR", tmp_path / "restored-uploads")
+    database.init_db()
+    import_snapshot(tmp_path / "snap")
+    search = client.get("/search?q=python").get_json()
+
+    part = tmp_path / "snap" / "candidates-00001.npz"
+    part.write_bytes(part.read_bytes()[:100])
+    with pytest.raises(ValueError, match="checksum"):
+        import_snapshot(tmp_path / "snap", replace=True)
+    # Without verification the damage only shows up mid-load; the transaction still rolls back.
+    with pytest.raises(Exception):
+        import_snapshot(tmp_path / "snap", replace=True, verify=False)
+
+    with database.db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) AS n FROM candidates").fetchone()["n"] == exported.tables["candidates"]
+        triggers = conn.execute("SELECT COUNT(*) AS n FROM sqlite_master WHERE type='trigger' AND name LIKE 'candidates_fts_%'").fetchone()["n"]
+    assert triggers == 3
+    assert client.get("/search?q=python").get_json() == search
+
+
+def test_candidate_scored_off_writer_rescores_edited_jobs(client, tmp_path):
+    import io
+
+    from seed_samples import write_pdf
+    from server.database import db_connection
+    from server.services.feature_service import fetch_feature_vectors, score_candidate, store_candidate_features
+
+    pdf = tmp_path / "writer.pdf"
+    write_pdf(pdf, "Tomas Lindqvist", ["Tomas Lindqvist", "tomas@example.net", "Skills: go, terraform", "Runs on-call for payment ledgers"])
+    job_id = client.post("/jobs", json={"title": "SRE", "description": "Kubernetes and Go"}).get_json()["job_id"]
+    uploaded = client.post(
+        "/resumes",
+        data={"file": (io.BytesIO(pdf.read_bytes()), "cv.pdf", "application/pdf")},
+        content_type="multipart/form-data",
+    ).get_json()
+    assert uploaded["near_duplicate"] is None
+    candidate_id = uploaded["candidate_id"]
+    with db_connection(readonly=True) as conn:
+        stale = score_candidate(conn, candidate_id)
+        before = fetch_feature_vectors(conn, job_id, [candidate_id])
+    assert job_id in {profile.job_id for profile, _ in stale}
+    assert candidate_id in before
+
+    client.put(f"/jobs/{job_id}", json={"title": "SRE", "description": "Python and PostgreSQL"})
+    with db_connection() as conn:
+        edited = fetch_feature_vectors(conn, job_id, [candidate_id])[candidate_id]
+        conn.execute("DELETE FROM features WHERE job_id=? AND candidate_id=?", (job_id, candidate_id))
+        store_candidate_features(conn, candidate_id, stale)
+        conn.commit()
+        restored = fetch_feature_vectors(conn, job_id, [candidate_id])[candidate_id]
+    # The rows scored against the old description are not written for the edited job.
+    assert restored.tolist() == pytest.approx(edited.tolist())
+
+
+def test_feature_coverage_is_recorded_and_backfilled(client, tmp_path):
+    import io
+
+    from seed_samples import write_pdf
+    from server.database import db_connection
+    from server.services.feature_service import FEATURE_VERSION, backfill_features, fetch_feature_vectors, max_candidate_id
+
+    def upload(name, lines):
+        pdf = tmp_path / f"{name}.pdf"
+        write_pdf(pdf, name, [name, *lines])
+        payload = client.post(
+            "/resumes",
+            data={"file": (io.BytesIO(pdf.read_bytes()), "cv.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        ).get_json()
+        assert payload["near_duplicate"] is None
+        return payload["candidate_id"]
+
+    def coverage(job_id):
+        with db_connection() as conn:
+            row = conn.execute("SELECT features_version, features_scored_up_to FROM jobs WHERE id=?", (job_id,)).fetchone()
+            return int(row["features_version"]), int(row["features_scored_up_to"]), max_candidate_id(conn)
+
+    backfill_features()  # settle whatever earlier tests left behind
+    candidate_id = upload("Priya Raman", ["Skills: scala, spark, airflow", "Built a lakehouse for ad attribution"])
+    stale_job = client.post("/jobs", json={"title": "DE", "description": "Spark and Airflow"}).get_json()["job_id"]
+    gap_job = client.post("/jobs", json={"title": "DE", "description": "Scala pipelines"}).get_json()["job_id"]
+    version, scored_up_to, newest = coverage(stale_job)
+    assert version == FEATURE_VERSION and scored_up_to == newest
+    assert client.get(f"/rankings?job_id={stale_job}&k=3").get_json()["features_complete"] is True
+    assert backfill_features() == 0
+
+    with db_connection() as conn:
+        expected = fetch_feature_vectors(conn, stale_job, [candidate_id])[candidate_id]
+        # Rows computed under older feature semantics, and a candidate that was committed but never scored.
+        conn.execute("UPDATE features SET packed=zeroblob(16) WHERE job_id=? AND candidate_id=?", (stale_job, candidate_id))
+        conn.execute("UPDATE jobs SET features_version=? WHERE id=?", (FEATURE_VERSION - 1, stale_job))
+        conn.execute("DELETE FROM features WHERE job_id=? AND candidate_id=?", (gap_job, candidate_id))
+        conn.execute("UPDATE jobs SET features_scored_up_to=? WHERE id=?", (candidate_id - 1, gap_job))
+        conn.commit()
+    assert client.get(f"/rankings?job_id={stale_job}&k=3").get_json()["features_complete"] is False
+
+    # Scoring a newer candidate does not move the watermark past the unscored one.
+    upload("Lars Eriksen", ["Skills: scala, kafka", "Streams clickstream data into Delta tables"])
+    assert coverage(gap_job)[1] == candidate_id - 1
+
+    assert backfill_features() == 2
+    for job_id in (stale_job, gap_job):
+        version, scored_up_to, newest = coverage(job_id)
+        assert version == FEATURE_VERSION and scored_up_to == newest
+        assert client.get(f"/rankings?job_id={job_id}&k=3").get_json()["features_complete"] is True
+    with db_connection() as conn:
+        restored = fetch_feature_vectors(conn, stale_job, [candidate_id])[candidate_id]
+    # bm25 moved with the corpus; the rest is a pure function of the job and candidate.
+    assert restored[:5].tolist() == pytest.approx(expected[:5].tolist())
+    with db_connection() as conn:
+        assert candidate_id in fetch_feature_vectors(conn, gap_job, [candidate_id])
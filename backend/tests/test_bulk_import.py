@@ -0,0 +1,102 @@
+import zipfile
+
+import pytest
+
+import server.database as database
+from seed_samples import write_pdf
+from server.config import MAX_FILE_SIZE_BYTES
+from server.services.bulk_import_service import run_bulk_import
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "bulk.sqlite3")
+    database.init_db()
+    root = tmp_path / "resumes"
+    (root / "nested").mkdir(parents=True)
+    write_pdf(root / "a.pdf", "Ines Moreau", ["Ines Moreau", "ines@example.org", "Skills: python, spark", "6 years building data pipelines"])
+    write_pdf(root / "b.pdf", "Kofi Mensah", ["Kofi Mensah", "kofi@example.org", "Skills: react, typescript", "Led a design system rewrite"])
+    (root / "nested" / "a-copy.pdf").write_bytes((root / "a.pdf").read_bytes())
+    (root / "broken.pdf").write_bytes(b"%PDF-1.4 this is not really a pdf")
+    with open(root / "big.pdf", "wb") as fh:
+        fh.truncate(MAX_FILE_SIZE_BYTES + 1)
+    return root
+
+
+def _statuses(source):
+    with database.db_connection() as conn:
+        rows = conn.execute("SELECT item, status, candidate_id, error FROM import_checkpoints WHERE source=?", (str(source),))
+        return {row["item"]: dict(row) for row in rows}
+
+
+def test_directory_import_checkpoints_and_resumes(corpus):
+    first = run_bulk_import(corpus, workers=1, batch_size=2)
+    assert (first.total, first.skipped, first.imported, first.duplicates, first.failed) == (5, 0, 2, 1, 2)
+
+    statuses = _statuses(corpus.resolve())
+    assert {item: row["status"] for item, row in statuses.items()} == {
+        "a.pdf": "imported",
+        "b.pdf": "imported",
+        "nested/a-copy.pdf": "duplicate",
+        "broken.pdf": "failed",
+        "big.pdf": "failed",
+    }
+    assert statuses["nested/a-copy.pdf"]["candidate_id"] == statuses["a.pdf"]["candidate_id"]
+    assert "too large" in statuses["big.pdf"]["error"]
+    assert "extract text" in statuses["broken.pdf"]["error"]
+
+    second = run_bulk_import(corpus, workers=1, batch_size=2)
+    assert (second.total, second.skipped, second.processed) == (5, 5, 0)
+
+    retried = run_bulk_import(corpus, workers=1, batch_size=2, retry_failed=True)
+    assert (retried.skipped, retried.failed, retried.imported) == (3, 2, 0)
+    with database.db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) AS n FROM candidates").fetchone()["n"] == 2
+
+
+def test_zip_import_matches_existing_content(corpus, tmp_path):
+    directory = run_bulk_import(corpus, workers=1)
+    archive = tmp_path / "resumes.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(corpus.rglob("*.pdf")):
+            zf.write(path, path.relative_to(corpus).as_posix())
+
+    first = run_bulk_import(archive, workers=1, batch_size=2)
+    assert (first.total, first.skipped, first.imported, first.duplicates, first.failed) == (5, 0, 0, 3, 2)
+    statuses = _statuses(archive.resolve())
+    assert statuses["a.pdf"]["status"] == "duplicate"
+    assert statuses["a.pdf"]["candidate_id"] == _statuses(corpus.resolve())["a.pdf"]["candidate_id"]
+    assert statuses["big.pdf"]["status"] == statuses["broken.pdf"]["status"] == "failed"
+
+    second = run_bulk_import(archive, workers=1, batch_size=2)
+    assert (second.total, second.skipped, second.processed) == (5, 5, 0)
+    assert directory.imported == 2
+
+
+def test_rejected_near_duplicates_are_not_stored(tmp_path, monkeypatch):
+    import hashlib
+
+    import server.services.near_dup_service as near_dup
+    from server.utils.storage import content_path
+
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "near.sqlite3")
+    monkeypatch.setattr(near_dup, "NEAR_DUP_POLICY", "reject")
+    database.init_db()
+    root = tmp_path / "near"
+    body = [
+        "Sana Qureshi",
+        "sana.bulk@example.org",
+        "Summary: analytics engineer modelling warehouses with dbt, Snowflake and Looker.",
+        "Skills: SQL, Python, dbt, Snowflake, Looker, Airflow",
+        "Experience: 5 years of analytics engineering for retail marketplaces.",
+    ]
+    write_pdf(root / "a.pdf", body[0], body + ["Phone: (555) 030-0001"])
+    write_pdf(root / "b.pdf", body[0], body + ["Phone: (555) 030-0002"])
+
+    summary = run_bulk_import(root, workers=1)
+    assert (summary.imported, summary.duplicates) == (1, 1)
+    statuses = _statuses(root.resolve())
+    assert statuses["b.pdf"]["status"] == "duplicate"
+    assert statuses["b.pdf"]["candidate_id"] == statuses["a.pdf"]["candidate_id"]
+    assert content_path(hashlib.sha256((root / "a.pdf").read_bytes()).hexdigest()).exists()
+    assert not content_path(hashlib.sha256((root / "b.pdf").read_bytes()).hexdigest()).exists()
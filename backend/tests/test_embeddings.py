@@ -0,0 +1,152 @@
+import importlib
+import threading
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture()
+def embeddings(monkeypatch):
+    monkeypatch.setenv("RESUME_SELECTOR_EMBEDDER", "stub")
+    return importlib.import_module("server.embeddings")
+
+
+def test_coalescer_batches_concurrent_requests(embeddings):
+    calls = []
+
+    class Recorder(embeddings.Embedder):
+        def encode(self, texts):
+            texts = list(texts)
+            calls.append(len(texts))
+            return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+
+    coalescer = embeddings.BatchCoalescer(Recorder("recorder"), window_s=0.05, max_batch_size=8)
+    texts = ["a" * (i + 1) for i in range(8)]
+    results = [None] * len(texts)
+
+    def worker(index):
+        vector, model = coalescer.submit(texts[index]).result(timeout=5)
+        assert model == "recorder"
+        results[index] = vector
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [float(r[0]) for r in results] == [float(len(t)) for t in texts]
+    assert sum(calls) == len(texts)
+    assert len(calls) < len(texts)
+    stats = coalescer.stats()
+    assert stats["requests"] == len(texts)
+    assert stats["batches"] == len(calls)
+    assert stats["max_batch_seen"] == max(calls)
+
+
+def test_coalescer_fails_the_whole_batch_on_a_misshaped_result(embeddings):
+    class Short(embeddings.Embedder):
+        def encode(self, texts):
+            return np.zeros((len(list(texts)) - 1, 4), dtype=np.float32)
+
+    coalescer = embeddings.BatchCoalescer(Short("short"), window_s=0.05, max_batch_size=8)
+    futures = [coalescer.submit(text) for text in ("a", "b", "c")]
+    for future in futures:
+        with pytest.raises(ValueError, match="shape"):
+            future.result(timeout=5)
+    assert coalescer.stats()["failed_batches"] >= 1
+
+    # The thread survived and keeps serving.
+    coalescer.embedder = embeddings.load_local_embedder("stub")
+    vector, model = coalescer.submit("python").result(timeout=5)
+    assert model == "stub" and vector.ndim == 1
+
+
+def test_remote_embedder_round_trip_and_fallback(embeddings, tmp_path):
+    server_module = importlib.import_module("server.embedding_server")
+    socket_path = str(tmp_path / "embed.sock")
+    server = server_module.EmbeddingServer(socket_path, "stub", window_s=0.001, max_batch_size=16)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    client = embeddings.RemoteEmbedder(socket_path, fallback_mode="stub", timeout_s=5)
+    vectors = client.encode(["python docker", "rust kafka"])
+    assert vectors.shape == (2, server.dim)
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+    assert client.stats()["remote_calls"] == 1
+
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+    offline = embeddings.RemoteEmbedder(socket_path, fallback_mode="stub", timeout_s=5)
+    fallback = offline.encode(["python docker"])
+    assert fallback.shape == (1, server.dim)
+    assert offline.stats()["fallback_active"] is True
+    assert offline.stats()["fallback_calls"] == 1
+
+
+def test_remote_embedder_takes_model_from_server_and_surfaces_errors(embeddings, tmp_path):
+    server_module = importlib.import_module("server.embedding_server")
+    framing = importlib.import_module("server.utils.framing")
+    socket_path = str(tmp_path / "embed.sock")
+    server = server_module.EmbeddingServer(socket_path, "stub", window_s=0.001, max_batch_size=16)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # The fallback is a different model; the name must still come from the server.
+        client = embeddings.RemoteEmbedder(socket_path, fallback_mode="transformer", timeout_s=5)
+        # Asking for the name never opens the socket.
+        assert client.model_name == embeddings.MODEL_NAMES["transformer"]
+        assert client.stats()["connected"] is False
+        vectors, model = client.encode_tagged([])
+        assert model == "stub" and vectors.shape == (0, server.dim)
+        assert client.model_name == "stub"
+
+        def broken(texts):
+            raise RuntimeError("out of memory")
+
+        server.encode = broken
+        with pytest.raises(framing.RemoteError, match="out of memory"):
+            client.encode(["python docker"])
+        stats = client.stats()
+        assert stats["fallback_active"] is False and stats["fallback_calls"] == 0
+        assert stats["connected"] is True and stats["server_model"] == "stub"
+
+        del server.encode
+        assert client.encode(["python docker"]).shape == (1, server.dim)
+        assert client.stats()["remote_calls"] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+def test_remote_vectors_are_tagged_by_the_round_trip_that_made_them(embeddings, tmp_path):
+    server_module = importlib.import_module("server.embedding_server")
+    socket_path = str(tmp_path / "embed.sock")
+
+    def serve(model_name):
+        server = server_module.EmbeddingServer(socket_path, "stub", window_s=0.001, max_batch_size=16)
+        server.embedder.name = model_name
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server, thread
+
+    def stop(server, thread):
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+    client = embeddings.RemoteEmbedder(socket_path, fallback_mode="stub", timeout_s=5, retry_interval_s=0)
+    running = serve("stub-v1")
+    assert client.encode_tagged(["python"])[1] == "stub-v1"
+    stop(*running)
+
+    # The restarted server loads another model; the broken connection falls back first.
+    running = serve("stub-v2")
+    try:
+        assert client.encode_tagged(["python"])[1] == "stub"
+        assert client.encode_tagged(["python"])[1] == "stub-v2"
+    finally:
+        stop(*running)
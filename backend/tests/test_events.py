@@ -0,0 +1,67 @@
+import itertools
+
+from server.events import RESYNC, EventBus
+
+
+def _frames(bus, subscription, count):
+    return [frame for frame in itertools.islice(bus.stream(subscription, heartbeat_s=0.01), count)]
+
+
+def test_stream_filters_rankings_by_job():
+    bus = EventBus(history=16, queue_size=16, max_subscribers=4, epoch="e1")
+    subscription = bus.subscribe(job_id=7)
+    bus.publish("rankings", {"job_ids": [3]})
+    bus.publish("rankings", {"job_ids": [7]})
+    bus.publish("rankings", {"job_ids": None})
+    bus.publish("model", {"version": 2})
+    frames = _frames(bus, subscription, 4)
+    assert frames[0].startswith(b"retry:")
+    assert [frame.split(b"\n")[0] for frame in frames[1:]] == [b"id: e1-2", b"id: e1-3", b"id: e1-4"]
+    assert bus.stats()["subscribers"] == 0
+
+
+def test_reconnect_replays_history_or_resyncs():
+    bus = EventBus(history=3, queue_size=16, max_subscribers=4, epoch="e1")
+    for version in range(5):
+        bus.publish("model", {"version": version})
+
+    resumed = bus.subscribe(last_event_id="e1-3")
+    assert [frame.split(b"\n")[0] for frame in _frames(bus, resumed, 3)[1:]] == [b"id: e1-4", b"id: e1-5"]
+
+    stale = bus.subscribe(last_event_id="e1-1")
+    assert f"event: {RESYNC}".encode() in _frames(bus, stale, 2)[1]
+
+
+def test_reconnect_after_restart_resyncs():
+    previous = EventBus(history=16, queue_size=16, max_subscribers=4)
+    for version in range(5):
+        previous.publish("model", {"version": version})
+    held = previous.publish("model", {"version": 5}).event_id
+
+    # The restarted process has issued more events than the client saw, and fewer.
+    for published in (10, 1):
+        bus = EventBus(history=16, queue_size=16, max_subscribers=4)
+        for version in range(published):
+            bus.publish("model", {"version": version})
+        frames = _frames(bus, bus.subscribe(last_event_id=held), 2)
+        assert f"event: {RESYNC}".encode() in frames[1]
+        assert frames[1].startswith(f"id: {bus.epoch}-{published}\n".encode())
+
+    for foreign in ("40", "garbage", f"{bus.epoch}-99"):
+        assert bus.subscribe(last_event_id=foreign).overflowed
+    caught_up = bus.subscribe(last_event_id=f"{bus.epoch}-1")
+    assert not caught_up.overflowed and caught_up.inbox.empty()
+
+
+def test_slow_subscriber_gets_resync_instead_of_blocking():
+    bus = EventBus(history=16, queue_size=2, max_subscribers=4)
+    subscription = bus.subscribe()
+    for version in range(5):
+        bus.publish("model", {"version": version})
+    assert bus.stats()["overflows"] == 1
+    stream = bus.stream(subscription, heartbeat_s=0.01)
+    next(stream)
+    assert b"event: resync" in next(stream)
+    bus.publish("model", {"version": 6})
+    assert next(stream).startswith(f"id: {bus.epoch}-6".encode())
+    stream.close()
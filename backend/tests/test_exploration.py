@@ -0,0 +1,114 @@
+import copy
+
+import numpy as np
+import pytest
+
+from server.services.exploration import (
+    SHARDABLE_STRATEGIES,
+    STRATEGIES,
+    ExplorationParams,
+    candidate_uniforms,
+    keyed_slate,
+    merge_slate,
+    plan_keys,
+    select_slate,
+    shard_keys,
+    top_k_indices,
+)
+
+
+@pytest.fixture()
+def pool():
+    rng = np.random.default_rng(7)
+    features = rng.random((500, 5), dtype=np.float32)
+    weights = np.array([0.5, 0.18, 0.1, 0.17, 0.05], dtype=np.float32)
+    return features, weights
+
+
+def test_top_k_indices_matches_full_sort(pool):
+    features, weights = pool
+    scores = features @ weights
+    assert top_k_indices(scores, 10).tolist() == np.argsort(-scores, kind="stable")[:10].tolist()
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_strategies_are_reproducible_from_seed(pool, strategy):
+    features, weights = pool
+    params = ExplorationParams(strategy=strategy, epsilon=1.0, explore_slots=2, temperature=0.05)
+    first, seed = select_slate(features, weights, 10, params)
+    second, _ = select_slate(features, weights, 10, params, seed)
+    assert first.indices.tolist() == second.indices.tolist()
+    assert first.explore.tolist() == second.explore.tolist()
+    assert len(set(first.indices.tolist())) == 10
+
+
+def test_mixed_reserves_exploration_slots(pool):
+    features, weights = pool
+    params = ExplorationParams(strategy="mixed", explore_slots=3)
+    slate, _ = select_slate(features, weights, 10, params, seed=1)
+    greedy = set(top_k_indices(features @ weights, 7).tolist())
+    assert int(slate.explore.sum()) == 3
+    assert set(slate.indices[~slate.explore].tolist()) == greedy
+    assert not greedy & set(slate.indices[slate.explore].tolist())
+
+
+def test_unknown_strategy_rejected(pool):
+    features, weights = pool
+    with pytest.raises(ValueError):
+        select_slate(features, weights, 5, ExplorationParams(strategy="nope"))
+
+
+@pytest.mark.parametrize("strategy", sorted(SHARDABLE_STRATEGIES))
+def test_shard_top_k_lists_contain_the_whole_pool_slate(pool, strategy):
+    features, weights = pool
+    params = ExplorationParams(strategy=strategy, epsilon=1.0, explore_slots=3, temperature=0.05)
+    k = 10
+    rng = np.random.default_rng(3)
+    plan = plan_keys(params, weights, rng, seed=11)
+    scores = features @ weights
+    keys = np.empty_like(scores)
+    kept = []
+    for rows in np.array_split(np.arange(features.shape[0]), 4):
+        keys[rows] = shard_keys(plan, features[rows], scores[rows], rows)
+        kept.append(rows[np.union1d(top_k_indices(scores[rows], k), top_k_indices(keys[rows], k))])
+    kept = np.concatenate(kept)
+
+    whole = merge_slate(plan, params, scores, keys, features.shape[0], k, copy.deepcopy(rng))
+    merged = merge_slate(plan, params, scores[kept], keys[kept], features.shape[0], k, copy.deepcopy(rng))
+    assert kept[merged.indices].tolist() == whole.indices.tolist()
+    assert merged.explore.tolist() == whole.explore.tolist()
+
+
+def _scatter_gather(features, weights, ids, k, params, seed, shards):
+    rng = np.random.default_rng(seed)
+    plan = plan_keys(params, weights, rng, seed)
+    kept = []
+    for rows in np.array_split(np.arange(features.shape[0]), shards):
+        scores = features[rows] @ weights
+        keys = shard_keys(plan, features[rows], scores, ids[rows])
+        kept.append(rows[np.union1d(top_k_indices(scores, k), top_k_indices(keys, k))])
+    kept = np.sort(np.concatenate(kept))
+    scores = features[kept] @ weights
+    keys = shard_keys(plan, features[kept], scores, ids[kept])
+    slate = merge_slate(plan, params, scores, keys, features.shape[0], k, rng)
+    return kept[slate.indices], slate.explore
+
+
+@pytest.mark.parametrize("strategy", sorted(SHARDABLE_STRATEGIES))
+def test_keyed_slate_does_not_depend_on_shard_layout(pool, strategy):
+    features, weights = pool
+    ids = np.arange(features.shape[0], dtype=np.int64) * 3 + 17
+    params = ExplorationParams(strategy=strategy, epsilon=1.0, explore_slots=3, temperature=0.05)
+    whole = keyed_slate(features, weights, ids, 10, params, seed=5)
+    for shards in (1, 2, 3, 7):
+        indices, explore = _scatter_gather(features, weights, ids, 10, params, 5, shards)
+        assert indices.tolist() == whole.indices.tolist()
+        assert explore.tolist() == whole.explore.tolist()
+
+
+def test_candidate_uniforms_are_stable_per_id():
+    ids = np.array([1, 2, 3, 1_000_000], dtype=np.int64)
+    u = candidate_uniforms(42, ids)
+    assert ((u > 0) & (u < 1)).all()
+    assert candidate_uniforms(42, ids[::-1]).tolist() == u[::-1].tolist()
+    assert candidate_uniforms(43, ids).tolist() != u.tolist()
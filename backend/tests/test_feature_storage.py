@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+import server.database as database
+from server.services.feature_service import FEATURE_COLUMNS, fetch_feature_vectors
+
+
+def test_legacy_feature_rows_are_packed_on_startup(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE features (
+            job_id INTEGER NOT NULL, candidate_id INTEGER NOT NULL,
+            sem_sim REAL NOT NULL, skill_overlap REAL NOT NULL, jaccard REAL NOT NULL,
+            years REAL NOT NULL, edu REAL NOT NULL, bm25 REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY(job_id, candidate_id)
+        );
+        INSERT INTO features VALUES (1, 1, 0.75, 0.5, 0.25, 0.9, 0.9, 0.125);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.init_db()
+    with database.db_connection() as conn:
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(features)")]
+        assert columns == ["job_id", "candidate_id", "packed"]
+        assert len(conn.execute("SELECT packed FROM features").fetchone()["packed"]) == 16
+        conn.execute(
+            """
+            INSERT INTO candidates (id, pdf_path, text, embedding, years_exp, edu_level, skills, created_at)
+            VALUES (1, 'cv.pdf', 'text', x'', 10, 2, '[]', '2024-01-01T00:00:00Z')
+            """
+        )
+        vectors = fetch_feature_vectors(conn, 1, [1])
+
+    # years and edu now come from the candidate row, not the stored values.
+    expected = {"sem_sim": 0.75, "skill_overlap": 0.5, "jaccard": 0.25, "years": 0.5, "edu": 0.5, "bm25": 0.125}
+    assert vectors[1].tolist() == pytest.approx([expected[col] for col in FEATURE_COLUMNS])
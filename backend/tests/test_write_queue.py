@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+
+import pytest
+
+from server.database import db_connection, init_db
+from server.write_queue import WriteQueue, WriteTimeout
+
+
+@pytest.fixture()
+def scratch_table():
+    init_db()
+    with db_connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS wq_scratch (id INTEGER PRIMARY KEY, value TEXT UNIQUE)")
+        conn.execute("DELETE FROM wq_scratch")
+        conn.commit()
+    yield "wq_scratch"
+
+
+def test_group_commit_batches_concurrent_writes(scratch_table):
+    writes = WriteQueue(window_s=0.05, max_batch_size=16)
+    results = [None] * 12
+
+    def worker(index):
+        insert = lambda conn: conn.execute(f"INSERT INTO {scratch_table} (value) VALUES (?)", (f"v{index}",)).lastrowid
+        results[index] = writes.submit(insert).result(timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == len(results)
+    stats = writes.stats()
+    assert stats["writes"] == len(results)
+    assert stats["transactions"] < len(results)
+    with db_connection() as conn:
+        assert conn.execute(f"SELECT COUNT(*) AS n FROM {scratch_table}").fetchone()["n"] == len(results)
+
+
+def test_failed_write_rolls_back_alone(scratch_table):
+    writes = WriteQueue(window_s=0.05, max_batch_size=16)
+
+    def insert(value):
+        return lambda conn: conn.execute(f"INSERT INTO {scratch_table} (value) VALUES (?)", (value,))
+
+    def partial_then_fail(conn):
+        conn.execute(f"INSERT INTO {scratch_table} (value) VALUES ('partial')")
+        conn.execute(f"INSERT INTO {scratch_table} (value) VALUES ('a')")
+
+    futures = [writes.submit(insert("a")), writes.submit(partial_then_fail), writes.submit(insert("b"))]
+    futures[0].result(timeout=5)
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result(timeout=5)
+    futures[2].result(timeout=5)
+
+    with db_connection() as conn:
+        values = {row["value"] for row in conn.execute(f"SELECT value FROM {scratch_table}")}
+    assert values == {"a", "b"}
+    assert writes.stats()["failed_writes"] == 1
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_writer_resolves_every_future_and_restarts_after_a_fatal_error(scratch_table):
+    writes = WriteQueue(window_s=0.05, max_batch_size=16)
+    insert = lambda conn: conn.execute(f"INSERT INTO {scratch_table} (value) VALUES ('kept')").lastrowid
+
+    def fatal(conn):
+        raise KeyboardInterrupt
+
+    futures = [writes.submit(insert), writes.submit(fatal), writes.submit(insert)]
+    for future in futures:
+        with pytest.raises(KeyboardInterrupt):
+            future.result(timeout=5)
+    writes._thread.join(timeout=5)
+    assert writes.stats()["writer_alive"] is False
+
+    assert writes.submit(insert).result(timeout=5)
+    stats = writes.stats()
+    assert stats["writer_restarts"] == 1 and stats["writer_errors"] == 1 and stats["writer_alive"] is True
+    with db_connection() as conn:
+        # The batch that hit the fatal error was rolled back as a whole.
+        assert conn.execute(f"SELECT COUNT(*) AS n FROM {scratch_table}").fetchone()["n"] == 1
+
+
+def test_errors_outside_the_savepoint_fail_the_batch_not_the_writer(scratch_table, monkeypatch):
+    import server.write_queue as write_queue
+
+    writes = WriteQueue(window_s=0.0, max_batch_size=16)
+    real = write_queue.get_connection
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("disk went away")
+        return real()
+
+    monkeypatch.setattr(write_queue, "get_connection", flaky)
+    insert = lambda conn: conn.execute(f"INSERT INTO {scratch_table} (value) VALUES ('after')").lastrowid
+    with pytest.raises(RuntimeError, match="disk went away"):
+        writes.submit(insert).result(timeout=5)
+    assert writes.submit(insert).result(timeout=5)
+    assert writes.stats()["writer_restarts"] == 0
+
+
+def test_run_times_out_and_withdraws_queued_writes(scratch_table):
+    writes = WriteQueue(window_s=0.0, max_batch_size=1)
+    release = threading.Event()
+
+    def blocking(conn):
+        release.wait(5)
+        return "done"
+
+    insert = lambda conn: conn.execute(f"INSERT INTO {scratch_table} (value) VALUES ('late')")
+    with pytest.raises(WriteTimeout) as running:
+        writes.run(blocking, timeout_s=0.05)
+    assert running.value.withdrawn is False and running.value.status == 503
+    with pytest.raises(WriteTimeout) as queued:
+        writes.run(insert, timeout_s=0.05)
+    assert queued.value.withdrawn is True
+    release.set()
+
+    assert writes.run(lambda conn: "next", timeout_s=5) == "next"
+    assert writes.stats()["timeouts"] == 2
+    with db_connection() as conn:
+        assert conn.execute(f"SELECT COUNT(*) AS n FROM {scratch_table}").fetchone()["n"] == 0
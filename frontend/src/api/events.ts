@@ -0,0 +1,24 @@
+import api from '@/lib/axios'
+import type { ModelEvent, RankingsEvent } from '@/types/api'
+
+export interface EventHandlers {
+  onModel?: (event: ModelEvent) => void
+  onRankings?: (event: RankingsEvent) => void
+  onResync?: () => void
+}
+
+// Opens the server-sent event stream; returns a function that closes it.
+export function subscribeEvents(handlers: EventHandlers, jobId?: number | null): () => void {
+  if (typeof EventSource === 'undefined') {
+    return () => undefined
+  }
+  const url = new URL('/events', api.defaults.baseURL)
+  if (jobId) {
+    url.searchParams.set('job_id', String(jobId))
+  }
+  const source = new EventSource(url.toString())
+  source.addEventListener('model', (event) => handlers.onModel?.(JSON.parse((event as MessageEvent).data)))
+  source.addEventListener('rankings', (event) => handlers.onRankings?.(JSON.parse((event as MessageEvent).data)))
+  source.addEventListener('resync', () => handlers.onResync?.())
+  return () => source.close()
+}
@@ -2,7 +2,7 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '.
 import type { RankedCandidate } from '@/types/api'
 
 export interface FeatureTableFeature {
-  key: keyof Pick<RankedCandidate, 'sem_sim' | 'skill_overlap' | 'jaccard' | 'years' | 'edu'>
+  key: keyof Pick<RankedCandidate, 'sem_sim' | 'skill_overlap' | 'jaccard' | 'years' | 'edu' | 'bm25'>
   label: string
 }
 
@@ -26,7 +26,7 @@ export const FeatureTable = ({ candidate, weights, features }: FeatureTableProps
       <TableBody>
         {features.map((feature, index) => {
           const weight = weights[index] ?? 0
-          const value = candidate[feature.key] as number
+          const value = (candidate[feature.key] as number | undefined) ?? 0
           const contribution = weight * value
           return (
             <TableRow key={feature.key}>
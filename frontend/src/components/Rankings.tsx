@@ -28,7 +28,8 @@ const FEATURE_METADATA: FeatureTableFeature[] = [
   { key: 'skill_overlap', label: 'Skill overlap' },
   { key: 'jaccard', label: 'Jaccard score' },
   { key: 'years', label: 'Experience (norm)' },
-  { key: 'edu', label: 'Education (norm)' }
+  { key: 'edu', label: 'Education (norm)' },
+  { key: 'bm25', label: 'Keyword relevance (BM25)' }
 ]
 
 const maskEmail = (email: string) => {
@@ -71,7 +71,10 @@ export const ResumeUploader = ({ disabled }: ResumeUploaderProps) => {
         setItems((prev) =>
           prev.map((entry) => (entry.file === item.file ? { ...entry, status: 'success', candidateId } : entry))
         )
-        toastSuccess({ title: 'Resume ingested', description: `${item.file.name} → candidate ${candidateId}` })
+        toastSuccess({
+          title: response.duplicate ? 'Resume already ingested' : 'Resume ingested',
+          description: `${item.file.name} → candidate ${candidateId}`
+        })
       } catch (error) {
         setItems((prev) =>
           prev.map((entry) => (entry.file === item.file ? { ...entry, status: 'error', message: 'Upload failed' } : entry))
@@ -1,6 +1,6 @@
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './ui/card'
 
-const LABELS = ['Semantic', 'Skill overlap', 'Jaccard', 'Experience', 'Education']
+const LABELS = ['Semantic', 'Skill overlap', 'Jaccard', 'Experience', 'Education', 'BM25']
 
 interface WeightsPanelProps {
   weights: number[]
@@ -1,4 +1,4 @@
-import { useCallback, useEffect, useMemo, useState } from 'react'
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 
 import { Rankings } from '@/components/Rankings'
 import { WeightsPanel } from '@/components/WeightsPanel'
@@ -9,9 +9,10 @@ import { useToast } from '@/components/ui/use-toast'
 import { fetchRankings as fetchRankingsApi } from '@/api/rankings'
 import { sendFeedback } from '@/api/feedback'
 import { fetchModelState } from '@/api/models'
+import { subscribeEvents } from '@/api/events'
 import type { JobRecord, RankedCandidate } from '@/types/api'
 
-const DEFAULT_WEIGHTS = [0.5, 0.18, 0.1, 0.17, 0.05]
+const DEFAULT_WEIGHTS = [0.5, 0.18, 0.1, 0.17, 0.05, 0]
 
 interface RankTrainPageProps {
   jobs: JobRecord[]
@@ -34,6 +35,9 @@ export const RankTrainPage = ({ jobs, currentJobId, onSelectJob }: RankTrainPage
   const [modelMeta, setModelMeta] = useState<ModelMeta>({ lr: 0.1, l2: 1e-4 })
   const [loading, setLoading] = useState(false)
   const [shownIds, setShownIds] = useState<number[]>([])
+  const [slateId, setSlateId] = useState<string | undefined>(undefined)
+  const [stale, setStale] = useState(false)
+  const weightsVersion = useRef<number | undefined>(undefined)
   const { toastError, toastSuccess } = useToast()
 
   useEffect(() => {
@@ -51,6 +55,7 @@ export const RankTrainPage = ({ jobs, currentJobId, onSelectJob }: RankTrainPage
       const response = await fetchModelState()
       setWeights(response.weights ?? DEFAULT_WEIGHTS)
       setModelMeta({ lr: response.lr, l2: response.l2, updatedAt: response.updated_at })
+      weightsVersion.current = response.version
     } catch (error) {
       // Silent failure keeps UI usable when backend not ready
     }
@@ -60,6 +65,28 @@ export const RankTrainPage = ({ jobs, currentJobId, onSelectJob }: RankTrainPage
     pullModel()
   }, [pullModel])
 
+  // Other tabs' feedback and new uploads arrive as events instead of polling.
+  useEffect(() => {
+    return subscribeEvents(
+      {
+        onModel: (event) => {
+          // Our own feedback already refreshed the slate and weights.
+          if (weightsVersion.current !== undefined && event.version <= weightsVersion.current) return
+          pullModel()
+          setStale(true)
+        },
+        onRankings: (event) => {
+          if (event.reason !== 'weights') setStale(true)
+        },
+        onResync: () => {
+          pullModel()
+          setStale(true)
+        }
+      },
+      selectedJobId
+    )
+  }, [pullModel, selectedJobId])
+
   const loadRankings = useCallback(async () => {
     if (!selectedJobId) {
       toastError({ title: 'Select a job', description: 'Choose a job before fetching rankings.' })
@@ -71,6 +98,8 @@ export const RankTrainPage = ({ jobs, currentJobId, onSelectJob }: RankTrainPage
       setWeights(response.weights ?? DEFAULT_WEIGHTS)
       setCandidates(response.candidates)
       setShownIds(response.candidates.map((candidate) => candidate.candidate_id))
+      setSlateId(response.slate_id)
+      setStale(false)
     } catch (error) {
       toastError({ title: 'Rankings failed', description: 'Ensure the backend is running and resumes are ingested.' })
     } finally {
@@ -89,18 +118,20 @@ export const RankTrainPage = ({ jobs, currentJobId, onSelectJob }: RankTrainPage
     }
 
     try {
-      await sendFeedback({
+      const result = await sendFeedback({
         job_id: selectedJobId,
         shown_candidate_ids: shownIds,
-        chosen_candidate_id: candidateId
+        chosen_candidate_id: candidateId,
+        slate_id: slateId
       })
+      weightsVersion.current = result?.weights_version ?? weightsVersion.current
       toastSuccess({ title: 'Model updated', description: 'Feedback incorporated. Regenerating rankings…' })
       await loadRankings()
       await pullModel()
     } catch (error) {
       toastError({ title: 'Feedback failed', description: 'Could not update weights. Please retry.' })
     }
-  }, [loadRankings, pullModel, selectedJobId, shownIds, toastError, toastSuccess])
+  }, [loadRankings, pullModel, selectedJobId, shownIds, slateId, toastError, toastSuccess])
 
   const jobLabel = useMemo(() => {
     if (!selectedJobId) return 'No job selected'
@@ -177,6 +208,7 @@ export const RankTrainPage = ({ jobs, currentJobId, onSelectJob }: RankTrainPage
             <div className='flex items-center justify-between'>
               <div className='text-sm text-muted-foreground'>
                 Current job: <span className='font-medium text-foreground'>{jobLabel}</span>
+                {stale && candidates.length > 0 ? <span className='ml-2'>· Rankings changed, fetch again</span> : null}
               </div>
               <Button disabled={!selectedJobId || loading} onClick={loadRankings} variant='secondary'>
                 {loading ? 'Fetching…' : 'Fetch Rankings'}
@@ -21,6 +21,8 @@ export interface UploadResumeResponse {
   skills: string[]
   years_exp: number
   edu_level: number
+  content_hash?: string
+  duplicate?: boolean
 }
 
 export interface RankedCandidate {
@@ -36,31 +38,43 @@ export interface RankedCandidate {
   jaccard: number
   years: number
   edu: number
+  bm25?: number
   score: number
   explore: boolean
 }
 
+export type ExplorationStrategy = 'greedy' | 'epsilon' | 'mixed' | 'softmax' | 'thompson'
+
 export interface RankingResponse {
   job_id: number
   weights: number[]
   candidates: RankedCandidate[]
+  strategy?: ExplorationStrategy
+  seed?: number
+  slate_id?: string
 }
 
 export interface RankingParams {
   job_id: number
   k?: number
   epsilon?: number
+  strategy?: ExplorationStrategy
+  seed?: number
+  explore_slots?: number
+  temperature?: number
 }
 
 export interface FeedbackRequest {
   job_id: number
   shown_candidate_ids: number[]
   chosen_candidate_id: number
+  slate_id?: string
 }
 
 export interface FeedbackResponse {
   updated_pairs: number
   new_weights: number[]
+  weights_version?: number
 }
 
 export interface ModelState {
@@ -68,4 +82,15 @@ export interface ModelState {
   lr: number
   l2: number
   updated_at?: string
+  version?: number
+}
+
+export interface ModelEvent {
+  version: number
+  weights: number[]
+}
+
+export interface RankingsEvent {
+  job_ids: number[] | null
+  reason: string
 }